@@ -1,7 +1,6 @@
 import streamlit as st
 import sys
 import os
-import json
 from datetime import datetime
 import pandas as pd
 import plotly.express as px
@@ -17,7 +16,6 @@
 def ensure_database_exists():
     """Build the vector database if it doesn't exist"""
     import os
-    import json
     
     # Check if database already exists
     if os.path.exists('./chroma_db') and len(os.listdir('./chroma_db')) > 0:
@@ -33,15 +31,13 @@ def ensure_database_exists():
     
     # Load and index the data
     try:
-        from phase2_database.vector_store import VectorDatabase
-        import json
+        from phase2_database.registry import get_vector_database, get_tour_catalog
         
-        with open('phase1_scraping/tour_data_cleaned.json', 'r', encoding='utf-8') as f:
-            tours = json.load(f)
+        tours = get_tour_catalog().tours
         
         print(f"📊 Loaded {len(tours)} tours")
         
-        db = VectorDatabase()
+        db = get_vector_database()
         db.index_tours(tours)
         print("✅ Vector database built successfully")
         
@@ -66,6 +62,8 @@ def __init__(self, api_key=None):
             self.api_key = api_key
         def answer_question(self, question):
             return f"**Demo Mode**\n\nYour question: '{question}'\n\nThe full system requires additional packages. This is a placeholder response."
+        def answer_question_stream(self, question):
+            yield self.answer_question(question)
     
     class ItinerarySuggester:
         def __init__(self, api_key=None):
@@ -327,15 +325,32 @@ def generate_itinerary(self, preferences):
     st.stop()
 
 # Load tours data
-@st.cache_data
+@st.cache_resource
 def load_tours_data():
-    try:
-        with open('phase1_scraping/tour_data_cleaned.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+    # Shared read-only catalog; cache_resource hands out the object itself instead of a copy
+    from phase2_database.registry import get_tour_catalog
+    return get_tour_catalog()
+
+@st.cache_resource
+def load_fuzzy_matcher():
+    from phase2_database.registry import get_fuzzy_matcher
+    return get_fuzzy_matcher()
+
+@st.cache_resource
+def load_catalog_store():
+    # SQLite FTS5 store for Explorer search and paging; None when SQLite lacks FTS5
+    from phase2_database.registry import get_catalog_store
+    return get_catalog_store()
+
+EXPLORER_PAGE_SIZE = 20
 
 # Initialize systems
+@st.cache_resource
+def init_metrics_server():
+    # Prometheus /metrics and /metrics.json when METRICS_PORT is set
+    from phase2_database.metrics import start_metrics_server
+    return start_metrics_server()
+
 @st.cache_resource
 def init_rag_system():
     return RAGQASystem(api_key=api_key)
@@ -345,6 +360,7 @@ def init_itinerary_suggester():
     return ItinerarySuggester(api_key=api_key)
 
 # Initialize
+init_metrics_server()
 if st.session_state.rag_system is None:
     with st.spinner("🔄 Initializing AI systems..."):
         st.session_state.rag_system = init_rag_system()
@@ -366,19 +382,19 @@ def init_itinerary_suggester():
         st.markdown('<div class="stat-card"><div class="stat-number">' + str(len(tours)) + '</div><div class="stat-label">Total Tours</div></div>', unsafe_allow_html=True)
     
     with col2:
-        pilgrimage = sum(1 for t in tours if t.get('theme') == 'Pilgrimage')
+        pilgrimage = len(tours.with_theme('Pilgrimage'))
         st.markdown('<div class="stat-card"><div class="stat-number">' + str(pilgrimage) + '</div><div class="stat-label">Pilgrimage</div></div>', unsafe_allow_html=True)
     
     with col3:
-        international = sum(1 for t in tours if t.get('theme') == 'International')
+        international = len(tours.with_theme('International'))
         st.markdown('<div class="stat-card"><div class="stat-number">' + str(international) + '</div><div class="stat-label">International</div></div>', unsafe_allow_html=True)
     
     with col4:
-        romantic = sum(1 for t in tours if t.get('theme') == 'Romantic')
+        romantic = len(tours.with_theme('Romantic'))
         st.markdown('<div class="stat-card"><div class="stat-number">' + str(romantic) + '</div><div class="stat-label">Romantic</div></div>', unsafe_allow_html=True)
     
     with col5:
-        adventure = sum(1 for t in tours if t.get('theme') == 'Adventure')
+        adventure = len(tours.with_theme('Adventure'))
         st.markdown('<div class="stat-card"><div class="stat-number">' + str(adventure) + '</div><div class="stat-label">Adventure</div></div>', unsafe_allow_html=True)
 
 st.markdown('<hr class="custom-divider">', unsafe_allow_html=True)
@@ -413,15 +429,22 @@ def init_itinerary_suggester():
         with st.chat_message("user"):
             st.markdown(f'<div class="user-message">{prompt}</div>', unsafe_allow_html=True)
         
-        # Get assistant response
+        # Get assistant response, rendering tokens as they stream in
         with st.chat_message("assistant"):
+            placeholder = st.empty()
             with st.spinner("Thinking..."):
-                response = st.session_state.rag_system.answer_question(prompt)
-                # Clean the response
-                cleaned_response = response.replace("Namaste! ", "").replace("Namaste, ", "")
-                if cleaned_response.startswith("Namaste"):
-                    cleaned_response = "👋 " + cleaned_response[7:]
-                st.markdown(f'<div class="assistant-message">{cleaned_response}</div>', unsafe_allow_html=True)
+                # The spinner covers retrieval and the wait for the first token
+                stream = st.session_state.rag_system.answer_question_stream(prompt)
+                response = next(stream, "")
+            placeholder.markdown(f'<div class="assistant-message">{response}▌</div>', unsafe_allow_html=True)
+            for piece in stream:
+                response += piece
+                placeholder.markdown(f'<div class="assistant-message">{response}▌</div>', unsafe_allow_html=True)
+            # Clean the response
+            cleaned_response = response.replace("Namaste! ", "").replace("Namaste, ", "")
+            if cleaned_response.startswith("Namaste"):
+                cleaned_response = "👋 " + cleaned_response[7:]
+            placeholder.markdown(f'<div class="assistant-message">{cleaned_response}</div>', unsafe_allow_html=True)
         
         # Add assistant message
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -493,6 +516,7 @@ def init_itinerary_suggester():
                 # Create PDF in memory using BytesIO
                 pdf_buffer = io.BytesIO()
                 
+                pdf_started = time.perf_counter()
                 pdf = FPDF()
                 pdf.add_page()
                 
@@ -531,6 +555,9 @@ def init_itinerary_suggester():
                 
                 # Output to BytesIO instead of file
                 pdf_output = pdf.output(dest='S').encode('latin-1')
+                from phase2_database.metrics import metrics
+                metrics.record_span('pdf_render', time.perf_counter() - pdf_started,
+                                    {'bytes': len(pdf_output), 'lines': len(lines)}, None)
                 
                 # Download button with BytesIO data
                 pdf_filename = f"itinerary_{location.lower().replace(' ', '_')}.pdf"
@@ -629,27 +656,43 @@ def init_itinerary_suggester():
     if st.session_state.tours_data:
         tours = st.session_state.tours_data
         
+        store = load_catalog_store()
+        
         # Filters - Only Theme and Search
         col1, col2 = st.columns(2)
         with col1:
-            themes = ["All"] + sorted(set(t.get('theme', 'General') for t in tours))
+            themes = ["All"] + list(tours.themes)
             selected_theme = st.selectbox("Filter by Theme", themes, key="theme_filter")
         with col2:
             search = st.text_input("Search tours", placeholder="Enter keywords...", key="search_filter")
         
-        # Apply filters
-        filtered_tours = tours
-        
-        # Filter by theme
-        if selected_theme != "All":
-            filtered_tours = [t for t in filtered_tours if t.get('theme') == selected_theme]
+        # Apply filters: ranked prefix search in the FTS5 store, one page at a time
+        def count_matches(text):
+            if store is not None:
+                return store.count(text, selected_theme), None
+            matches = tours.search(text, selected_theme) if text else tours.with_theme(selected_theme)
+            return len(matches), matches
         
-        # Filter by search
-        if search:
-            filtered_tours = [t for t in filtered_tours if search.lower() in json.dumps(t).lower()]
+        total, matches = count_matches(search)
+        if search and not total:
+            # Nothing found as typed: retry with misspellings and alias names corrected
+            corrected = load_fuzzy_matcher().correct(search)
+            if corrected:
+                total, matches = count_matches(corrected)
+                if total:
+                    st.caption(f"Showing results for **{corrected}**")
+                    search = corrected
+        pages = max(1, -(-total // EXPLORER_PAGE_SIZE))
+        # No key: the widget (and the page) resets whenever the number of pages changes
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        offset = (page - 1) * EXPLORER_PAGE_SIZE
+        if store is not None:
+            filtered_tours = store.search(search, selected_theme, limit=EXPLORER_PAGE_SIZE, offset=offset)
+        else:
+            filtered_tours = matches[offset:offset + EXPLORER_PAGE_SIZE]
         
         # Display tours
-        st.markdown(f"### Found {len(filtered_tours)} tours")
+        st.markdown(f"### Found {total} tours")
         
         if not filtered_tours:
             st.info("No tours match your filters. Try adjusting your criteria.")
@@ -661,9 +704,9 @@ def init_itinerary_suggester():
                 with col1:
                     st.markdown(f"**Theme:** {tour.get('theme', 'General')}")
                     st.markdown(f"**Duration:** {tour.get('duration', 'Not specified')}")
-                    if tour.get('destinations') and tour['destinations'] != ["Destinations available on request"]:
+                    if tour.get('destinations') and tour['destinations'] != ("Destinations available on request",):
                         st.markdown(f"**Destinations:** {', '.join(tour['destinations'][:5])}")
-                    if tour.get('highlights') and tour['highlights'] != ["Customizable tour package - contact for details"]:
+                    if tour.get('highlights') and tour['highlights'] != ("Customizable tour package - contact for details",):
                         st.markdown("**Highlights:**")
                         for h in tour['highlights'][:3]:
                             st.markdown(f"- {h}")
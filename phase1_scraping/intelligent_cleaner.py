@@ -1,6 +1,8 @@
 import json
 import re
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def calculate_completeness(tour):
     """Calculate how complete the tour data is (0-100)"""
@@ -377,6 +379,24 @@ def intelligent_clean():
         json.dump(cleaned_tours, f, indent=2, ensure_ascii=False)
     print(f"Saved cleaned data to {output_file}")
     
+    # Binary catalog for fast startup; loaders prefer it while it is newer than the JSON
+    try:
+        from phase2_database.catalog_artifact import artifact_path, write_catalog_artifact
+        from phase2_database.postings import build_postings
+        artifact_file = write_catalog_artifact(cleaned_tours, artifact_path(output_file),
+                                               keyword_postings=build_postings(cleaned_tours))
+        print(f"Saved catalog artifact to {artifact_file}")
+    except Exception as e:
+        print(f"Catalog artifact not written ({e}); the app will load the JSON")
+    
+    # SQLite FTS5 store behind the Explorer search and the keyword fallback
+    try:
+        from phase2_database.catalog_store import CatalogStore, DEFAULT_STORE_PATH
+        CatalogStore(DEFAULT_STORE_PATH).build(cleaned_tours, source=output_file)
+        print(f"Saved catalog search store to {DEFAULT_STORE_PATH}")
+    except Exception as e:
+        print(f"Catalog search store not written ({e}); the app will build it on start")
+    
     # Save statistics
     save_statistics(cleaned_tours)
     
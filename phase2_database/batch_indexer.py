@@ -0,0 +1,113 @@
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Any, Tuple
+
+import numpy as np
+
+from phase2_database.registry import get_embedding_model, DEFAULT_MODEL_NAME
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+
+# Set in each pool worker by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int):
+    """Load the embedding model once per worker process"""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _worker_model = get_embedding_model(model_name)
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode(texts, show_progress_bar=False), dtype=np.float32)
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to batch_size items without materializing the input"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class BatchEncoder:
+    """Encodes chunk batches in the current process or across a pool of CPU workers
+
+    encode_stream() keeps at most 2 * workers batches in flight and yields them
+    in input order, so peak memory is bounded by the batch size, not the
+    catalog size. Workers are spawned, not forked: the parent has usually
+    loaded the model already, and forking after torch or tokenizers started
+    their thread pools can deadlock the children.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, workers: int = 0):
+        self.model_name = model_name
+        self.workers = max(0, workers)
+
+    def encode_stream(self, batches: Iterable[List[Dict[str, Any]]]
+                      ) -> Iterator[Tuple[List[Dict[str, Any]], np.ndarray]]:
+        """Yield (batch, embeddings) for every batch of chunks"""
+        if self.workers == 0:
+            model = get_embedding_model(self.model_name)
+            for batch in batches:
+                texts = [chunk['text'] for chunk in batch]
+                yield batch, np.asarray(model.encode(texts, show_progress_bar=False), dtype=np.float32)
+            return
+
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(self.model_name, threads)) as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append((batch, pool.submit(_encode_in_worker, [c['text'] for c in batch])))
+                if len(in_flight) >= 2 * self.workers:
+                    done_batch, future = in_flight.popleft()
+                    yield done_batch, future.result()
+            while in_flight:
+                done_batch, future = in_flight.popleft()
+                yield done_batch, future.result()
+
+
+class ThroughputMeter:
+    """Tracks rows written and reports rows/sec"""
+
+    def __init__(self, label: str = "indexing"):
+        self.label = label
+        self.rows = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows: int):
+        self.rows += rows
+        self.batches += 1
+        logger.info(f"[{self.label}] batch {self.batches}: {self.rows} rows, {self.rows_per_sec():.1f} rows/sec")
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rows_per_sec(self) -> float:
+        elapsed = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'batches': self.batches,
+            'seconds': round(self.elapsed(), 3),
+            'rows_per_sec': round(self.rows_per_sec(), 1),
+        }
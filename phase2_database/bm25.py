@@ -0,0 +1,66 @@
+import math
+import heapq
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+from phase2_database.text_utils import tokenize
+
+
+class BM25Index:
+    """Okapi BM25 over tour chunks, built once in memory
+
+    Postings are stored per term as (row, term frequency) pairs, so a query
+    only touches the rows that contain one of its terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.row_by_id: Dict[str, int] = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.idf: Dict[str, float] = {}
+        self.doc_lengths: List[int] = []
+        self.avg_length = 0.0
+
+    def build(self, chunks: List[Dict[str, Any]]):
+        """Index chunks as produced by EmbeddingGenerator.prepare_tour_chunks"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for chunk in chunks:
+            row = len(self.ids)
+            self.ids.append(chunk['id'])
+            self.documents.append(chunk['text'])
+            self.metadatas.append(chunk['metadata'])
+            self.row_by_id[chunk['id']] = row
+
+            counts = Counter(tokenize(chunk['text']))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        n_docs = len(self.ids)
+        self.postings = postings
+        self.avg_length = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for term, rows in postings.items()
+        }
+        return self
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """Return up to n_results (chunk id, score) pairs, best first"""
+        scores: Dict[int, float] = {}
+        k1, b, avg = self.k1, self.b, self.avg_length or 1.0
+        for term in set(tokenize(query)):
+            rows = self.postings.get(term)
+            if not rows:
+                continue
+            idf = self.idf[term]
+            for row, tf in rows:
+                norm = k1 * (1 - b + b * self.doc_lengths[row] / avg)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+        return [(self.ids[row], score) for row, score in top]
@@ -0,0 +1,219 @@
+import os
+import json
+import logging
+from types import MappingProxyType
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+
+from phase2_database.filters import normalize_destinations
+from phase2_database.text_utils import normalize_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = 'phase1_scraping/tour_data_cleaned.json'
+RAW_CATALOG_PATH = 'phase1_scraping/tour_data.json'
+
+# Fields written by phase1_scraping; anything else on a tour is dropped
+TOUR_FIELDS = ('name', 'url', 'source_tab', 'theme', 'price', 'destinations', 'duration',
+               'highlights', 'metadata', 'is_umbrella_package', 'category')
+_LIST_FIELDS = ('destinations', 'highlights')
+
+# Records loaded from the same JSON share a handful of key sets
+_KEY_SETS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _freeze(field: str, value):
+    if field in _LIST_FIELDS:
+        return tuple(value or ())
+    if field == 'metadata':
+        return MappingProxyType(dict(value or {}))
+    return value
+
+
+class TourRecord:
+    """One read-only tour, addressable like the dict it was loaded from
+
+    tour.get('name'), tour['destinations'] and 'url' in tour behave as on the
+    JSON dict (lists come back as tuples). Search fields are computed once:
+    search_text is the lowercased text of every field, destination_set the
+    normalized destinations without placeholders, theme_key the normalized
+    theme.
+    """
+
+    __slots__ = TOUR_FIELDS + ('search_text', 'destination_set', 'theme_key', '_keys')
+
+    def __init__(self, tour: Dict[str, Any]):
+        keys = tuple(field for field in TOUR_FIELDS if field in tour)
+        object.__setattr__(self, '_keys', _KEY_SETS.setdefault(keys, keys))
+        for field in TOUR_FIELDS:
+            object.__setattr__(self, field, _freeze(field, tour[field]) if field in tour else None)
+
+        parts = [self.name, self.theme, self.duration, self.price, self.source_tab, self.category]
+        parts.extend(self.destinations or ())
+        parts.extend(self.highlights or ())
+        object.__setattr__(self, 'search_text', "\n".join(str(p) for p in parts if p).lower())
+        object.__setattr__(self, 'destination_set', frozenset(normalize_destinations(self.destinations or ())))
+        object.__setattr__(self, 'theme_key', normalize_text(self.theme or ''))
+
+    def __setattr__(self, field, value):
+        raise AttributeError("TourRecord is immutable")
+
+    def __delattr__(self, field):
+        raise AttributeError("TourRecord is immutable")
+
+    def get(self, field: str, default=None):
+        if field not in self._keys:
+            return default
+        return getattr(self, field)
+
+    def __getitem__(self, field: str):
+        if field not in self._keys:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field) -> bool:
+        return field in self._keys
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-serializable dict, as in tour_data_cleaned.json"""
+        tour = {}
+        for field in self.keys():
+            value = getattr(self, field)
+            if field in _LIST_FIELDS:
+                value = list(value)
+            elif field == 'metadata':
+                value = dict(value)
+            tour[field] = value
+        return tour
+
+    def __reduce__(self):
+        return (TourRecord, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f"TourRecord({self.name!r})"
+
+
+RECORD_SLOTS = TourRecord.__slots__
+_SLOT_SETTERS = tuple(getattr(TourRecord, slot).__set__ for slot in RECORD_SLOTS)
+
+
+def restore_records(columns: Dict[str, List[Any]]) -> List[TourRecord]:
+    """Rebuild records from per-slot columns of already frozen values (see catalog_artifact)
+
+    Skips the search-field computation done by TourRecord(tour).
+    """
+    new = object.__new__
+    records = []
+    for values in zip(*(columns[slot] for slot in RECORD_SLOTS)):
+        record = new(TourRecord)
+        for setter, value in zip(_SLOT_SETTERS, values):
+            setter(record, value)
+        records.append(record)
+    return records
+
+
+class TourCatalog:
+    """Immutable set of tours with lookups by name, theme and destination
+
+    Built once per process (see registry.get_tour_catalog) and shared by the
+    app, the QA system, the itinerary planner and the indexer. by_name holds
+    the most complete record per name, by_theme and by_destination hold
+    tuples of records in catalog order. keyword_postings is set when the
+    catalog comes from a binary artifact that carries the keyword index.
+    """
+
+    def __init__(self, tours: Iterable[Dict[str, Any]], source: Optional[str] = None,
+                 keyword_postings: Optional[Dict[str, Any]] = None):
+        self.source = source
+        self.keyword_postings = keyword_postings
+        self.tours: Tuple[TourRecord, ...] = tuple(
+            tour if isinstance(tour, TourRecord) else TourRecord(tour) for tour in tours
+        )
+
+        by_name: Dict[str, TourRecord] = {}
+        by_theme: Dict[str, List[TourRecord]] = {}
+        by_destination: Dict[str, List[TourRecord]] = {}
+        for tour in self.tours:
+            current = by_name.get(tour.name)
+            if current is None or _completeness(tour) > _completeness(current):
+                by_name[tour.name] = tour
+            by_theme.setdefault(tour.theme or 'General', []).append(tour)
+            for destination in tour.destination_set:
+                by_destination.setdefault(destination, []).append(tour)
+
+        self.by_name = MappingProxyType(by_name)
+        self.by_theme = MappingProxyType({theme: tuple(rows) for theme, rows in by_theme.items()})
+        self.by_destination = MappingProxyType({dest: tuple(rows) for dest, rows in by_destination.items()})
+        self.themes: Tuple[str, ...] = tuple(sorted(self.by_theme))
+
+    def __len__(self) -> int:
+        return len(self.tours)
+
+    def __iter__(self) -> Iterator[TourRecord]:
+        return iter(self.tours)
+
+    def __getitem__(self, index: int) -> TourRecord:
+        return self.tours[index]
+
+    def __bool__(self) -> bool:
+        return bool(self.tours)
+
+    def get(self, name: str) -> Optional[TourRecord]:
+        return self.by_name.get(name)
+
+    def with_theme(self, theme: Optional[str]) -> Tuple[TourRecord, ...]:
+        """Tours of one theme; all tours for None or "All\""""
+        if not theme or theme == "All":
+            return self.tours
+        return self.by_theme.get(theme, ())
+
+    def with_destination(self, destination: str) -> Tuple[TourRecord, ...]:
+        return self.by_destination.get(normalize_text(destination), ())
+
+    def search(self, text: str, theme: Optional[str] = None) -> List[TourRecord]:
+        """Tours whose text contains text (case-insensitive), optionally within a theme"""
+        needle = (text or '').lower()
+        return [tour for tour in self.with_theme(theme) if needle in tour.search_text]
+
+    @classmethod
+    def from_json(cls, filepath: str = DEFAULT_CATALOG_PATH) -> 'TourCatalog':
+        with open(filepath, 'r', encoding='utf-8') as f:
+            tours = json.load(f)
+        logger.info(f"Loaded {len(tours)} tours from {filepath}")
+        return cls(tours, source=filepath)
+
+
+def _completeness(tour: TourRecord) -> int:
+    return (tour.metadata or {}).get('completeness_score', 0)
+
+
+def load_catalog(filepath: str = DEFAULT_CATALOG_PATH) -> TourCatalog:
+    """Catalog for filepath, from its binary artifact when that is at least as new as the JSON
+
+    Falls back to the JSON, then to the raw scrape, then to an empty catalog.
+    """
+    from phase2_database.catalog_artifact import artifact_path, read_catalog_artifact
+
+    binary_path = artifact_path(filepath)
+    if os.path.exists(binary_path) and (
+            not os.path.exists(filepath) or os.path.getmtime(binary_path) >= os.path.getmtime(filepath)):
+        catalog = read_catalog_artifact(binary_path, source=filepath)
+        if catalog is not None:
+            return catalog
+
+    try:
+        return TourCatalog.from_json(filepath)
+    except FileNotFoundError:
+        if filepath == DEFAULT_CATALOG_PATH:
+            logger.warning(f"{filepath} not found. Trying raw data...")
+            try:
+                return TourCatalog.from_json(RAW_CATALOG_PATH)
+            except FileNotFoundError:
+                pass
+        logger.warning("No tour data found")
+    except Exception as e:
+        logger.error(f"Error loading tours: {e}")
+    return TourCatalog([], source=filepath)
@@ -0,0 +1,125 @@
+import os
+import sys
+import marshal
+import logging
+from types import MappingProxyType
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from phase2_database.catalog import TourCatalog, TourRecord, RECORD_SLOTS, restore_records
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ARTIFACT_MAGIC = b'NITCAT\x00'
+ARTIFACT_FORMAT_VERSION = 2
+ARTIFACT_SUFFIX = '.catalog'
+# marshal's format may change between interpreters: an artifact is only read by the one that wrote it
+INTERPRETER_TAG = f"{sys.implementation.cache_tag}-marshal{marshal.version}".encode('ascii')
+
+
+def artifact_path(json_path: str) -> str:
+    """tour_data_cleaned.json -> tour_data_cleaned.catalog"""
+    return os.path.splitext(json_path)[0] + ARTIFACT_SUFFIX
+
+
+def write_catalog_artifact(tours: Iterable[Dict[str, Any]], path: str,
+                           keyword_postings: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None) -> str:
+    """Write tours as a versioned binary catalog next to the JSON
+
+    The file is ARTIFACT_MAGIC, a format version byte, the length-prefixed
+    INTERPRETER_TAG and one marshal payload:
+    a column per TourRecord slot (search fields included, so nothing is
+    recomputed on load) and optionally the keyword postings as one int32 and
+    one float64 buffer plus per-term offsets. Equal strings, key sets and
+    tuples are shared objects, so marshal stores each theme, destination and
+    label once and refers back to it. The file is swapped in atomically.
+    """
+    records = [tour if isinstance(tour, TourRecord) else TourRecord(tour) for tour in tours]
+    shared: Dict[Any, Any] = {}
+
+    def intern(value):
+        return shared.setdefault(value, value)
+
+    columns: Dict[str, List[Any]] = {slot: [] for slot in RECORD_SLOTS}
+    for record in records:
+        for slot in RECORD_SLOTS:
+            value = getattr(record, slot)
+            if isinstance(value, MappingProxyType):
+                value = {intern(k): v for k, v in value.items()}
+            elif isinstance(value, (tuple, frozenset)):
+                value = intern(type(value)(intern(item) for item in value))
+            elif isinstance(value, str):
+                value = intern(value)
+            columns[slot].append(value)
+
+    payload = {'count': len(records), 'columns': columns}
+    if keyword_postings is not None:
+        terms = list(keyword_postings)
+        lengths = [len(keyword_postings[term][0]) for term in terms]
+        payload['keyword_postings'] = {
+            'terms': terms,
+            'offsets': np.concatenate(([0], np.cumsum(lengths))).astype(np.int64).tobytes(),
+            'rows': np.concatenate([keyword_postings[t][0] for t in terms] or [[]]).astype(np.int32).tobytes(),
+            'scores': np.concatenate([keyword_postings[t][1] for t in terms] or [[]]).astype(np.float64).tobytes(),
+        }
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(ARTIFACT_MAGIC + bytes([ARTIFACT_FORMAT_VERSION, len(INTERPRETER_TAG)]) + INTERPRETER_TAG)
+        f.write(marshal.dumps(payload))
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote catalog artifact with {len(records)} tours to {path}")
+    return path
+
+
+def read_catalog_artifact(path: str, source: Optional[str] = None) -> Optional[TourCatalog]:
+    """TourCatalog from an artifact, or None when the file is missing, corrupt, of another
+    version or written by another interpreter"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = len(ARTIFACT_MAGIC) + 2
+    if not data.startswith(ARTIFACT_MAGIC) or len(data) < header:
+        logger.warning(f"{path} is not a catalog artifact")
+        return None
+    version = data[header - 2]
+    if version != ARTIFACT_FORMAT_VERSION:
+        logger.warning(f"Catalog artifact {path} has format {version}, expected {ARTIFACT_FORMAT_VERSION}")
+        return None
+    tag = bytes(data[header:header + data[header - 1]])
+    if tag != INTERPRETER_TAG:
+        logger.warning(f"Catalog artifact {path} was written by {tag.decode('ascii', 'replace')}, "
+                       f"not {INTERPRETER_TAG.decode('ascii')}; loading the JSON")
+        return None
+    header += len(tag)
+    try:
+        payload = marshal.loads(memoryview(data)[header:])
+    except (EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Catalog artifact {path} could not be decoded: {e}")
+        return None
+
+    columns = payload['columns']
+    if set(columns) != set(RECORD_SLOTS):
+        logger.warning(f"Catalog artifact {path} does not match this version of TourRecord, rebuild it")
+        return None
+    columns['metadata'] = [None if m is None else MappingProxyType(m) for m in columns['metadata']]
+    records = restore_records(columns)
+
+    keyword_postings = None
+    if 'keyword_postings' in payload:
+        packed = payload['keyword_postings']
+        offsets = np.frombuffer(packed['offsets'], dtype=np.int64)
+        rows = np.frombuffer(packed['rows'], dtype=np.int32)
+        scores = np.frombuffer(packed['scores'], dtype=np.float64)
+        keyword_postings = {
+            term: (rows[offsets[i]:offsets[i + 1]], scores[offsets[i]:offsets[i + 1]])
+            for i, term in enumerate(packed['terms'])
+        }
+
+    catalog = TourCatalog(records, source=source or path, keyword_postings=keyword_postings)
+    logger.info(f"Loaded {len(records)} tours from catalog artifact {path}")
+    return catalog
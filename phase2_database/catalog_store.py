@@ -0,0 +1,260 @@
+import os
+import json
+import sqlite3
+import threading
+import logging
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from phase2_database.catalog import TourRecord
+from phase2_database.filters import normalize_destinations, PLACEHOLDER_HIGHLIGHTS
+from phase2_database.text_utils import tokenize
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = 'phase1_scraping/tour_catalog.sqlite'
+
+# bm25 column weights, same order and proportions as the keyword fallback:
+# name, destinations, theme, highlights
+FTS_WEIGHTS = (3.0, 2.0, 2.0, 1.0)
+COMPLETENESS_FLAGS = ('has_destinations', 'has_price', 'has_duration', 'has_highlights')
+
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def match_expression(query: str, match_any: bool = False, drop_stopwords: bool = True) -> str:
+    """FTS5 MATCH string with every query token as a quoted prefix term
+
+    "raj forts" -> '"raj"* AND "fort"*' (OR with match_any): a trailing
+    plural "s" is dropped since the prefix covers it. Stopwords are dropped,
+    except from an all-stopword query that must match every term. Returns ""
+    when the query has no usable tokens.
+    """
+    tokens = tokenize(query, drop_stopwords=drop_stopwords)
+    if not tokens and not match_any:
+        tokens = tokenize(query, drop_stopwords=False)
+    terms = []
+    for token in tokens:
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(f'"{token}"*')
+    return (" OR " if match_any else " AND ").join(terms)
+
+
+class CatalogStore:
+    """Tour catalog in SQLite with an FTS5 index for search and paging
+
+    The tours table keeps each tour's JSON with indexed theme and
+    completeness columns; tours_fts indexes name, destinations, theme and
+    highlights (placeholders left out) with rowid = tour row. Queries are
+    ranked by bm25 with FTS_WEIGHTS and return only the requested page, so
+    the Explorer and the keyword fallback never scan the catalog in Python.
+    build() writes a new database next to the old one and swaps it in.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def build(self, tours: Iterable[Dict[str, Any]], source: Optional[str] = None) -> int:
+        """Write tours to a fresh database and swap it in; returns the number of tours
+
+        source is the catalog JSON the tours came from, kept so that
+        staleness is checked against that file.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per-process temp file: several workers may rebuild a stale store at once
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        count = 0
+        try:
+            conn.executescript("""
+                CREATE TABLE tours (
+                    row INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    theme TEXT NOT NULL,
+                    has_destinations INTEGER NOT NULL,
+                    has_price INTEGER NOT NULL,
+                    has_duration INTEGER NOT NULL,
+                    has_highlights INTEGER NOT NULL,
+                    completeness_score INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE tours_fts USING fts5(
+                    name, destinations, theme, highlights,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                );
+            """)
+            for row, tour in enumerate(tours):
+                if isinstance(tour, TourRecord):
+                    tour = tour.to_dict()
+                flags = tour.get('metadata', {}) or {}
+                theme = tour.get('theme', '') or 'General'
+                conn.execute(
+                    "INSERT INTO tours VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row, tour.get('name', ''), theme,
+                     *(int(bool(flags.get(flag))) for flag in COMPLETENESS_FLAGS),
+                     int(flags.get('completeness_score', 0)),
+                     json.dumps(tour, ensure_ascii=False))
+                )
+                highlights = [h for h in tour.get('highlights', []) or [] if h and h != PLACEHOLDER_HIGHLIGHTS]
+                conn.execute(
+                    "INSERT INTO tours_fts (rowid, name, destinations, theme, highlights) VALUES (?, ?, ?, ?, ?)",
+                    (row, tour.get('name', ''), "\n".join(normalize_destinations(tour.get('destinations', []))),
+                     theme, "\n".join(highlights))
+                )
+                count += 1
+            if source:
+                conn.execute("INSERT INTO meta VALUES ('source', ?)", (source,))
+            conn.executescript("""
+                CREATE INDEX idx_tours_theme ON tours(theme);
+                CREATE INDEX idx_tours_completeness ON tours(completeness_score);
+                INSERT INTO tours_fts(tours_fts) VALUES ('optimize');
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            os.replace(tmp_path, self.path)
+        logger.info(f"Built catalog store with {count} tours at {self.path}")
+        return count
+
+    def _clause(self, query: str, theme: Optional[str], min_completeness: Optional[int],
+                mode: str, drop_stopwords: bool) -> Optional[Tuple[str, str, List[Any]]]:
+        """(FROM clause, WHERE clause, parameters) for one matching mode
+
+        mode is 'all' (every token), 'any' (any token) or 'substring' (the
+        query anywhere in the tour JSON). None when the query has text but no
+        searchable tokens, i.e. nothing can match.
+        """
+        clauses = []
+        params: List[Any] = []
+        if mode == 'substring':
+            expression = ""
+            if query and query.strip():
+                escaped = query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                clauses.append("tours.data LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+        else:
+            expression = match_expression(query, mode == 'any', drop_stopwords) if query else ""
+            if query and query.strip() and not expression:
+                return None
+        if expression:
+            source = "tours_fts JOIN tours ON tours.row = tours_fts.rowid"
+            clauses.append("tours_fts MATCH ?")
+            params.append(expression)
+        else:
+            source = "tours"
+        if theme and theme != "All":
+            clauses.append("tours.theme = ?")
+            params.append(theme)
+        if min_completeness is not None:
+            clauses.append("tours.completeness_score >= ?")
+            params.append(int(min_completeness))
+        return source, (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _where(self, query: str, theme: Optional[str], min_completeness: Optional[int],
+               match_any: bool, drop_stopwords: bool) -> Optional[Tuple[str, str, List[Any]]]:
+        """Clause shared by search and count: the first mode that matches anything
+
+        All tokens first, then any token ranked by bm25, then a plain
+        substring match on the tour JSON like the original Explorer filter
+        ("what" may only occur inside a URL or another unindexed field).
+        """
+        if not (query and query.strip()):
+            return self._clause(query, theme, min_completeness, 'all', drop_stopwords)
+        modes = ('any',) if match_any else ('all', 'any', 'substring')
+        found = None
+        for mode in modes:
+            clause = self._clause(query, theme, min_completeness, mode, drop_stopwords)
+            if clause is None:
+                continue
+            found = clause
+            source, where, params = clause
+            with self._lock:
+                if self._connection().execute(f"SELECT 1 FROM {source}{where} LIMIT 1", params).fetchone():
+                    break
+        return found
+
+    def search(self, query: str = "", theme: Optional[str] = None, limit: int = 20, offset: int = 0,
+               min_completeness: Optional[int] = None, match_any: bool = False,
+               drop_stopwords: bool = True) -> List[TourRecord]:
+        """One page of tours, best bm25 match first (catalog order without a query)
+
+        Every query token is a prefix, so "raj" finds Rajasthan. When no tour
+        has all the tokens, tours with any of them are ranked instead ("yoga
+        kerala"); match_any goes straight to that.
+        """
+        clause = self._where(query, theme, min_completeness, match_any, drop_stopwords)
+        if clause is None:
+            return []
+        source, where, params = clause
+        if source == "tours":
+            order = "tours.row"
+        else:
+            order = f"bm25(tours_fts, {', '.join(str(w) for w in FTS_WEIGHTS)}), tours.row"
+        sql = f"SELECT tours.data FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._connection().execute(sql, params + [int(limit), int(offset)]).fetchall()
+        return [TourRecord(json.loads(data)) for (data,) in rows]
+
+    def count(self, query: str = "", theme: Optional[str] = None, min_completeness: Optional[int] = None,
+              match_any: bool = False, drop_stopwords: bool = True) -> int:
+        """Number of tours search() would page through"""
+        clause = self._where(query, theme, min_completeness, match_any, drop_stopwords)
+        if clause is None:
+            return 0
+        source, where, params = clause
+        with self._lock:
+            return self._connection().execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+
+    def source(self) -> Optional[str]:
+        """Catalog JSON the store was built from, None when unknown"""
+        with self._lock:
+            try:
+                row = self._connection().execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            except sqlite3.OperationalError:
+                # Stores built before the meta table existed
+                return None
+        return row[0] if row else None
+
+    def themes(self) -> List[str]:
+        with self._lock:
+            return [theme for (theme,) in self._connection().execute(
+                "SELECT DISTINCT theme FROM tours ORDER BY theme")]
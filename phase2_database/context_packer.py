@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Callable
+
+from phase2_database.filters import PLACEHOLDER_VALUES, DESTINATION_LABEL_RE
+from phase2_database.metrics import observe, SIZE_BUCKETS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '800'))
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _is_placeholder(value: str) -> bool:
+    return value.strip().rstrip('.').lower() in PLACEHOLDER_VALUES
+
+
+def make_token_counter(model=None) -> Callable[[str], int]:
+    """Token counter backed by the embedding model's local tokenizer
+
+    Works with SentenceTransformer (transformers tokenizer) and
+    OnnxEmbeddingModel (tokenizers.Tokenizer). The WordPiece count is an
+    approximation of what the Groq models see, close enough to size prompts.
+    Without a tokenizer, words and punctuation are counted instead.
+    """
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is not None:
+        try:
+            if hasattr(tokenizer, 'to_str'):
+                # tokenizers.Tokenizer: use an untruncated, unpadded copy
+                from tokenizers import Tokenizer
+                tokenizer = Tokenizer.from_str(tokenizer.to_str())
+                tokenizer.no_truncation()
+                tokenizer.no_padding()
+
+            def count_tokens(text: str) -> int:
+                encoded = tokenizer.encode(text, add_special_tokens=False)
+                return len(getattr(encoded, 'ids', encoded))
+
+            count_tokens("probe")
+            return count_tokens
+        except Exception as e:
+            logger.warning(f"Tokenizer unusable for token counting, estimating instead: {e}")
+    return lambda text: len(_WORD_RE.findall(text))
+
+
+def clean_block(text: str, seen_items: Optional[set] = None) -> str:
+    """Drop placeholder fields and repeated lines from one tour block
+
+    "Field: <placeholder>" lines are removed, placeholder entries are cut out
+    of the Highlights and Destinations lists, and the scraped "Destinations ➝" label is
+    stripped. Repeated lines within the block are dropped; seen_items is
+    shared across blocks so a highlight already in the context is not
+    repeated under another tour.
+    """
+    seen_items = set() if seen_items is None else seen_items
+    seen_lines = set()
+    lines = []
+    for line in text.split("\n"):
+        label, sep, value = line.partition(": ")
+        if sep:
+            separator = "; " if label == "Highlights" else ", "
+            items = [item for item in value.split(separator) if item.strip() and not _is_placeholder(item)]
+            if label == "Destinations":
+                items = [DESTINATION_LABEL_RE.sub('', item) for item in items]
+            elif label == "Highlights":
+                items = [item for item in items if item.strip().lower() not in seen_items]
+                seen_items.update(item.strip().lower() for item in items)
+            if not items:
+                continue
+            line = f"{label}{sep}{separator.join(items)}"
+        elif not line.strip() or _is_placeholder(line):
+            continue
+
+        key = line.strip().lower()
+        if key in seen_lines:
+            continue
+        seen_lines.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class ContextPacker:
+    """Fit tour blocks into a token budget for the LLM prompt
+
+    Blocks are taken in relevance order and cleaned with clean_block. A block
+    that does not fit is cut back line by line, and packing moves on to the
+    next, possibly shorter, block. Token counts before and after packing are
+    accumulated for stats().
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+        self.requests = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()
+
+    def pack(self, blocks: List[Dict[str, str]], token_budget: Optional[int] = None) -> str:
+        """Join {'tour_name', 'document'} blocks into at most token_budget tokens"""
+        budget = token_budget or self.token_budget
+        separator_tokens = self.count_tokens("\n\n")
+        seen_items: set = set()
+        parts: List[str] = []
+        used = 0
+        before = 0
+
+        for block in blocks:
+            prefix = f"[From {block['tour_name']}]: "
+            before += self.count_tokens(prefix + block['document']) + separator_tokens
+            document = clean_block(block['document'], seen_items)
+            # The "[From ...]" prefix already names the tour
+            document = document.replace(f"Tour Name: {block['tour_name']}\n", "", 1)
+            if not document:
+                continue
+
+            cost = (separator_tokens if parts else 0)
+            lines = document.split("\n")
+            kept: List[str] = []
+            for line in lines:
+                line_cost = self.count_tokens((prefix if not kept else "\n") + line)
+                if used + cost + line_cost > budget:
+                    break
+                kept.append(line)
+                cost += line_cost
+            if kept:
+                parts.append(prefix + "\n".join(kept))
+                used += cost
+
+        context = "\n\n".join(parts)
+        before = max(before - separator_tokens, 0)
+        after = used
+        with self._lock:
+            self.requests += 1
+            self.tokens_before += before
+            self.tokens_after += after
+        observe('context_tokens', before, SIZE_BUCKETS, stage='before_packing')
+        observe('context_tokens', after, SIZE_BUCKETS, stage='after_packing')
+        logger.debug(f"Packed context: {after} tokens (from {before}, budget {budget})")
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self.tokens_before - self.tokens_after
+            return {
+                'requests': self.requests,
+                'tokens_before': self.tokens_before,
+                'tokens_after': self.tokens_after,
+                'tokens_saved': saved,
+                'saved_ratio': round(saved / self.tokens_before, 3) if self.tokens_before else 0.0,
+            }
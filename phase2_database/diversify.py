@@ -0,0 +1,89 @@
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+DEFAULT_MMR_LAMBDA = 0.7
+HIGHLIGHT_PREFIX = " - Highlight: "
+
+
+def group_hits_by_tour(results: Dict, embeddings: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Group ranked chunk hits (chromadb result shape, first query) into one entry per tour
+
+    Groups keep the order of each tour's best-ranked chunk. Each group has the
+    tour's main_info document (if it was hit), its highlight texts, its chunk
+    ids and the normalized mean of its chunk embeddings.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    if not results.get('ids') or not results['ids'][0]:
+        return []
+
+    for chunk_id, document, metadata in zip(results['ids'][0], results['documents'][0], results['metadatas'][0]):
+        tour_name = metadata.get('tour_name', 'Unknown Tour')
+        group = groups.setdefault(tour_name, {
+            'tour_name': tour_name,
+            'metadata': metadata,
+            'main_info': None,
+            'highlights': [],
+            'ids': [],
+            'vectors': [],
+        })
+        group['ids'].append(chunk_id)
+        if chunk_id in embeddings:
+            group['vectors'].append(embeddings[chunk_id])
+        if metadata.get('chunk_type') == 'main_info':
+            group['main_info'] = document
+            group['metadata'] = metadata
+        else:
+            highlight = document.split(HIGHLIGHT_PREFIX, 1)[-1]
+            if highlight not in group['highlights']:
+                group['highlights'].append(highlight)
+
+    for group in groups.values():
+        vectors = group.pop('vectors')
+        if vectors:
+            mean = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+            group['vector'] = mean / max(float(np.linalg.norm(mean)), 1e-12)
+        else:
+            group['vector'] = None
+    return list(groups.values())
+
+
+def mmr_select(query_vector: np.ndarray, candidate_vectors: List[Optional[np.ndarray]], k: int,
+               lambda_: float = DEFAULT_MMR_LAMBDA) -> List[int]:
+    """Maximal marginal relevance: pick k candidates balancing relevance and novelty
+
+    Candidates without a vector keep their input order after the scored ones.
+    """
+    scored = [i for i, vec in enumerate(candidate_vectors) if vec is not None]
+    unscored = [i for i, vec in enumerate(candidate_vectors) if vec is None]
+    if not scored:
+        return unscored[:k]
+
+    query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    matrix = np.vstack([candidate_vectors[i] for i in scored])
+    relevance = matrix @ query
+    similarity = matrix @ matrix.T
+
+    selected: List[int] = []
+    remaining = list(range(len(scored)))
+    while remaining and len(selected) < k:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        mmr = lambda_ * relevance[remaining] - (1 - lambda_) * redundancy
+        best = remaining[int(np.argmax(mmr))]
+        selected.append(best)
+        remaining.remove(best)
+
+    chosen = [scored[i] for i in selected]
+    return chosen + unscored[:k - len(chosen)]
+
+
+def merge_tour_block(group: Dict[str, Any], main_info: Optional[str] = None, max_highlights: int = 3) -> str:
+    """One context block per tour: main info followed by its matched highlights"""
+    lines = [group.get('main_info') or main_info or f"Tour Name: {group['tour_name']}"]
+    if group['highlights']:
+        lines.append("Highlights: " + "; ".join(group['highlights'][:max_highlights]))
+    return "\n".join(lines)
@@ -1,17 +1,35 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from typing import List, Dict, Any
 import json
+import hashlib
 import logging
+from phase2_database.registry import get_embedding_model, get_query_cache, DEFAULT_MODEL_NAME
+from phase2_database.filters import destination_key, normalize_destinations
+from phase2_database.metrics import span
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def stable_tour_id(name: str) -> int:
+    """Process-independent numeric tour id (Python's hash() is salted per process)"""
+    return int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:8], 16)
+
+def make_chunk_id(tour_name: str, chunk_type: str, text: str) -> str:
+    """Content-addressed chunk id: identical chunk text always maps to the same id"""
+    digest = hashlib.sha1(f"{tour_name}\x1f{chunk_type}\x1f{text}".encode('utf-8')).hexdigest()
+    return f"chunk_{digest[:20]}"
+
+def metadata_hash(metadata: Dict[str, Any]) -> str:
+    """Fingerprint of a chunk's metadata, used to detect metadata-only changes"""
+    payload = {k: v for k, v in metadata.items() if k != 'content_hash'}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
 class EmbeddingGenerator:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        """Initialize the embedding model"""
-        self.model = SentenceTransformer(model_name)
-        logger.info(f"Loaded embedding model: {model_name}")
+    def __init__(self, model_name=DEFAULT_MODEL_NAME):
+        """Initialize the embedding model (shared across the process)"""
+        self.model_name = model_name
+        self.model = get_embedding_model(model_name)
+        self.query_cache = get_query_cache(model_name)
     
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for a list of texts"""
@@ -20,9 +38,39 @@ def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         embeddings = self.model.encode(texts, show_progress_bar=True)
         return embeddings
     
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed search queries, reusing cached vectors for repeated questions
+
+        Only cache misses go through the encoder, in a single batch.
+        """
+        if not queries:
+            return np.array([])
+        
+        with span('query_embedding', queries=len(queries)) as s:
+            cached = [self.query_cache.get(q) for q in queries]
+            missing = [i for i, vec in enumerate(cached) if vec is None]
+            s['cache_hit'] = not missing
+            s['encoded'] = len(missing)
+            if missing:
+                fresh = self.model.encode([queries[i] for i in missing], show_progress_bar=False)
+                for i, vec in zip(missing, fresh):
+                    self.query_cache.put(queries[i], vec)
+                    cached[i] = np.asarray(vec, dtype=np.float32)
+        
+        return np.vstack(cached)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a single search query (see embed_queries)"""
+        return self.embed_queries([query])[0]
+    
     def prepare_tour_chunks(self, tour: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Break tour data into chunks for embedding"""
+        """Break tour data into chunks for embedding
+
+        Each chunk carries a content-addressed 'id' and a 'content_hash' of its
+        metadata so re-indexing can skip chunks that have not changed.
+        """
         chunks = []
+        tour_id = stable_tour_id(tour.get('name', ''))
         
         # Create main description chunk
         main_text = f"Tour Name: {tour.get('name', '')}\n"
@@ -36,7 +84,7 @@ def prepare_tour_chunks(self, tour: Dict[str, Any]) -> List[Dict[str, Any]]:
             'metadata': {
                 'tour_name': tour.get('name', ''),
                 'chunk_type': 'main_info',
-                'tour_id': hash(tour.get('name', '')) % 10000
+                'tour_id': tour_id
             }
         })
         
@@ -50,8 +98,35 @@ def prepare_tour_chunks(self, tour: Dict[str, Any]) -> List[Dict[str, Any]]:
                         'tour_name': tour.get('name', ''),
                         'chunk_type': 'highlight',
                         'highlight_index': i,
-                        'tour_id': hash(tour.get('name', '')) % 10000
+                        'tour_id': tour_id
                     }
                 })
         
-        return chunks
\ No newline at end of file
+        # Filterable tour attributes shared by every chunk of the tour
+        filter_metadata = self.prepare_filter_metadata(tour)
+        for chunk in chunks:
+            metadata = chunk['metadata']
+            metadata.update(filter_metadata)
+            chunk['id'] = make_chunk_id(metadata['tour_name'], metadata['chunk_type'], chunk['text'])
+            metadata['content_hash'] = metadata_hash(metadata)
+        
+        return chunks
+    
+    def prepare_filter_metadata(self, tour: Dict[str, Any]) -> Dict[str, Any]:
+        """Tour attributes promoted into chunk metadata so searches can filter in the index"""
+        flags = tour.get('metadata', {})
+        destinations = normalize_destinations(tour.get('destinations', []))
+        
+        metadata = {
+            'theme': tour.get('theme', '') or 'General',
+            'source_tab': tour.get('source_tab', '') or '',
+            'has_destinations': bool(flags.get('has_destinations', bool(destinations))),
+            'has_price': bool(flags.get('has_price', False)),
+            'has_duration': bool(flags.get('has_duration', False)),
+            'has_highlights': bool(flags.get('has_highlights', False)),
+            'completeness_score': int(flags.get('completeness_score', 0)),
+            'destinations': '|'.join(destinations),
+        }
+        for destination in destinations:
+            metadata[destination_key(destination)] = True
+        return metadata
\ No newline at end of file
@@ -0,0 +1,119 @@
+import re
+from typing import Dict, Any, List, Optional
+
+from phase2_database.text_utils import normalize_text
+
+# Placeholder values written by phase1_scraping/intelligent_cleaner.enhance_tour_data
+PLACEHOLDER_DESTINATIONS = "Destinations available on request"
+PLACEHOLDER_HIGHLIGHTS = "Customizable tour package - contact for details"
+PLACEHOLDER_VALUES = frozenset(value.lower() for value in (
+    PLACEHOLDER_DESTINATIONS,
+    PLACEHOLDER_HIGHLIGHTS,
+    "Contact for price",
+    "Duration varies by package",
+))
+
+# The scraper sometimes keeps the "Destinations ➝" label on the first entry
+DESTINATION_LABEL_RE = re.compile(r'^\s*destinations\s*[➝→:>\-]*\s*', re.IGNORECASE)
+
+FILTER_KEYS = ('theme', 'source_tab', 'chunk_type', 'tour_name', 'destinations',
+               'has_destinations', 'has_price', 'has_duration', 'has_highlights',
+               'min_completeness')
+
+
+def destination_key(destination: str) -> str:
+    """Metadata key flagging that a chunk's tour visits destination
+
+    Chroma metadata cannot hold lists, so each normalized destination becomes
+    its own boolean key, e.g. "Agra" -> "dest_agra".
+    """
+    return "dest_" + normalize_text(destination).replace(' ', '_')
+
+
+def normalize_destinations(destinations: List[str]) -> List[str]:
+    """Normalized, de-duplicated destinations without the cleaner's placeholder"""
+    seen = []
+    for destination in destinations or []:
+        if not destination or destination == PLACEHOLDER_DESTINATIONS:
+            continue
+        normalized = normalize_text(DESTINATION_LABEL_RE.sub('', destination))
+        if normalized and normalized not in seen:
+            seen.append(normalized)
+    return seen
+
+
+def _as_list(value) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Translate structured search filters into a Chroma `where` clause
+
+    Supported filters: theme, source_tab, chunk_type, tour_name (a value or a
+    list of values), destinations (match any of the given places), the
+    has_* completeness flags (bool) and min_completeness (int).
+    """
+    if not filters:
+        return None
+
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown search filters: {', '.join(sorted(unknown))}")
+
+    clauses = []
+    for key in ('theme', 'source_tab', 'chunk_type', 'tour_name'):
+        value = filters.get(key)
+        if value is None or value == []:
+            continue
+        values = _as_list(value)
+        clauses.append({key: values[0]} if len(values) == 1 else {key: {'$in': values}})
+
+    for key in ('has_destinations', 'has_price', 'has_duration', 'has_highlights'):
+        if filters.get(key) is not None:
+            clauses.append({key: bool(filters[key])})
+
+    if filters.get('min_completeness') is not None:
+        clauses.append({'completeness_score': {'$gte': int(filters['min_completeness'])}})
+
+    destinations = filters.get('destinations')
+    if destinations:
+        dest_clauses = [{destination_key(d): True} for d in _as_list(destinations) if normalize_text(d)]
+        if len(dest_clauses) == 1:
+            clauses.append(dest_clauses[0])
+        elif dest_clauses:
+            clauses.append({'$or': dest_clauses})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a `where` clause produced by build_where against one metadata dict"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == '$eq' and value != operand:
+                    return False
+                if op == '$ne' and value == operand:
+                    return False
+                if op == '$in' and value not in operand:
+                    return False
+                if op == '$nin' and value in operand:
+                    return False
+                if op == '$gte' and (value is None or value < operand):
+                    return False
+                if op == '$lte' and (value is None or value > operand):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
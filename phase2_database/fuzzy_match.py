@@ -0,0 +1,164 @@
+import re
+import difflib
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from phase2_database.text_utils import normalize_text, tokenize, STOPWORDS
+
+# Common spellings and older names of Indian places -> the form the catalog uses
+PLACE_ALIASES = {
+    'benaras': 'varanasi',
+    'banaras': 'varanasi',
+    'benares': 'varanasi',
+    'kashi': 'varanasi',
+    'prayagraj': 'allahabad',
+    'prayag': 'allahabad',
+    'bengaluru': 'bangalore',
+    'mysuru': 'mysore',
+    'cochin': 'kochi',
+    'ernakulam': 'kochi',
+    'puducherry': 'pondicherry',
+    'pondy': 'pondicherry',
+    'thanjavur': 'tanjore',
+    'tiruchirappalli': 'trichy',
+    'tiruchirapalli': 'trichy',
+    'mamallapuram': 'mahabalipuram',
+    'udhagamandalam': 'ooty',
+    'ootacamund': 'ooty',
+    'simla': 'shimla',
+    'darjiling': 'darjeeling',
+    'dharamshala': 'dharamsala',
+    'mcleodganj': 'dharamsala',
+    'bodh gaya': 'bodhgaya',
+    'kushinara': 'kushinagar',
+    'rameswaram': 'rameshwaram',
+    'kancheepuram': 'kanchipuram',
+    'vrindaban': 'vrindavan',
+    'brindavan': 'vrindavan',
+    'brindaban': 'vrindavan',
+    'kedarnath dham': 'kedarnath',
+    'badrinath dham': 'badrinath',
+    'char dham': 'chardham',
+    'chaar dham': 'chardham',
+    'rajputana': 'rajasthan',
+    'bombay': 'mumbai',
+    'madras': 'chennai',
+    'calcutta': 'kolkata',
+    'gurgaon': 'gurugram',
+    'trivandrum': 'thiruvananthapuram',
+    'vizag': 'visakhapatnam',
+}
+
+MIN_TERM_LENGTH = 4
+DEFAULT_MIN_SIMILARITY = 0.65
+# Up to this length one typo breaks too many trigrams ("kerla" / "kerala" is 0.57),
+# so a term one edit away is accepted whatever its trigram similarity
+SHORT_TERM_LENGTH = 6
+
+
+def trigrams(term: str) -> List[str]:
+    """Character trigrams of a term padded so that its start and end count more"""
+    padded = f"  {term} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True when b is a, or a with one character inserted, deleted or substituted"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class FuzzyMatcher:
+    """Character-trigram index over the catalog vocabulary
+
+    The vocabulary is every tour-name token, every normalized destination
+    (whole and per word), theme words and the alias targets. candidates()
+    scores only the terms sharing a trigram with the query (Dice coefficient
+    over trigram sets, ties broken by difflib ratio), so a lookup never
+    compares against the whole vocabulary; short terms also accept a
+    candidate one edit away. correct() rewrites a query:
+    aliases first, then every unknown word is replaced by its best candidate.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.aliases = dict(PLACE_ALIASES if aliases is None else aliases)
+        terms = {normalize_text(term) for term in vocabulary}
+        terms.update(self.aliases.values())
+        self.terms: List[str] = sorted(term for term in terms if term)
+        self.term_set = frozenset(self.terms)
+        self.grams: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        for index, term in enumerate(self.terms):
+            grams = trigrams(term)
+            self.grams.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(index)
+        phrases = sorted(self.aliases, key=len, reverse=True)
+        self._alias_re = re.compile(r'\b(' + '|'.join(re.escape(p) for p in phrases) + r')\b') if phrases else None
+
+    @classmethod
+    def from_catalog(cls, catalog, aliases: Optional[Dict[str, str]] = None) -> 'FuzzyMatcher':
+        vocabulary = set()
+        for tour in catalog:
+            vocabulary.update(t for t in tokenize(tour.get('name', '')) if not t.isdigit())
+            vocabulary.update(tokenize(tour.get('theme', '') or ''))
+            for destination in tour.destination_set:
+                vocabulary.add(destination)
+                vocabulary.update(destination.split())
+        return cls(vocabulary, aliases)
+
+    def candidates(self, term: str, limit: int = 5,
+                   min_similarity: float = DEFAULT_MIN_SIMILARITY) -> List[Tuple[str, float]]:
+        """Vocabulary terms resembling term, best first, as (term, similarity)"""
+        term = normalize_text(term)
+        if not term:
+            return []
+        alias = self.aliases.get(term)
+        if alias:
+            return [(alias, 1.0)]
+        grams = trigrams(term)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for index in self.postings.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+
+        short = len(term) <= SHORT_TERM_LENGTH
+        scored = []
+        for index, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.grams[index])
+            if similarity >= min_similarity or (short and within_one_edit(term, self.terms[index])):
+                scored.append((similarity, index))
+        scored.sort(reverse=True)
+        # Rerank the short head with an edit-based ratio to settle near-ties
+        head = scored[:limit * 2]
+        head.sort(key=lambda item: (item[0] + difflib.SequenceMatcher(None, term, self.terms[item[1]]).ratio()),
+                  reverse=True)
+        return [(self.terms[index], round(similarity, 3)) for similarity, index in head[:limit]]
+
+    def best(self, term: str, min_similarity: float = DEFAULT_MIN_SIMILARITY) -> Optional[str]:
+        found = self.candidates(term, 1, min_similarity)
+        return found[0][0] if found else None
+
+    def correct(self, text: str, min_similarity: float = DEFAULT_MIN_SIMILARITY) -> str:
+        """Normalized text with aliases resolved and misspelled words replaced
+
+        "Benaras and Rajastan" -> "varanasi and rajasthan". Known words,
+        stopwords, numbers and words shorter than MIN_TERM_LENGTH are kept.
+        """
+        text = normalize_text(text)
+        if self._alias_re is not None:
+            text = self._alias_re.sub(lambda m: self.aliases[m.group(1)], text)
+        words = []
+        for word in text.split():
+            if len(word) >= MIN_TERM_LENGTH and word not in self.term_set and word not in STOPWORDS \
+                    and not word.isdigit():
+                word = self.best(word, min_similarity) or word
+            words.append(word)
+        return " ".join(words)
@@ -0,0 +1,69 @@
+import logging
+from typing import List, Dict, Any, Optional
+
+from phase2_database.bm25 import BM25Index
+from phase2_database.filters import build_where, matches_where
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Fuse several ranked id lists: score(id) = sum over lists of 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)
+
+
+class HybridRetriever:
+    """Dense vector search plus BM25 over the same chunks, fused with RRF
+
+    Exact place names ("Kedarnath", "Ranthambore") are often ranked poorly by
+    MiniLM; the lexical ranking pulls those chunks back into the context.
+    """
+
+    def __init__(self, vector_db, tours: List[Dict[str, Any]], candidate_factor: int = 3):
+        self.vector_db = vector_db
+        self.candidate_factor = candidate_factor
+        self.bm25 = BM25Index().build(list(vector_db.iter_tour_chunks(tours)))
+        logger.info(f"Built BM25 index over {len(self.bm25.ids)} chunks")
+
+    def search(self, query: str, n_results: int = 5, filters: Optional[Dict[str, Any]] = None) -> Dict:
+        """Fused top n_results, in the chromadb query() result shape"""
+        n_candidates = n_results * self.candidate_factor
+        dense = self.vector_db.search(query, n_candidates, filters=filters)
+        dense_ids = dense['ids'][0] if dense.get('ids') else []
+
+        where = build_where(filters)
+        lexical_ids = [
+            chunk_id for chunk_id, _ in self.bm25.search(query, n_candidates * (2 if where else 1))
+            if matches_where(self.bm25.metadatas[self.bm25.row_by_id[chunk_id]], where)
+        ][:n_candidates]
+
+        # Documents come from the dense results, or the BM25 copy of the same chunk
+        dense_rows = {
+            chunk_id: (dense['documents'][0][i], dense['metadatas'][0][i])
+            for i, chunk_id in enumerate(dense_ids)
+        }
+        results = {'ids': [[]], 'documents': [[]], 'metadatas': [[]]}
+        for chunk_id in reciprocal_rank_fusion([dense_ids, lexical_ids])[:n_results]:
+            if chunk_id in dense_rows:
+                document, metadata = dense_rows[chunk_id]
+            else:
+                row = self.bm25.row_by_id[chunk_id]
+                document, metadata = self.bm25.documents[row], self.bm25.metadatas[row]
+            results['ids'][0].append(chunk_id)
+            results['documents'][0].append(document)
+            results['metadatas'][0].append(metadata)
+        return results
+
+    def get_context_for_query(self, query: str, n_results: int = 5,
+                              filters: Optional[Dict[str, Any]] = None, overfetch: int = 4,
+                              token_budget: Optional[int] = None) -> str:
+        """Fused context for the LLM prompt, one merged block per distinct tour, within token_budget"""
+        results = self.search(query, n_results * overfetch, filters=filters)
+        return self.vector_db.pack_context(self.vector_db.diversify_results(query, results, n_results), token_budget)
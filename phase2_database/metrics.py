@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import bisect
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a cached embedding lookup up to a hung LLM call
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+# Counts of rows, queries, tokens, bytes...
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label set"""
+
+    def __init__(self, recent_spans: int = 200):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.help: Dict[str, str] = {}
+        self.recent = deque(maxlen=recent_spans)
+
+    @staticmethod
+    def _key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None,
+                buckets: Tuple[float, ...] = DURATION_BUCKETS, help_text: str = ""):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = self._key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+            if help_text:
+                self.help.setdefault(name, help_text)
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1.0, help_text: str = ""):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = self._key(labels)
+            series[key] = series.get(key, 0.0) + value
+            if help_text:
+                self.help.setdefault(name, help_text)
+
+    def record_span(self, stage: str, duration: float, attrs: Dict[str, Any], error: Optional[str]):
+        """Fold one finished span into the histograms and counters
+
+        String attributes become labels, booleans named *hit count cache hits
+        and misses, and numbers are observed as sizes.
+        """
+        labels = {'stage': stage}
+        labels.update({k: v for k, v in attrs.items() if isinstance(v, str)})
+        self.observe('stage_duration_seconds', duration, labels, help_text="Time spent per pipeline stage")
+        for field, value in attrs.items():
+            if isinstance(value, bool):
+                if field.endswith('hit'):
+                    self.inc('stage_cache_total', {'stage': stage, 'cache': field, 'result': 'hit' if value else 'miss'},
+                             help_text="Cache lookups per stage")
+            elif isinstance(value, (int, float)):
+                self.observe('stage_size', value, {'stage': stage, 'field': field}, SIZE_BUCKETS,
+                             help_text="Sizes recorded by pipeline stages (rows, queries, tokens, bytes)")
+        if error:
+            self.inc('stage_errors_total', {'stage': stage, 'error': error}, help_text="Stage failures")
+        with self._lock:
+            self.recent.append({'stage': stage, 'end': round(time.time(), 3),
+                                'duration_ms': round(duration * 1000, 3), 'error': error, **attrs})
+
+    def to_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        def fmt(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt(key, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt(key, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{fmt(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{fmt(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summaries (count, sum, mean, p50/p95/p99 bucket bounds), counters and the most recent spans"""
+        with self._lock:
+            histograms = {
+                name: [
+                    {
+                        'labels': dict(key),
+                        'count': h.count,
+                        'sum': round(h.sum, 6),
+                        'mean': round(h.sum / h.count, 6) if h.count else None,
+                        'p50': h.quantile(0.5),
+                        'p95': h.quantile(0.95),
+                        'p99': h.quantile(0.99),
+                    }
+                    for key, h in series.items()
+                ]
+                for name, series in self.histograms.items()
+            }
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            }
+            recent = list(self.recent)
+        return {'histograms': histograms, 'counters': counters, 'recent_spans': recent}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, default=str)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.recent.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class Span(dict):
+    """Attributes of a running span; set sizes and cache hits on it before it ends"""
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time a pipeline stage
+
+        with span('vector_query', queries=len(queries)) as s:
+            ...
+            s['results'] = n
+
+    The duration and attributes are recorded in the global registry when the
+    block exits; an exception is counted against the stage and re-raised.
+    """
+    current = Span(attrs)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        metrics.record_span(stage, time.perf_counter() - start, dict(current), error)
+
+
+def observe(name: str, value: float, buckets: Tuple[float, ...] = DURATION_BUCKETS, **labels):
+    """Record a single value outside a span, e.g. time to first token"""
+    metrics.observe(name, value, labels, buckets)
+
+
+_server = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None):
+    """Serve /metrics (Prometheus text) and /metrics.json on a background thread
+
+    The port defaults to METRICS_PORT; nothing is started when neither is set.
+    The host defaults to METRICS_HOST, else 127.0.0.1, so the endpoint is
+    local unless exposed on purpose. Safe to call more than once.
+    """
+    global _server
+    port = port or int(os.getenv('METRICS_PORT', '0'))
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+    if not port or _server is not None:
+        return _server
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0].rstrip('/')
+            if path == '/metrics':
+                body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+            elif path == '/metrics.json':
+                body, content_type = metrics.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    try:
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        # Another worker process on the host already serves this port
+        logger.warning(f"Metrics server not started on port {port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return _server
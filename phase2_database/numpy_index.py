@@ -0,0 +1,192 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from phase2_database.filters import matches_where
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+
+class IndexSnapshot:
+    """One loaded version of the index: the matrix and its row-aligned chunks
+
+    Immutable. A reload builds a new snapshot and swaps it in with a single
+    assignment, so a caller that reads NumpyIndex.snapshot once never pairs
+    the rows of one build with the matrix of another. The row-mask cache
+    belongs to the snapshot for the same reason.
+    """
+
+    __slots__ = ('manifest', 'ids', 'documents', 'metadatas', 'row_by_id', 'embeddings', 'mask_cache')
+
+    def __init__(self, manifest: Dict[str, Any], chunks: Dict[str, List[Any]], embeddings: np.ndarray):
+        ids = tuple(chunks['ids'])
+        object.__setattr__(self, 'manifest', manifest)
+        object.__setattr__(self, 'ids', ids)
+        object.__setattr__(self, 'documents', tuple(chunks['documents']))
+        object.__setattr__(self, 'metadatas', tuple(chunks['metadatas']))
+        object.__setattr__(self, 'row_by_id', {chunk_id: row for row, chunk_id in enumerate(ids)})
+        object.__setattr__(self, 'embeddings', embeddings)
+        object.__setattr__(self, 'mask_cache', {})
+
+    def __setattr__(self, field, value):
+        raise AttributeError("IndexSnapshot is immutable")
+
+    def __delattr__(self, field):
+        raise AttributeError("IndexSnapshot is immutable")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class NumpyIndex:
+    """Exact cosine search over a memory-mapped float32 matrix
+
+    The index directory holds embeddings.npy (L2-normalized rows), chunks.json
+    (ids, documents and metadatas in row order) and manifest.json. The matrix
+    is opened read-only with mmap, so several processes share the same pages.
+    Query results use the same dict-of-lists shape as chromadb's
+    collection.query(). The loaded index lives in `snapshot` (None until
+    load() succeeds); read it once per operation.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.matrix_path = os.path.join(index_dir, 'embeddings.npy')
+        self.chunks_path = os.path.join(index_dir, 'chunks.json')
+        self.manifest_path = os.path.join(index_dir, 'manifest.json')
+
+        self.snapshot: Optional[IndexSnapshot] = None
+        self.loaded_mtime: Optional[float] = None
+
+    def exists(self) -> bool:
+        return all(os.path.exists(p) for p in (self.matrix_path, self.chunks_path, self.manifest_path))
+
+    def load(self) -> bool:
+        """Open the index read-only; returns False when it has not been built"""
+        if not self.exists():
+            return False
+        # Taken before reading, so a rebuild that lands mid-load is picked up by the next refresh()
+        self.loaded_mtime = os.path.getmtime(self.manifest_path)
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != INDEX_FORMAT_VERSION:
+            logger.warning(f"NumPy index at {self.index_dir} has an old format, rebuild it")
+            return False
+        with open(self.chunks_path, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        embeddings = np.load(self.matrix_path, mmap_mode='r')
+        if embeddings.shape[0] != len(chunks['ids']):
+            logger.warning(f"NumPy index at {self.index_dir} is being rebuilt, keeping the loaded copy")
+            self.loaded_mtime = None
+            return False
+        # One assignment, so concurrent queries see either the old or the new index
+        self.snapshot = IndexSnapshot(manifest, chunks, embeddings)
+        logger.info(f"Loaded NumPy index with {len(self.snapshot)} chunks from {self.index_dir}")
+        return True
+
+    def refresh(self) -> bool:
+        """Reload when the index on disk was rebuilt (by any process) since it was loaded"""
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            return False
+        if mtime == self.loaded_mtime:
+            return False
+        return self.load()
+
+    def build(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+              embeddings: np.ndarray):
+        """Write a fresh index (files are swapped in atomically) and load it"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.clip(norms, 1e-12, None)
+
+        tmp_matrix = self.matrix_path + '.tmp.npy'
+        np.save(tmp_matrix, matrix)
+        tmp_chunks = self.chunks_path + '.tmp'
+        with open(tmp_chunks, 'w', encoding='utf-8') as f:
+            json.dump({'ids': ids, 'documents': documents, 'metadatas': metadatas}, f, ensure_ascii=False)
+        tmp_manifest = self.manifest_path + '.tmp'
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format_version': INDEX_FORMAT_VERSION,
+                'count': len(ids),
+                'dimension': int(matrix.shape[1]) if len(ids) else 0,
+                'built_at': datetime.now().isoformat(timespec='seconds'),
+            }, f, indent=2)
+
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_chunks, self.chunks_path)
+        os.replace(tmp_manifest, self.manifest_path)
+        logger.info(f"Built NumPy index with {len(ids)} chunks at {self.index_dir}")
+        self.load()
+
+    def row_mask(self, where: Optional[Dict[str, Any]],
+                 snapshot: Optional[IndexSnapshot] = None) -> Optional[np.ndarray]:
+        """Boolean mask over the rows of snapshot (the current one by default) matching where
+
+        Masks are cached per clause on the snapshot they were computed for.
+        """
+        snapshot = snapshot or self.snapshot
+        if not where or snapshot is None:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        mask = snapshot.mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter((matches_where(m, where) for m in snapshot.metadatas),
+                               dtype=bool, count=len(snapshot))
+            if len(snapshot.mask_cache) >= 256:
+                snapshot.mask_cache.clear()
+            snapshot.mask_cache[key] = mask
+        return mask
+
+    def query(self, query_embeddings: np.ndarray, n_results: int = 5,
+              where: Optional[Dict[str, Any]] = None,
+              include_embeddings: bool = False) -> Dict[str, List[List[Any]]]:
+        """Top-n exact search for each query row, shaped like chromadb query results
+
+        Distances are squared L2 between unit vectors (2 - 2 * cosine), which
+        matches Chroma's default 'l2' space. `where` uses the clause format of
+        filters.build_where and is applied before ranking.
+        """
+        snapshot = self.snapshot
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        if include_embeddings:
+            results['embeddings'] = []
+        if snapshot is None or not len(snapshot):
+            for _ in range(len(query_embeddings)):
+                for key in results:
+                    results[key].append([])
+            return results
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, snapshot.embeddings.shape[1])
+        queries = queries / np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
+        scores = queries @ snapshot.embeddings.T
+
+        mask = self.row_mask(where, snapshot)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        k = min(n_results, scores.shape[1] if mask is None else int(mask.sum()))
+        for row in scores:
+            if k <= 0:
+                top = np.arange(0)
+            elif k < len(row):
+                top = np.argpartition(-row, k - 1)[:k]
+            else:
+                top = np.arange(len(row))
+            top = top[np.argsort(-row[top])]
+            results['ids'].append([snapshot.ids[i] for i in top])
+            results['documents'].append([snapshot.documents[i] for i in top])
+            results['metadatas'].append([snapshot.metadatas[i] for i in top])
+            results['distances'].append([float(2.0 - 2.0 * row[i]) for i in top])
+            if include_embeddings:
+                results['embeddings'].append([np.asarray(snapshot.embeddings[i]) for i in top])
+        return results
@@ -0,0 +1,188 @@
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = './model_cache'
+PARITY_THRESHOLD = 0.99
+
+# Representative queries and chunks used to compare ONNX output against torch
+PARITY_SENTENCES = [
+    "pilgrimage tours in Uttarakhand",
+    "Rajasthan heritage tours with forts",
+    "yoga and meditation packages",
+    "tours that include Agra and Jaipur",
+    "What's the price of Golden Triangle Tour?",
+    "Tour Name: Chardham Yatra\nDuration: 10 Days\nTheme: Pilgrimage\nDestinations: Haridwar, Kedarnath, Badrinath",
+    "Tour: Kerala Backwaters - Highlight: Houseboat stay in Alleppey with traditional Kerala cuisine",
+]
+
+
+def get_model_dir(model_name: str, cache_dir: Optional[str] = None) -> str:
+    """Directory holding the exported ONNX files for model_name"""
+    cache_dir = cache_dir or os.getenv('EMBEDDING_CACHE_DIR', DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, model_name.replace('/', '_') + '-onnx')
+
+
+def onnx_filename(quantized: bool) -> str:
+    return 'model_int8.onnx' if quantized else 'model.onnx'
+
+
+class OnnxEmbeddingModel:
+    """SentenceTransformer-compatible encoder served by onnxruntime
+
+    Mirrors the MiniLM sentence-transformers pipeline (mean pooling over the
+    attention mask followed by L2 normalization) without importing torch.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, 'export_config.json'), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.max_seq_length = self.config.get('max_seq_length', 256)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, onnx_filename(quantized)),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.quantized = quantized
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               **kwargs) -> np.ndarray:
+        """Encode texts to normalized float32 vectors (same contract as SentenceTransformer.encode)"""
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size=batch_size)[0]
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            outputs.append(pooled / np.clip(norms, 1e-12, None))
+
+        if not outputs:
+            return np.zeros((0, self.config.get('dimension', 384)), dtype=np.float32)
+        return np.vstack(outputs).astype(np.float32)
+
+
+def export_onnx_model(torch_model, model_dir: str, quantize: bool = True):
+    """Export a loaded SentenceTransformer's transformer to ONNX (and optionally int8)"""
+    import torch
+
+    os.makedirs(model_dir, exist_ok=True)
+    transformer = torch_model[0]
+    hf_model = transformer.auto_model
+    hf_model.eval()
+
+    transformer.tokenizer.save_pretrained(model_dir)
+    dummy = transformer.tokenizer(["export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    fp32_path = os.path.join(model_dir, onnx_filename(False))
+    with torch.no_grad():
+        torch.onnx.export(
+            hf_model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    logger.info(f"Exported ONNX model to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = os.path.join(model_dir, onnx_filename(True))
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"Quantized ONNX model to {int8_path}")
+
+    with open(os.path.join(model_dir, 'export_config.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'max_seq_length': torch_model.get_max_seq_length() or 256,
+            'dimension': torch_model.get_sentence_embedding_dimension(),
+        }, f, indent=2)
+
+
+def check_parity(torch_model, onnx_model: OnnxEmbeddingModel,
+                 sentences: List[str] = PARITY_SENTENCES) -> Dict[str, Any]:
+    """Compare ONNX vectors with torch vectors; passes when every cosine >= PARITY_THRESHOLD"""
+    expected = np.asarray(torch_model.encode(sentences, show_progress_bar=False), dtype=np.float32)
+    actual = onnx_model.encode(sentences)
+    expected /= np.clip(np.linalg.norm(expected, axis=1, keepdims=True), 1e-12, None)
+    cosines = (expected * actual).sum(axis=1)
+    min_cosine = float(cosines.min())
+    return {'min_cosine': round(min_cosine, 5), 'passed': min_cosine >= PARITY_THRESHOLD}
+
+
+def read_parity(model_dir: str) -> Dict[str, Any]:
+    path = os.path.join(model_dir, 'parity.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_parity(model_dir: str, parity: Dict[str, Any]):
+    with open(os.path.join(model_dir, 'parity.json'), 'w', encoding='utf-8') as f:
+        json.dump(parity, f, indent=2)
+
+
+def load_onnx_model(model_name: str, quantized: bool, torch_loader) -> Optional[OnnxEmbeddingModel]:
+    """Load the cached ONNX model for model_name, exporting and parity-checking it on first use
+
+    torch_loader() must return the torch SentenceTransformer; it is only called
+    when the export or parity result is not cached yet, so warm starts never
+    import torch. Returns None when the backend fails parity or cannot be built.
+    """
+    model_dir = get_model_dir(model_name)
+    variant = 'int8' if quantized else 'fp32'
+    parity = read_parity(model_dir)
+
+    try:
+        if variant in parity:
+            if not parity[variant]['passed']:
+                logger.warning(f"ONNX {variant} backend failed parity earlier "
+                               f"(min cosine {parity[variant]['min_cosine']}), using torch")
+                return None
+            return OnnxEmbeddingModel(model_dir, quantized=quantized)
+
+        torch_model = torch_loader()
+        if not os.path.exists(os.path.join(model_dir, onnx_filename(quantized))):
+            export_onnx_model(torch_model, model_dir, quantize=quantized)
+
+        onnx_model = OnnxEmbeddingModel(model_dir, quantized=quantized)
+        parity[variant] = check_parity(torch_model, onnx_model)
+        write_parity(model_dir, parity)
+        logger.info(f"ONNX {variant} parity: min cosine {parity[variant]['min_cosine']}")
+        return onnx_model if parity[variant]['passed'] else None
+    except Exception as e:
+        logger.warning(f"ONNX {variant} backend unavailable: {e}")
+        return None
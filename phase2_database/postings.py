@@ -0,0 +1,45 @@
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from phase2_database.text_utils import tokenize
+from phase2_database.filters import normalize_destinations, PLACEHOLDER_HIGHLIGHTS
+
+# Same weights as the old substring scan: a hit in the name counts 3, in each
+# destination 2, in the theme 2 and in each highlight 1
+FIELD_WEIGHTS = {'name': 3, 'destinations': 2, 'theme': 2, 'highlights': 1}
+
+
+def index_term(token: str) -> str:
+    """Fold simple plurals so "temples" finds "temple" """
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def field_texts(tour: Dict[str, Any], field: str) -> List[str]:
+    if field == 'destinations':
+        return normalize_destinations(tour.get('destinations', []))
+    if field == 'highlights':
+        return [value for value in tour.get('highlights', []) or [] if value and value != PLACEHOLDER_HIGHLIGHTS]
+    value = tour.get(field, '')
+    return [value] if value else []
+
+
+def build_postings(tours: List[Dict[str, Any]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """term -> (tour rows, weighted scores), best first"""
+    scores: Dict[str, Dict[int, int]] = {}
+    for row, tour in enumerate(tours):
+        for field, weight in FIELD_WEIGHTS.items():
+            for text in field_texts(tour, field):
+                for term in {index_term(t) for t in tokenize(text)}:
+                    rows = scores.setdefault(term, {})
+                    rows[row] = rows.get(row, 0) + weight
+
+    postings = {}
+    for term, rows in scores.items():
+        ranked = sorted(rows.items(), key=lambda item: (-item[1], item[0]))
+        postings[term] = (
+            np.fromiter((row for row, _ in ranked), dtype=np.int32, count=len(ranked)),
+            np.fromiter((score for _, score in ranked), dtype=np.float64, count=len(ranked)),
+        )
+    return postings
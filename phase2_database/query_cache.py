@@ -0,0 +1,217 @@
+import os
+import json
+import atexit
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are still atomic, just not serialized
+    fcntl = None
+
+import numpy as np
+
+from phase2_database.text_utils import normalize_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query vectors keyed by normalized query text
+
+    When persist_path is set the vectors and their keys are saved together in
+    one file (persist_path + '.npz') and read back at startup, so a warm
+    restart can answer repeated questions without running the encoder.
+    Nothing is memory-mapped or shared: each process works on a private
+    in-memory copy. A flush takes a file lock, merges in the entries other
+    processes saved since (its own win when the cache is full), and replaces
+    the file atomically, so workers sharing a path neither lose each other's
+    entries nor see half-written rows.
+    """
+
+    def __init__(self, max_entries: int = 512, persist_path: Optional[str] = None,
+                 flush_every: int = 16):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._dim: Optional[int] = None
+        self._dirty = 0
+        # Set by clear() so the next flush replaces the file instead of merging it back in
+        self._replace_on_flush = False
+
+        if persist_path:
+            self._load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        """Cache key for a query (case, whitespace and punctuation folded)"""
+        return normalize_text(text)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return a copy of the cached vector for text, or None"""
+        key = self.make_key(text)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._slots.move_to_end(key)
+            self.hits += 1
+            return np.array(self._vectors[slot], dtype=np.float32)
+
+    def put(self, text: str, vector: np.ndarray):
+        """Store the vector for text, evicting the least recently used entry if full"""
+        key = self.make_key(text)
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self._vectors is None:
+                self._allocate(vector.shape[0])
+            elif vector.shape[0] != self._dim:
+                logger.warning(f"Ignoring query vector of dim {vector.shape[0]} (cache dim {self._dim})")
+                return
+
+            slot = self._slots.get(key)
+            if slot is None:
+                if len(self._slots) >= self.max_entries:
+                    _, slot = self._slots.popitem(last=False)
+                else:
+                    slot = len(self._slots)
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+            self._vectors[slot] = vector
+
+            self._dirty += 1
+            if self.persist_path and self._dirty >= self.flush_every:
+                self._flush_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging and metrics"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._slots),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'persistent': bool(self.persist_path),
+        }
+
+    def clear(self):
+        """Forget every cached vector (counters are kept)"""
+        with self._lock:
+            self._slots.clear()
+            self._dirty += 1
+            self._replace_on_flush = True
+            if self.persist_path:
+                self._flush_locked()
+
+    def flush(self):
+        """Merge with the entries on disk and write the vectors and their keys back"""
+        with self._lock:
+            self._flush_locked()
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+
+    def _allocate(self, dim: int):
+        self._dim = dim
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+
+    @contextmanager
+    def _file_lock(self):
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.persist_path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_file(self, data_path: str):
+        """(vectors, [(key, slot), ...]) saved at data_path, or None if it does not fit this cache"""
+        if not os.path.exists(data_path):
+            return None
+        with np.load(data_path) as data:
+            vectors = np.array(data['vectors'], dtype=np.float32)
+            slots = json.loads(str(data['slots']))
+        if vectors.ndim != 2 or vectors.shape[0] != self.max_entries:
+            return None
+        return vectors, slots
+
+    def _load(self):
+        data_path = self.persist_path + '.npz'
+        if not os.path.exists(data_path):
+            return
+        try:
+            with self._file_lock():
+                saved = self._read_file(data_path)
+            if saved is None:
+                logger.info("Query cache size changed, starting with an empty cache")
+                return
+            vectors, slots = saved
+            self._vectors = vectors
+            self._dim = vectors.shape[1]
+            for key, slot in slots:
+                self._slots[key] = slot
+            logger.info(f"Loaded {len(self._slots)} cached query embeddings from {data_path}")
+        except Exception as e:
+            logger.warning(f"Could not load query cache from {data_path}: {e}")
+            self._slots.clear()
+            self._vectors = None
+            self._dim = None
+
+    def _merge_locked(self, data_path: str):
+        """Adopt entries other processes saved, as least recently used, into the free slots"""
+        saved = self._read_file(data_path)
+        if saved is None or saved[0].shape[1] != self._dim:
+            return
+        vectors, slots = saved
+        free = self.max_entries - len(self._slots)
+        # Newest saved entries first; each is moved to the old end, so the saved order is kept
+        for key, saved_slot in reversed(slots):
+            if free <= 0:
+                break
+            if key in self._slots:
+                continue
+            # Slots are dense until the cache is full
+            slot = len(self._slots)
+            self._slots[key] = slot
+            self._slots.move_to_end(key, last=False)
+            self._vectors[slot] = vectors[saved_slot]
+            free -= 1
+
+    def _flush_locked(self):
+        if not self.persist_path or self._vectors is None or not self._dirty:
+            return
+        try:
+            data_path = self.persist_path + '.npz'
+            tmp_path = f"{data_path}.{os.getpid()}.tmp"
+            with self._file_lock():
+                if not self._replace_on_flush:
+                    try:
+                        self._merge_locked(data_path)
+                    except Exception as e:
+                        logger.warning(f"Replacing unreadable query cache {data_path}: {e}")
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, vectors=self._vectors,
+                             slots=np.array(json.dumps(list(self._slots.items()))))
+                os.replace(tmp_path, data_path)
+            self._dirty = 0
+            self._replace_on_flush = False
+        except Exception as e:
+            logger.warning(f"Could not persist query cache: {e}")
@@ -0,0 +1,245 @@
+import os
+import threading
+import logging
+from typing import Dict, Tuple, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_PERSIST_DIRECTORY = './chroma_db'
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+# Process-wide caches. Streamlit, the CLIs and the pipeline all go through
+# these so the embedding model and the Chroma client are created only once.
+_lock = threading.RLock()
+_models: Dict[Tuple[str, str], object] = {}
+# (model, configured backend) -> backend actually loaded, e.g. torch after a failed ONNX parity check
+_loaded_backends: Dict[Tuple[str, str], str] = {}
+_clients: Dict[str, object] = {}
+_databases: Dict[Tuple[str, str], object] = {}
+_query_caches: Dict[str, object] = {}
+_catalogs: Dict[str, object] = {}
+_stores: Dict[str, object] = {}
+_fuzzy_matchers: Dict[str, object] = {}
+_answer_caches: Dict[str, object] = {}
+
+
+def get_embedding_backend() -> str:
+    """Configured embedding backend: EMBEDDING_BACKEND=torch (default), onnx or onnx-int8"""
+    backend = os.getenv('EMBEDDING_BACKEND', 'torch').strip().lower()
+    if backend not in EMBEDDING_BACKENDS:
+        logger.warning(f"Unknown EMBEDDING_BACKEND '{backend}', using torch")
+        return 'torch'
+    return backend
+
+
+def _load_torch_model(model_name: str):
+    with _lock:
+        model = _models.get((model_name, 'torch'))
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            _models[(model_name, 'torch')] = model
+            logger.info(f"Loaded embedding model: {model_name}")
+        return model
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None):
+    """Return the shared encoder for model_name, loading it on first use
+
+    The ONNX backends are exported and parity-checked against torch once,
+    then cached on disk; if they fail the check the torch model is used.
+    """
+    backend = backend or get_embedding_backend()
+    with _lock:
+        model = _models.get((model_name, backend))
+        if model is None:
+            if backend == 'torch':
+                model = _load_torch_model(model_name)
+            else:
+                from phase2_database.onnx_backend import load_onnx_model
+                model = load_onnx_model(
+                    model_name,
+                    quantized=(backend == 'onnx-int8'),
+                    torch_loader=lambda: _load_torch_model(model_name)
+                )
+                if model is None:
+                    model = _load_torch_model(model_name)
+                    _loaded_backends[(model_name, backend)] = 'torch'
+                else:
+                    logger.info(f"Loaded embedding model: {model_name} ({backend})")
+            _models[(model_name, backend)] = model
+            _loaded_backends.setdefault((model_name, backend), backend)
+        return model
+
+
+def get_loaded_backend(model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None) -> str:
+    """Backend and precision of the encoder get_embedding_model() returns: torch, onnx or onnx-int8"""
+    backend = backend or get_embedding_backend()
+    with _lock:
+        get_embedding_model(model_name, backend)
+        return _loaded_backends[(model_name, backend)]
+
+
+def get_query_cache(model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None):
+    """Return the shared query-embedding cache for model_name
+
+    QUERY_CACHE_SIZE bounds the number of vectors (default 512). When
+    QUERY_CACHE_DIR is set the cache is saved into that directory and
+    survives restarts; workers sharing the directory each keep a private copy
+    and merge in each other's entries when they save.
+    """
+    # Vectors from different backends are not interchangeable: key on the encoder
+    # actually in use, which is torch when ONNX failed its parity check
+    key = f"{model_name}:{get_loaded_backend(model_name, backend)}"
+    with _lock:
+        cache = _query_caches.get(key)
+        if cache is None:
+            from phase2_database.query_cache import QueryEmbeddingCache
+            cache_dir = os.getenv('QUERY_CACHE_DIR')
+            persist_path = None
+            if cache_dir:
+                safe_name = key.replace('/', '_').replace(':', '_')
+                persist_path = os.path.join(cache_dir, f"query_cache_{safe_name}")
+            cache = QueryEmbeddingCache(
+                max_entries=int(os.getenv('QUERY_CACHE_SIZE', '512')),
+                persist_path=persist_path
+            )
+            _query_caches[key] = cache
+        return cache
+
+
+def get_chroma_client(persist_directory: str = DEFAULT_PERSIST_DIRECTORY):
+    """Return the shared chromadb PersistentClient for persist_directory"""
+    key = os.path.abspath(persist_directory)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import chromadb
+            client = chromadb.PersistentClient(path=persist_directory)
+            _clients[key] = client
+            logger.info(f"Opened Chroma client at {persist_directory}")
+        return client
+
+
+def get_vector_database(persist_directory: str = DEFAULT_PERSIST_DIRECTORY,
+                        model_name: str = DEFAULT_MODEL_NAME):
+    """Return the shared VectorDatabase for (persist_directory, model_name)"""
+    from phase2_database.vector_store import VectorDatabase
+
+    key = (os.path.abspath(persist_directory), model_name)
+    with _lock:
+        db = _databases.get(key)
+        if db is None:
+            db = VectorDatabase(persist_directory=persist_directory, model_name=model_name)
+            _databases[key] = db
+        return db
+
+
+def get_tour_catalog(filepath: Optional[str] = None):
+    """Return the shared, read-only TourCatalog for filepath (the cleaned catalog by default)"""
+    from phase2_database.catalog import DEFAULT_CATALOG_PATH, load_catalog
+
+    filepath = filepath or DEFAULT_CATALOG_PATH
+    key = os.path.abspath(filepath)
+    with _lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = load_catalog(filepath)
+            _catalogs[key] = catalog
+        return catalog
+
+
+def get_fuzzy_matcher(filepath: Optional[str] = None):
+    """Return the shared trigram FuzzyMatcher over the catalog's names and destinations"""
+    from phase2_database.catalog import DEFAULT_CATALOG_PATH
+    from phase2_database.fuzzy_match import FuzzyMatcher
+
+    filepath = filepath or DEFAULT_CATALOG_PATH
+    key = os.path.abspath(filepath)
+    with _lock:
+        matcher = _fuzzy_matchers.get(key)
+        if matcher is None:
+            matcher = FuzzyMatcher.from_catalog(get_tour_catalog(filepath))
+            _fuzzy_matchers[key] = matcher
+        return matcher
+
+
+def get_catalog_store(path: Optional[str] = None):
+    """Return the shared SQLite catalog store, or None when SQLite lacks FTS5
+
+    The store is built by the pipeline (phase1_scraping/intelligent_cleaner);
+    a missing store, or one older than the catalog JSON it was built from
+    (the cleaned catalog when it does not say), is rebuilt here from
+    get_tour_catalog().
+    """
+    from phase2_database.catalog import DEFAULT_CATALOG_PATH
+    from phase2_database.catalog_store import CatalogStore, DEFAULT_STORE_PATH, fts5_available
+
+    path = path or os.getenv('CATALOG_STORE_PATH', DEFAULT_STORE_PATH)
+    key = os.path.abspath(path)
+    with _lock:
+        if key in _stores:
+            return _stores[key]
+        store = None
+        if fts5_available():
+            store = CatalogStore(path)
+            source = (store.source() if store.exists() else None) or DEFAULT_CATALOG_PATH
+            stale = not store.exists() or (
+                os.path.exists(source) and os.path.getmtime(path) < os.path.getmtime(source))
+            if stale:
+                store.build(get_tour_catalog(source).tours, source=source)
+        else:
+            logger.warning("SQLite was built without FTS5; catalog search falls back to in-memory indexes")
+        _stores[key] = store
+        return store
+
+
+def get_answer_cache(path: Optional[str] = None):
+    """Return the shared semantic answer cache for path, or None when it is disabled
+
+    ANSWER_CACHE_PATH (set it to an empty string to disable),
+    ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL (seconds) and ANSWER_CACHE_SIZE.
+    """
+    from phase3_qa_system.answer_cache import SemanticAnswerCache, DEFAULT_CACHE_PATH
+
+    path = path if path is not None else os.getenv('ANSWER_CACHE_PATH', DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    key = os.path.abspath(path)
+    with _lock:
+        if key in _answer_caches:
+            return _answer_caches[key]
+        try:
+            cache = SemanticAnswerCache(
+                path=path,
+                threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92')),
+                ttl_seconds=int(os.getenv('ANSWER_CACHE_TTL', '86400')),
+                max_entries=int(os.getenv('ANSWER_CACHE_SIZE', '1000')),
+            )
+        except Exception as e:
+            logger.warning(f"Answer cache disabled: {e}")
+            cache = None
+        _answer_caches[key] = cache
+        return cache
+
+
+def reset_registry():
+    """Drop every cached resource (used after the database directory is rebuilt)"""
+    with _lock:
+        _databases.clear()
+        _clients.clear()
+        _models.clear()
+        _loaded_backends.clear()
+        _query_caches.clear()
+        _catalogs.clear()
+        _fuzzy_matchers.clear()
+        for store in _stores.values():
+            if store is not None:
+                store.close()
+        _stores.clear()
+        for cache in _answer_caches.values():
+            if cache is not None:
+                cache.close()
+        _answer_caches.clear()
@@ -0,0 +1,33 @@
+import re
+import unicodedata
+
+_PUNCT_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different queries compare equal
+
+    "Tours in Rajasthan?" and "  tours in  rajasthan " both become "tours in rajasthan".
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = _PUNCT_RE.sub(' ', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+# Function words that carry no signal for lexical matching
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from have i in is it me my of on or our
+please show tell that the their there these this to tour tours trip what which with
+you your about any some
+""".split())
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> list:
+    """Split text into normalized tokens for lexical indexes"""
+    tokens = normalize_text(text).split()
+    if drop_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return tokens
@@ -12,11 +12,21 @@
         import codecs
         sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'ignore')
 
-import chromadb
 from phase2_database.embeddings import EmbeddingGenerator  # Use full path
-import json
+from phase2_database.registry import (
+    get_chroma_client, get_vector_database, get_tour_catalog, DEFAULT_MODEL_NAME, DEFAULT_PERSIST_DIRECTORY
+)
+from phase2_database.batch_indexer import BatchEncoder, ThroughputMeter, iter_batches, DEFAULT_BATCH_SIZE
+from phase2_database.numpy_index import NumpyIndex
+from phase2_database.filters import build_where
+from phase2_database.diversify import group_hits_by_tour, mmr_select, merge_tour_block, DEFAULT_MMR_LAMBDA
+from phase2_database.context_packer import ContextPacker, make_token_counter
+from phase2_database.metrics import span, observe
+import time
+import hashlib
 import logging
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,15 +40,61 @@ def safe_print(text):
         safe_text = text.encode('ascii', 'ignore').decode('ascii')
         print(safe_text)
 
+SEARCH_BACKENDS = ('chroma', 'numpy')
+# Written by index_tours() so every process sees a re-index, not just the one that ran it
+INDEX_VERSION_FILE = 'index_version'
+# Rows fetched per collection.get() page when diffing against the stored chunks
+INDEX_PAGE_SIZE = 1000
+
 class VectorDatabase:
-    def __init__(self, persist_directory="./chroma_db"):
-        """Initialize ChromaDB client"""
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        self.embedding_generator = EmbeddingGenerator()
-        
-        # Create or get collection
+    def __init__(self, persist_directory=DEFAULT_PERSIST_DIRECTORY, model_name=DEFAULT_MODEL_NAME,
+                 search_backend=None):
+        """Initialize ChromaDB client
+
+        Prefer registry.get_vector_database() over constructing this directly,
+        so the client and embedding model are shared by every caller.
+
+        search_backend (or VECTOR_SEARCH_BACKEND) selects where queries run:
+        'chroma' (default) or 'numpy', an exact in-memory search over a
+        memory-mapped copy of the indexed vectors. Chroma stays the store that
+        index_tours() writes to; with 'numpy' it is only opened for indexing.
+        """
+        self.persist_directory = persist_directory
+        self.embedding_generator = EmbeddingGenerator(model_name)
         self.collection_name = "namaste_india_tours"
-        self.collection = self.get_or_create_collection()
+        self._client = None
+        self._collection = None
+        self._index_version = None
+        self._index_version_mtime = None
+        self._context_packer = None
+        
+        self.search_backend = (search_backend or os.getenv('VECTOR_SEARCH_BACKEND', 'chroma')).lower()
+        if self.search_backend not in SEARCH_BACKENDS:
+            logger.warning(f"Unknown search backend '{self.search_backend}', using chroma")
+            self.search_backend = 'chroma'
+        
+        self.numpy_index = None
+        if self.search_backend == 'numpy':
+            self.numpy_index = NumpyIndex(os.path.join(persist_directory, 'numpy_index'))
+            if not self.numpy_index.load():
+                logger.warning("NumPy index not built yet; searching Chroma until index_tours() runs")
+        else:
+            # Create or get collection
+            self._collection = self.get_or_create_collection()
+    
+    @property
+    def client(self):
+        """Shared Chroma client, opened on first use"""
+        if self._client is None:
+            self._client = get_chroma_client(self.persist_directory)
+        return self._client
+    
+    @property
+    def collection(self):
+        """Chroma collection, opened on first use"""
+        if self._collection is None:
+            self._collection = self.get_or_create_collection()
+        return self._collection
     
     def get_or_create_collection(self):
         """Get existing collection or create new one"""
@@ -48,79 +104,351 @@ def get_or_create_collection(self):
             return self.client.create_collection(self.collection_name)
     
     def load_tours_from_json(self, filepath='phase1_scraping/tour_data_cleaned.json'):
-        """Load tours from JSON file - using cleaned data"""
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                tours = json.load(f)
-            logger.info(f"Loaded {len(tours)} tours from {filepath}")
-            return tours
-        except FileNotFoundError:
-            logger.error(f"File not found: {filepath}")
-            return []
+        """Tours from the shared catalog for filepath (loaded once per process)"""
+        tours = get_tour_catalog(filepath).tours
+        if not tours:
+            logger.error(f"No tours loaded from {filepath}")
+        return tours
+    
+    def iter_tour_chunks(self, tours: Iterable[Dict]) -> Iterator[Dict[str, Any]]:
+        """Yield de-duplicated chunks one tour at a time"""
+        seen_ids = set()
+        for tour in tours:
+            for chunk in self.embedding_generator.prepare_tour_chunks(tour):
+                # Content-addressed ID, stable across processes and catalog reorders
+                if chunk['id'] in seen_ids:
+                    continue
+                seen_ids.add(chunk['id'])
+                yield chunk
     
     def prepare_data_for_indexing(self, tours: List[Dict]) -> tuple:
         """Prepare data for ChromaDB indexing"""
-        all_chunks = []
-        
-        for tour in tours:
-            chunks = self.embedding_generator.prepare_tour_chunks(tour)
-            all_chunks.extend(chunks)
-        
         # Prepare IDs, embeddings, and metadata
         ids = []
         documents = []
         metadatas = []
         
-        for i, chunk in enumerate(all_chunks):
-            # Create unique ID
-            chunk_id = f"chunk_{i}_{chunk['metadata']['tour_id']}"
-            ids.append(chunk_id)
+        for chunk in self.iter_tour_chunks(tours):
+            ids.append(chunk['id'])
             documents.append(chunk['text'])
             metadatas.append(chunk['metadata'])
         
         return ids, documents, metadatas
     
-    def index_tours(self, tours: List[Dict]):
-        """Index tours in the vector database"""
-        if not tours:
+    def get_indexed_hashes(self, page_size: int = INDEX_PAGE_SIZE) -> Dict[str, str]:
+        """Map of chunk id -> metadata content_hash for everything already indexed
+
+        Read page_size rows at a time, so only the hashes, not every stored
+        metadata dict, are held in memory.
+        """
+        hashes = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=['metadatas'], limit=page_size, offset=offset)
+            for chunk_id, metadata in zip(page['ids'], page['metadatas']):
+                hashes[chunk_id] = (metadata or {}).get('content_hash', '')
+            if len(page['ids']) < page_size:
+                return hashes
+            offset += page_size
+    
+    def get_index_version(self) -> str:
+        """Fingerprint of the indexed chunks; changes whenever index_tours() changes anything
+
+        Read from the INDEX_VERSION_FILE marker and re-read whenever its mtime
+        changes, so a re-index by the pipeline or another worker is picked up
+        here. Without a marker the fingerprint is computed from the stored
+        chunk hashes once per process.
+        """
+        marker = os.path.join(self.persist_directory, INDEX_VERSION_FILE)
+        try:
+            mtime = os.path.getmtime(marker)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != self._index_version_mtime:
+            try:
+                with open(marker, 'r', encoding='utf-8') as f:
+                    self._index_version = f.read().strip() or None
+                self._index_version_mtime = mtime
+            except OSError:
+                pass
+        if self._index_version is None:
+            self._index_version = self._compute_index_version()
+        return self._index_version
+    
+    def _compute_index_version(self) -> str:
+        snapshot = self.numpy_index.snapshot if self.numpy_index is not None else None
+        if snapshot is not None:
+            hashes = {
+                chunk_id: metadata.get('content_hash', '')
+                for chunk_id, metadata in zip(snapshot.ids, snapshot.metadatas)
+            }
+        else:
+            hashes = self.get_indexed_hashes()
+        digest = hashlib.sha1()
+        for chunk_id in sorted(hashes):
+            digest.update(f"{chunk_id}:{hashes[chunk_id]}\n".encode('utf-8'))
+        return digest.hexdigest()[:16]
+    
+    def write_index_version(self) -> str:
+        """Recompute the fingerprint and publish it in the marker file"""
+        self._index_version = self._compute_index_version()
+        marker = os.path.join(self.persist_directory, INDEX_VERSION_FILE)
+        tmp_path = f"{marker}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self._index_version)
+        os.replace(tmp_path, marker)
+        self._index_version_mtime = os.path.getmtime(marker)
+        return self._index_version
+    
+    def get_max_batch_size(self, requested: int) -> int:
+        """Clamp a batch size to what the Chroma server accepts"""
+        limit = getattr(self.client, 'max_batch_size', None)
+        return min(requested, limit) if limit else requested
+    
+    def index_tours(self, tours: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                    workers: int = 0) -> Dict[str, Any]:
+        """Index tours in the vector database
+        
+        Re-indexing is incremental and idempotent: new chunks are embedded and
+        added, chunks whose metadata changed are updated in place without
+        re-embedding, and chunks no longer produced by the catalog are deleted.
+        
+        Chunks are pulled lazily from the tours, encoded batch_size at a time
+        (across `workers` processes when workers > 0) and written to Chroma as
+        soon as each batch is ready, so memory stays flat as the catalog grows.
+        """
+        summary = {'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        if isinstance(tours, (list, tuple)) and not tours:
+            logger.warning("No tours to index")
+            summary['throughput'] = ThroughputMeter("indexing").summary()
+            return summary
+        
+        batch_size = self.get_max_batch_size(batch_size)
+        
+        # Diff against what is already stored
+        indexed = self.get_indexed_hashes()
+        seen_ids = set()
+        pending_updates = []
+        
+        def flush_updates():
+            if pending_updates:
+                ids = [chunk['id'] for chunk in pending_updates]
+                # Chroma merges metadata on update: keys the chunk lost (e.g. a dropped
+                # destination's dest_* flag) must be unset with None
+                stored = self.collection.get(ids=ids, include=['metadatas'])
+                stored_keys = {
+                    chunk_id: list(metadata or {})
+                    for chunk_id, metadata in zip(stored['ids'], stored['metadatas'])
+                }
+                metadatas = []
+                for chunk in pending_updates:
+                    metadata = dict(chunk['metadata'])
+                    for key in stored_keys.get(chunk['id'], ()):
+                        metadata.setdefault(key, None)
+                    metadatas.append(metadata)
+                self.collection.update(ids=ids, metadatas=metadatas)
+                summary['updated'] += len(pending_updates)
+                pending_updates.clear()
+        
+        def new_chunks():
+            for chunk in self.iter_tour_chunks(tours):
+                seen_ids.add(chunk['id'])
+                stored_hash = indexed.get(chunk['id'])
+                if stored_hash is None:
+                    yield chunk
+                elif stored_hash != chunk['metadata']['content_hash']:
+                    pending_updates.append(chunk)
+                    if len(pending_updates) >= batch_size:
+                        flush_updates()
+                else:
+                    summary['unchanged'] += 1
+        
+        # Only new chunk text needs the encoder
+        meter = ThroughputMeter("indexing")
+        encoder = BatchEncoder(self.embedding_generator.model_name, workers=workers)
+        waited = time.perf_counter()
+        for batch, embeddings in encoder.encode_stream(iter_batches(new_chunks(), batch_size)):
+            # Time spent waiting on the encoder for this batch
+            observe('index_encode_wait_seconds', time.perf_counter() - waited)
+            with span('index_batch', rows=len(batch)):
+                self.collection.upsert(
+                    embeddings=embeddings.tolist(),
+                    documents=[chunk['text'] for chunk in batch],
+                    metadatas=[chunk['metadata'] for chunk in batch],
+                    ids=[chunk['id'] for chunk in batch]
+                )
+            meter.add(len(batch))
+            waited = time.perf_counter()
+        summary['added'] = meter.rows
+        flush_updates()
+        summary['throughput'] = meter.summary()
+        
+        if not seen_ids:
+            # An empty generator or iterable is not a request to wipe the collection
             logger.warning("No tours to index")
-            return
-        
-        # Prepare data
-        ids, documents, metadatas = self.prepare_data_for_indexing(tours)
-        
-        # Generate embeddings
-        logger.info("Generating embeddings for chunks...")
-        embeddings = self.embedding_generator.generate_embeddings(documents)
-        
-        # Add to collection
-        logger.info(f"Adding {len(documents)} chunks to database...")
-        self.collection.add(
-            embeddings=embeddings.tolist(),
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+            return summary
+        
+        stale_ids = [chunk_id for chunk_id in indexed if chunk_id not in seen_ids]
+        for batch in iter_batches(stale_ids, batch_size):
+            self.collection.delete(ids=batch)
+        summary['deleted'] = len(stale_ids)
+        
+        changed = summary['added'] or summary['updated'] or summary['deleted']
+        
+        if self.numpy_index is not None:
+            if changed or not self.numpy_index.exists():
+                self.export_numpy_index()
+        if changed or not os.path.exists(os.path.join(self.persist_directory, INDEX_VERSION_FILE)):
+            self.write_index_version()
+        logger.info(
+            f"Indexed {len(seen_ids)} chunks: {summary['added']} added, {summary['updated']} updated, "
+            f"{summary['deleted']} deleted, {summary['unchanged']} unchanged "
+            f"({summary['throughput']['rows_per_sec']} rows/sec)"
         )
+        return summary
+    
+    def export_numpy_index(self):
+        """Rebuild the memory-mapped NumPy index from the vectors stored in Chroma"""
+        if self.numpy_index is None:
+            self.numpy_index = NumpyIndex(os.path.join(self.persist_directory, 'numpy_index'))
+        stored = self.collection.get(include=['embeddings', 'documents', 'metadatas'])
+        self.numpy_index.build(
+            stored['ids'], stored['documents'], stored['metadatas'],
+            np.asarray(stored['embeddings'], dtype=np.float32)
+        )
+    
+    def search(self, query: str, n_results: int = 5, filters: Optional[Dict[str, Any]] = None,
+               include_embeddings: bool = False) -> Dict:
+        """Search for similar chunks
         
-        logger.info(f"Successfully indexed {len(documents)} chunks")
+        filters restricts the search inside the index, e.g.
+        {'theme': 'Heritage', 'destinations': ['Jaipur', 'Udaipur'], 'has_price': True}
+        (see filters.build_where for the supported keys).
+        """
+        return self.search_many([query], n_results, filters=filters,
+                                include_embeddings=include_embeddings)[0]
     
-    def search(self, query: str, n_results: int = 5) -> Dict:
-        """Search for similar chunks"""
-        # Generate query embedding
-        query_embedding = self.embedding_generator.generate_embeddings([query])
+    def search_many(self, queries: List[str], n_results: int = 5, filters: Optional[Dict[str, Any]] = None,
+                    include_embeddings: bool = False) -> List[Dict]:
+        """Search several queries at once: one encoder batch and one index query
         
-        # Search
-        results = self.collection.query(
-            query_embeddings=query_embedding.tolist(),
-            n_results=n_results
-        )
+        Returns one result dict per query, each in the same shape search() returns.
+        """
+        if not queries:
+            return []
+        where = build_where(filters)
+        
+        # Generate query embeddings (served from the query cache when possible)
+        query_embeddings = self.embedding_generator.embed_queries(list(queries))
+        
+        # Search; a re-index by the pipeline or another worker replaces the NumPy files
+        if self.numpy_index is not None:
+            self.numpy_index.refresh()
+        use_numpy = self.numpy_index is not None and self.numpy_index.snapshot is not None
+        with span('vector_query', backend='numpy' if use_numpy else 'chroma',
+                  queries=len(queries), n_results=n_results, filtered=bool(where)):
+            if use_numpy:
+                results = self.numpy_index.query(query_embeddings, n_results=n_results, where=where,
+                                                 include_embeddings=include_embeddings)
+            else:
+                query_args = {'query_embeddings': query_embeddings.tolist(), 'n_results': n_results}
+                if where:
+                    query_args['where'] = where
+                if include_embeddings:
+                    query_args['include'] = ['documents', 'metadatas', 'distances', 'embeddings']
+                results = self.collection.query(**query_args)
         
-        return results
+        # Split the batched lists-of-lists into per-query results
+        per_query = []
+        for i in range(len(queries)):
+            per_query.append({
+                key: [results[key][i]] for key in ('ids', 'documents', 'metadatas', 'distances', 'embeddings')
+                if results.get(key) is not None
+            })
+        return per_query
     
-    def get_context_for_query(self, query: str, n_results: int = 3) -> str:
-        """Get context from database for a query"""
-        results = self.search(query, n_results)
+    def get_embeddings(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Stored vectors for the given chunk ids"""
+        if not ids:
+            return {}
+        snapshot = self.numpy_index.snapshot if self.numpy_index is not None else None
+        if snapshot is not None:
+            rows = snapshot.row_by_id
+            return {i: np.asarray(snapshot.embeddings[rows[i]]) for i in ids if i in rows}
+        stored = self.collection.get(ids=list(ids), include=['embeddings'])
+        return {i: np.asarray(e, dtype=np.float32) for i, e in zip(stored['ids'], stored['embeddings'])}
+    
+    def get_main_info_documents(self, tour_names: List[str]) -> Dict[str, str]:
+        """main_info chunk text for each tour name"""
+        if not tour_names:
+            return {}
+        snapshot = self.numpy_index.snapshot if self.numpy_index is not None else None
+        if snapshot is not None:
+            wanted = set(tour_names)
+            return {
+                m['tour_name']: doc
+                for doc, m in zip(snapshot.documents, snapshot.metadatas)
+                if m.get('chunk_type') == 'main_info' and m.get('tour_name') in wanted
+            }
+        where = {'$and': [{'chunk_type': 'main_info'}, {'tour_name': {'$in': list(tour_names)}}]}
+        stored = self.collection.get(where=where, include=['documents', 'metadatas'])
+        return {m['tour_name']: doc for doc, m in zip(stored['documents'], stored['metadatas'])}
+    
+    def diversify_results(self, query: str, results: Dict, n_results: int,
+                          lambda_: float = DEFAULT_MMR_LAMBDA) -> Dict:
+        """Collapse chunk hits into one block per tour and pick n_results distinct tours with MMR
+        
+        Every tour's main_info and matched highlights are merged into a single
+        document, so one tour with many highlights cannot fill every slot.
+        """
+        hit_ids = results['ids'][0] if results.get('ids') else []
+        if results.get('embeddings') is not None and len(results['embeddings']) and len(results['embeddings'][0]):
+            embeddings = dict(zip(hit_ids, results['embeddings'][0]))
+        else:
+            embeddings = self.get_embeddings(hit_ids)
+        
+        groups = group_hits_by_tour(results, embeddings)
+        query_vector = self.embedding_generator.embed_query(query)
+        chosen = [groups[i] for i in mmr_select(query_vector, [g['vector'] for g in groups], n_results, lambda_)]
         
+        main_info = self.get_main_info_documents([g['tour_name'] for g in chosen if not g['main_info']])
+        return {
+            'ids': [[g['ids'][0] for g in chosen]],
+            'documents': [[merge_tour_block(g, main_info.get(g['tour_name'])) for g in chosen]],
+            'metadatas': [[g['metadata'] for g in chosen]],
+        }
+    
+    def get_context_for_query(self, query: str, n_results: int = 3,
+                              filters: Optional[Dict[str, Any]] = None, overfetch: int = 4,
+                              token_budget: Optional[int] = None) -> str:
+        """Get context from database for a query
+        
+        Over-fetches n_results * overfetch chunks and returns n_results distinct
+        tours, each as one merged block, packed into token_budget tokens.
+        """
+        results = self.search(query, n_results * overfetch, filters=filters, include_embeddings=True)
+        return self.pack_context(self.diversify_results(query, results, n_results), token_budget)
+    
+    @property
+    def context_packer(self) -> ContextPacker:
+        """Token-budgeted packer counting with the embedding model's tokenizer"""
+        if self._context_packer is None:
+            self._context_packer = ContextPacker(make_token_counter(self.embedding_generator.model))
+        return self._context_packer
+    
+    def pack_context(self, results: Dict, token_budget: Optional[int] = None) -> str:
+        """Like format_context, minus placeholder fields and repeated lines, within token_budget"""
+        if not results['documents']:
+            return ""
+        blocks = [
+            {'tour_name': metadata.get('tour_name', 'Unknown Tour'), 'document': document}
+            for document, metadata in zip(results['documents'][0], results['metadatas'][0])
+        ]
+        return self.context_packer.pack(blocks, token_budget)
+    
+    @staticmethod
+    def format_context(results: Dict) -> str:
+        """Join query results (chromadb shape, first query) into a prompt context block"""
         if not results['documents']:
             return ""
         
@@ -152,14 +480,21 @@ def clean_text_for_display(text, max_length=200):
 def main():
     """Main function to run the indexing process"""
     # Initialize vector database
-    vector_db = VectorDatabase()
+    vector_db = get_vector_database()
     
     # Load tours from cleaned file
     tours = vector_db.load_tours_from_json('phase1_scraping/tour_data_cleaned.json')
     
     if tours:
-        # Index tours
-        vector_db.index_tours(tours)
+        # Index tours (only new or changed chunks are embedded)
+        summary = vector_db.index_tours(
+            tours,
+            batch_size=int(os.getenv('INDEX_BATCH_SIZE', DEFAULT_BATCH_SIZE)),
+            workers=int(os.getenv('INDEX_WORKERS', '0'))
+        )
+        print(f"Indexing summary: {summary['added']} added, {summary['updated']} updated, "
+              f"{summary['deleted']} deleted, {summary['unchanged']} unchanged, "
+              f"{summary['throughput']['rows_per_sec']} rows/sec")
         
         # Test search
         test_queries = [
@@ -174,9 +509,11 @@ def main():
         print("TESTING SEARCH RESULTS")
         print("="*50)
         
-        for query in test_queries:
+        # One encoder batch and one index query for all test queries
+        all_results = vector_db.search_many(test_queries, n_results=2)
+        
+        for query, results in zip(test_queries, all_results):
             print(f"\n Query: {query}")
-            results = vector_db.search(query, n_results=2)
             
             if results['documents']:
                 for i, doc in enumerate(results['documents'][0]):
@@ -195,7 +532,6 @@ def main():
 def ensure_database_exists():
     """Build the vector database if it doesn't exist"""
     import os
-    import json
     
     # Check if database already exists
     if os.path.exists('./chroma_db') and len(os.listdir('./chroma_db')) > 0:
@@ -211,15 +547,11 @@ def ensure_database_exists():
     
     # Load and index the data
     try:
-        from phase2_database.vector_store import VectorDatabase
-        import json
-        
-        with open('phase1_scraping/tour_data_cleaned.json', 'r', encoding='utf-8') as f:
-            tours = json.load(f)
+        tours = get_tour_catalog().tours
         
         print(f"📊 Loaded {len(tours)} tours")
         
-        db = VectorDatabase()
+        db = get_vector_database()
         db.index_tours(tours)
         print("✅ Vector database built successfully")
         
@@ -227,4 +559,5 @@ def ensure_database_exists():
         print(f"❌ Error building database: {e}")
 
 if __name__ == "__main__":
-    ensure_database_exists()
\ No newline at end of file
+    # Incremental: new and changed chunks are indexed, removed tours are pruned
+    main()
@@ -0,0 +1,161 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = './cache/answer_cache.sqlite'
+
+
+class SemanticAnswerCache:
+    """Answer cache keyed by question embedding, shared through SQLite
+
+    A lookup hits when a stored question for the same index version and scope
+    has cosine similarity >= threshold with the new one and is younger than
+    ttl_seconds. The scope is the tour the question names ('' for none), so
+    close paraphrases about different tours never share an answer.
+    Entries are evicted least-recently-used beyond max_entries. The database
+    runs in WAL mode so every worker process on the host shares one cache;
+    each process keeps an in-memory copy of the vectors and reloads it only
+    when SQLite reports that another connection changed the data.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, threshold: float = 0.92,
+                 ttl_seconds: int = 86400, max_entries: int = 1000):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                index_version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                scope TEXT NOT NULL DEFAULT ''
+            )""")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if 'scope' not in columns:
+            # Answers cached before scoping may be about any tour
+            self._conn.execute("DELETE FROM answers")
+            try:
+                self._conn.execute("ALTER TABLE answers ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+            except sqlite3.OperationalError as e:
+                # Another worker migrated the table first
+                logger.debug(f"Answer cache already migrated: {e}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_version ON answers(index_version)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_access ON answers(last_access)")
+        self._conn.commit()
+
+        self._mirror_key = None
+        self._mirror_ids = np.zeros(0, dtype=np.int64)
+        self._mirror_scopes = np.zeros(0, dtype=object)
+        self._mirror_matrix: Optional[np.ndarray] = None
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load_mirror(self, index_version: str, now: float):
+        key = (index_version, self._data_version(), int(now // 60))
+        if key == self._mirror_key:
+            return
+        rows = self._conn.execute(
+            "SELECT id, embedding, scope FROM answers WHERE index_version = ? AND created_at >= ?",
+            (index_version, now - self.ttl_seconds)
+        ).fetchall()
+        self._mirror_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._mirror_scopes = np.array([row[2] for row in rows], dtype=object)
+        self._mirror_matrix = (
+            np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+        )
+        self._mirror_key = key
+
+    def lookup(self, embedding: np.ndarray, index_version: str, scope: str = '') -> Optional[str]:
+        """Cached answer for a semantically equivalent question in the same scope, or None"""
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        now = time.time()
+        with self._lock:
+            try:
+                self._load_mirror(index_version, now)
+                if self._mirror_matrix is None or self._mirror_matrix.shape[1] != query.shape[0]:
+                    self.misses += 1
+                    return None
+                scores = self._mirror_matrix @ query
+                scores[self._mirror_scopes != scope] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] < self.threshold:
+                    self.misses += 1
+                    return None
+                row_id = int(self._mirror_ids[best])
+                row = self._conn.execute(
+                    "SELECT answer FROM answers WHERE id = ? AND created_at >= ?",
+                    (row_id, now - self.ttl_seconds)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE answers SET last_access = ? WHERE id = ?", (now, row_id))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache lookup failed: {e}")
+                self.misses += 1
+                return None
+
+    def store(self, question: str, embedding: np.ndarray, answer: str, index_version: str, scope: str = ''):
+        """Cache an answer, then drop expired entries and evict beyond max_entries"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO answers (question, embedding, answer, index_version, created_at, last_access, "
+                    "scope) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (question, vector.tobytes(), answer, index_version, now, now, scope)
+                )
+                self._conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._conn.execute(
+                    "DELETE FROM answers WHERE id IN ("
+                    "SELECT id FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._conn.commit()
+                self._mirror_key = None
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
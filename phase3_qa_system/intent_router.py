@@ -0,0 +1,176 @@
+import re
+import difflib
+import logging
+from typing import List, Dict, Any, Optional
+
+from phase2_database.text_utils import normalize_text, tokenize
+from phase2_database.filters import PLACEHOLDER_VALUES, DESTINATION_LABEL_RE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cue words per catalog field, matched on the question minus the tour name
+FIELD_PATTERNS = {
+    'price': re.compile(r'\b(price|prices|pricing|cost|costs|how much|fare|fares|rate|rates|charges?)\b'),
+    'duration': re.compile(r'\b(how many days|how many nights|how long|duration|days|nights|length)\b'),
+    'destinations': re.compile(r'\b(destinations?|places|cities|cover|covers|covered|route|where)\b'),
+    'highlights': re.compile(r'\b(highlights?|include|includes|included|inclusions?|activities)\b'),
+    'theme': re.compile(r'\b(theme|type|kind|category)\b'),
+}
+FIELD_LABELS = {
+    'price': "Price",
+    'duration': "Duration",
+    'destinations': "Destinations",
+    'highlights': "Highlights",
+    'theme': "Theme",
+}
+# Questions that need reasoning over several tours go to RAG, as do plural
+# "tours"/"trips"/"packages" ("Which Kerala tours include houseboats?")
+OPEN_ENDED_RE = re.compile(
+    r'\b(compare|comparison|vs|versus|or|recommend|suggest|best|better|cheaper|cheapest|'
+    r'difference|plan|should|similar|alternatives?|tours|trips|packages)\b'
+)
+
+# Words in tour names that do not identify the tour
+NAME_NOISE = frozenset("package packages day days night nights full".split())
+_DURATION_IN_NAME_RE = re.compile(r'\d+\s*(?:days?|nights?)(?:\s*/\s*\d+\s*(?:days?|nights?))?', re.IGNORECASE)
+# Category and listing pages ("Kerala Tour Packages", "Dubai Tours") are never a single-tour answer
+_LISTING_NAME_RE = re.compile(r'\b(tours|packages)\b', re.IGNORECASE)
+
+FUZZY_TOKEN_RATIO = 0.8
+
+
+def name_key(name: str) -> List[str]:
+    """Identifying tokens of a tour name: no stopwords, numbers or duration words"""
+    return [t for t in tokenize(name) if t not in NAME_NOISE and not t.isdigit()]
+
+
+def is_listing(tour: Dict[str, Any]) -> bool:
+    return bool(tour.get('is_umbrella_package')) or bool(_LISTING_NAME_RE.search(tour.get('name', '')))
+
+
+class IntentRouter:
+    """Detects single-tour field lookups ("price of Golden Triangle Tour")
+
+    Tour names are indexed once by their identifying tokens, joined without
+    spaces so that "Char Dham Yatra" and "Chardham Yatra" share a key;
+    listing pages are left out. A question is routed when it names one tour
+    (every token of a name of two or more tokens, misspellings matched with
+    difflib, or the whole name of a one-token tour), asks for a known field
+    and has no comparison, recommendation or plural "tours" words;
+    everything else goes to RAG. Placeholder values are answered with
+    field_value()'s "on request" wording.
+    """
+
+    def __init__(self, tours: List[Dict[str, Any]]):
+        self.tours = tours
+        self.keys: List[str] = []
+        self.tours_by_key: Dict[str, List[int]] = {}
+        # Spelling variants of each key: ('char', 'dham', 'yatra') and ('chardham', 'yatra')
+        self.key_variants: Dict[str, set] = {}
+        for i, tour in enumerate(tours):
+            if is_listing(tour):
+                continue
+            tokens = tuple(name_key(tour.get('name', '')))
+            if not tokens:
+                continue
+            key = "".join(tokens)
+            if key not in self.tours_by_key:
+                self.keys.append(key)
+            self.tours_by_key.setdefault(key, []).append(i)
+            self.key_variants.setdefault(key, set()).add(tokens)
+        # Same name key: prefer the most complete record
+        for rows in self.tours_by_key.values():
+            rows.sort(key=lambda i: -tours[i].get('metadata', {}).get('completeness_score', 0))
+        self.vocabulary = sorted({token for variants in self.key_variants.values()
+                                  for tokens in variants for token in tokens})
+        self._vocabulary_set = set(self.vocabulary)
+
+    def _names_tour(self, tokens: tuple, resolved: set, question: str) -> bool:
+        if len(tokens) > 1:
+            return all(token in resolved for token in tokens)
+        # A one-token key ("Ladakh") only counts when the question quotes the whole name
+        return any(f" {normalize_text(_DURATION_IN_NAME_RE.sub('', self.tours[row].get('name', '')))} " in question
+                   for row in self.tours_by_key[tokens[0]])
+
+    def match_tour(self, question: str) -> Optional[Dict[str, Any]]:
+        """Best tour named by the question, or None"""
+        words = tokenize(question)
+        if not words:
+            return None
+
+        # Map misspelled question words onto the name vocabulary
+        resolved = set(words)
+        for word in words:
+            if len(word) >= 4 and word not in self._vocabulary_set:
+                resolved.update(difflib.get_close_matches(word, self.vocabulary, n=2, cutoff=FUZZY_TOKEN_RATIO))
+        # "char dham" -> "chardham"
+        resolved.update(a + b for a, b in zip(words, words[1:]))
+        padded = f" {normalize_text(question)} "
+
+        best_key, best_tokens = None, None
+        for key in self.keys:
+            for tokens in self.key_variants[key]:
+                if self._names_tour(tokens, resolved, padded):
+                    # The most specific name wins: "buddhist golden triangle" over "golden triangle"
+                    if best_key is None or len(key) > len(best_key):
+                        best_key, best_tokens = key, tokens
+                    break
+        if best_key is None:
+            return None
+        return {'tour': self.tours[self.tours_by_key[best_key][0]], 'key': best_tokens}
+
+    def route(self, question: str) -> Optional[Dict[str, Any]]:
+        """{'tour', 'fields'} for a field lookup, or None to fall through to RAG"""
+        match = self.match_tour(question)
+        if match is None:
+            return None
+
+        key_tokens = set(match['key'])
+        rest = " ".join(
+            word for word in normalize_text(question).split()
+            if word not in key_tokens and not any(
+                difflib.SequenceMatcher(None, word, token).ratio() >= FUZZY_TOKEN_RATIO for token in key_tokens
+            )
+        )
+        if OPEN_ENDED_RE.search(rest):
+            return None
+        fields = [field for field, pattern in FIELD_PATTERNS.items() if pattern.search(rest)]
+        if not fields:
+            return None
+        return {'tour': match['tour'], 'fields': fields}
+
+
+def catalog_value(tour: Dict[str, Any], field: str) -> Optional[str]:
+    """Catalog value for a field, or None when the tour only has a placeholder"""
+    if field == 'price':
+        price = tour.get('price', '')
+        return price if price and price.lower() not in PLACEHOLDER_VALUES else None
+    if field == 'duration':
+        duration = tour.get('duration', '')
+        if duration and duration.lower() not in PLACEHOLDER_VALUES:
+            return duration
+        # Many package names carry the duration, e.g. "... 4 Days / 3 Nights"
+        in_name = _DURATION_IN_NAME_RE.search(tour.get('name', ''))
+        return in_name.group(0) if in_name else None
+    if field == 'destinations':
+        destinations = [DESTINATION_LABEL_RE.sub('', d) for d in tour.get('destinations', [])
+                        if d.lower() not in PLACEHOLDER_VALUES]
+        return ", ".join(destinations) if destinations else None
+    if field == 'highlights':
+        highlights = [h for h in tour.get('highlights', []) if h.lower() not in PLACEHOLDER_VALUES]
+        return "; ".join(highlights[:5]) if highlights else None
+    return tour.get(field) or None
+
+
+def field_value(tour: Dict[str, Any], field: str) -> str:
+    """Catalog value for a field, with placeholders turned into a plain answer"""
+    value = catalog_value(tour, field)
+    if value is not None:
+        return value
+    return {
+        'price': "Available on request - our travel experts will share a quote for your dates",
+        'duration': "Flexible - the tour length is customised for you",
+        'destinations': "Shared on request",
+        'highlights': "Customised to your interests",
+    }.get(field, "General")
@@ -0,0 +1,44 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from phase2_database.text_utils import tokenize
+from phase2_database.postings import build_postings, index_term
+
+
+class KeywordIndex:
+    """Inverted index over tour fields for the keyword fallback
+
+    Per-field hits are folded into one postings list per term: the tour rows
+    containing it and their weighted score (field weight times the number of
+    field entries holding the term), stored as numpy arrays sorted best
+    first. A one-term query is a slice of its postings; longer queries are
+    summed with bincount, so only the query's postings are touched. Tours
+    matching more of the query's terms rank first, then by score.
+    """
+
+    def __init__(self, tours: List[Dict[str, Any]],
+                 postings: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None):
+        self.tours = tours
+        # Prebuilt postings come with a binary catalog artifact
+        self.postings = postings if postings is not None else build_postings(tours)
+
+    def search(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """Up to n_results tours, best first"""
+        hits = [self.postings[term] for term in {index_term(t) for t in tokenize(query)} if term in self.postings]
+        if not hits or n_results <= 0:
+            return []
+        if len(hits) == 1:
+            return [self.tours[row] for row in hits[0][0][:n_results]]
+
+        rows = np.concatenate([term_rows for term_rows, _ in hits])
+        scores = np.concatenate([term_scores for _, term_scores in hits])
+        matched = np.bincount(rows, minlength=len(self.tours))
+        total = np.bincount(rows, weights=scores, minlength=len(self.tours))
+
+        # More matched terms always outrank a higher score, then earlier rows win ties
+        key = matched * (total.max() + 1) + total
+        k = min(n_results, int(np.count_nonzero(matched)))
+        top = np.argpartition(-key, k - 1)[:k]
+        tied = np.flatnonzero(key >= key[top].min())
+        top = tied[np.lexsort((tied, -key[tied]))][:k]
+        return [self.tours[row] for row in top]
@@ -0,0 +1,167 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Alternative Groq-compatible endpoint, e.g. the local mock server (phase3_qa_system/mock_llm_server.py)
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL') or None
+
+# Upper bound on concurrent upstream LLM requests per event loop
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+# Seconds a health result is trusted before it is re-probed in the background
+LLM_HEALTH_TTL = float(os.getenv('LLM_HEALTH_TTL', '300'))
+# Seconds before a failed status is re-probed
+LLM_HEALTH_RETRY = float(os.getenv('LLM_HEALTH_RETRY', '30'))
+
+_lock = threading.Lock()
+# httpx connection pools and semaphores belong to one event loop, so they are
+# cached per loop and dropped with it
+_async_clients = weakref.WeakKeyDictionary()
+_semaphores = weakref.WeakKeyDictionary()
+_executor = None
+_clients = {}
+_health = {}
+
+
+def get_client(api_key: str, base_url: str = None):
+    """Shared synchronous Groq client, created on first use"""
+    base_url = base_url or GROQ_BASE_URL
+    with _lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            from groq import Groq
+            # Retries are handled by LLMGateway
+            client = Groq(api_key=api_key, base_url=base_url, max_retries=0)
+            _clients[(api_key, base_url)] = client
+        return client
+
+
+class LLMHealth:
+    """Cached availability of the Groq API for one key
+
+    The status starts unknown and is settled by a background models.list()
+    probe, so constructing the QA system never waits on the network. Until
+    the probe finishes the LLM is assumed to be up and the first request
+    doubles as the check: callers report its outcome with record_success /
+    record_failure. Stale results are refreshed in the background.
+    """
+
+    def __init__(self, api_key: str, base_url: str = None, ttl: float = LLM_HEALTH_TTL,
+                 retry_after: float = LLM_HEALTH_RETRY):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.status = None
+        self.checked_at = 0.0
+        self.last_error = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Live status; never blocks, kicks off a re-probe when the result is stale"""
+        age = time.time() - self.checked_at
+        if self.status is None or age > (self.ttl if self.status else self.retry_after):
+            self.start_probe()
+        return self.status is not False
+
+    def start_probe(self):
+        with self._lock:
+            if self._probing:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe, name='llm-health', daemon=True).start()
+
+    def _probe(self):
+        try:
+            get_client(self.api_key, self.base_url).models.list()
+            self.record_success()
+        except Exception as e:
+            self.record_failure(e)
+        finally:
+            with self._lock:
+                self._probing = False
+
+    def record_success(self):
+        if self.status is not True:
+            logger.info("Groq API available")
+        self.status = True
+        self.checked_at = time.time()
+        self.last_error = None
+
+    def record_failure(self, error: Exception):
+        if self.status is not False:
+            logger.warning(f"Groq API unavailable, using template responses: {error}")
+        self.status = False
+        self.checked_at = time.time()
+        self.last_error = str(error)
+
+
+def get_llm_health(api_key: str, base_url: str = None) -> LLMHealth:
+    """Process-wide health tracker for an API key and endpoint; the first call starts its probe"""
+    base_url = base_url or GROQ_BASE_URL
+    with _lock:
+        health = _health.get((api_key, base_url))
+        if health is None:
+            health = LLMHealth(api_key, base_url)
+            _health[(api_key, base_url)] = health
+            health.start_probe()
+        return health
+
+
+def get_async_client(api_key: str, base_url: str = None):
+    """Shared AsyncGroq client (and httpx connection pool) for the running event loop"""
+    from groq import AsyncGroq
+    import httpx
+
+    base_url = base_url or GROQ_BASE_URL
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get((api_key, base_url))
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+            client = AsyncGroq(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+            clients[(api_key, base_url)] = client
+        return client
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Bounded semaphore limiting in-flight LLM calls on the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+            _semaphores[loop] = semaphore
+        return semaphore
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Thread pool for CPU-bound embedding, search and template work called from async code"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('RETRIEVAL_WORKERS', '4')),
+                thread_name_prefix='retrieval'
+            )
+        return _executor
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call in the shared executor without stalling the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
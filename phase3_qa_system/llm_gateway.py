@@ -0,0 +1,416 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Optional, Iterator
+
+from phase2_database.metrics import metrics
+from phase3_qa_system.llm_client import get_client, get_async_client, get_llm_semaphore, LLM_MAX_CONCURRENCY
+
+try:
+    from groq import APIConnectionError, APIStatusError, APITimeoutError
+except ImportError:
+    APIConnectionError = APIStatusError = APITimeoutError = ()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRIMARY_MODEL = os.getenv('LLM_PRIMARY_MODEL', 'llama-3.3-70b-versatile')
+FALLBACK_MODEL = os.getenv('LLM_FALLBACK_MODEL', 'gemma2-9b-it')
+
+# Seconds allowed per attempt; for streams, per attempt until the first token
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '20'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+# Wall-clock budget for a whole call: every attempt, backoff and model fallback
+LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', '45'))
+# Route to the fallback model while the primary's recent p95 latency exceeds this (seconds)
+LLM_P95_THRESHOLD = float(os.getenv('LLM_P95_THRESHOLD', '10'))
+
+TRANSIENT_STATUS_CODES = (408, 409, 429)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every model's circuit is open"""
+
+
+def is_transient(error: Exception) -> bool:
+    """Timeouts, connection errors, rate limits and 5xx responses are worth retrying"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        status = error.status_code
+        return status in TRANSIENT_STATUS_CODES or status >= 500
+    return False
+
+
+def call_with_timeout(seconds: float, func, *args, **kwargs):
+    """Run a blocking call on the LLM worker pool and wait at most seconds for it
+
+    The httpx timeout passed to Groq bounds each connect and read, not the
+    whole call, so a slowly trickling response could run past it. A call
+    that overruns keeps its worker until httpx gives up on it.
+    """
+    future = _get_call_pool().submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=max(seconds, 0.0))
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"LLM call did not finish within {seconds:.1f}s") from None
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures
+
+    While open, calls are refused for reset_timeout seconds; then a single
+    trial call is let through (half-open) and its outcome closes or re-opens
+    the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self.opened_at = time.time()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial that ended without an outcome (cancelled or abandoned)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyWindow:
+    """Latencies from the last window_seconds, for a rolling p95"""
+
+    def __init__(self, window_seconds: float = 300.0, min_samples: int = 5):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=500)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append((time.time(), seconds))
+
+    def p95(self) -> Optional[float]:
+        """p95 of recent samples, or None while there are too few to judge"""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            while self.samples and self.samples[0][0] < cutoff:
+                self.samples.popleft()
+            values = sorted(latency for _, latency in self.samples)
+        if len(values) < self.min_samples:
+            return None
+        return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+
+class LLMGateway:
+    """Single entry point for Groq chat completions
+
+    Every attempt has a timeout and the whole call a deadline, transient
+    errors are retried with full-jitter exponential backoff until that
+    deadline, and each model has its own circuit breaker. The
+    primary model is skipped in favour of the next one in models while its
+    circuit is open or its recent p95 latency (time to first token for
+    streams, total time otherwise) is above p95_threshold. Old samples age
+    out, so the primary is tried again once it has been idle for a window.
+
+    client and async_client replace the shared Groq clients, e.g. with
+    in-process fakes in tests.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 models: Optional[List[str]] = None, timeout: float = LLM_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, p95_threshold: float = LLM_P95_THRESHOLD,
+                 backoff_base: float = 0.5, backoff_cap: float = 4.0, deadline: float = LLM_DEADLINE,
+                 client=None, async_client=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = client
+        self.async_client = async_client
+        self.models = models or [PRIMARY_MODEL, FALLBACK_MODEL]
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.p95_threshold = p95_threshold
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breakers = {model: CircuitBreaker() for model in self.models}
+        self.latencies = {model: LatencyWindow() for model in self.models}
+
+    def get_client(self):
+        return self.client or get_client(self.api_key, self.base_url)
+
+    def get_async_client(self):
+        return self.async_client or get_async_client(self.api_key, self.base_url)
+
+    def choose_models(self) -> List[str]:
+        """Models to try, best first"""
+        fast = []
+        slow = []
+        for model in self.models:
+            if self.breakers[model].state == 'open':
+                continue
+            p95 = self.latencies[model].p95()
+            (slow if p95 is not None and p95 > self.p95_threshold else fast).append(model)
+        if not fast and not slow:
+            raise CircuitOpenError("All LLM circuits are open")
+        return fast + slow
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _attempts(self, deadline: float):
+        """(model, attempt) pairs: retries on a model, then the next model, until the deadline"""
+        for model in self.choose_models():
+            for attempt in range(self.max_retries + 1):
+                if time.monotonic() >= deadline:
+                    return
+                if not self.breakers[model].allow():
+                    break
+                yield model, attempt
+
+    def _pause(self, attempt: int, deadline: float) -> float:
+        """Backoff before a retry, never past the deadline"""
+        return max(0.0, min(self.backoff(attempt - 1), deadline - time.monotonic()))
+
+    def _give_up(self, last_error: Optional[Exception], deadline: float) -> Exception:
+        if time.monotonic() >= deadline:
+            return TimeoutError(f"No LLM answer within the {self.deadline:g}s deadline")
+        return last_error or CircuitOpenError("No LLM model available")
+
+    def _record(self, model: str, mode: str, start: float, error: Optional[Exception] = None):
+        """Update the breaker and latency window, and export the attempt as an llm_call span
+
+        For streams this is called at the first token, so the latency is the TTFT.
+        """
+        latency = time.perf_counter() - start
+        metrics.record_span('llm_call', latency, {'model': model, 'mode': mode},
+                            type(error).__name__ if error is not None else None)
+        if error is None:
+            self.breakers[model].record_success()
+            self.latencies[model].add(latency)
+        elif is_transient(error):
+            self.breakers[model].record_failure()
+            if isinstance(error, (TimeoutError, asyncio.TimeoutError, APITimeoutError)):
+                # The time actually waited: the deadline often cuts an attempt shorter than self.timeout
+                self.latencies[model].add(latency)
+        else:
+            # The upstream answered; a bad request says nothing about its health
+            self.breakers[model].record_success()
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """Blocking chat completion, returns the message text"""
+        last_error = None
+        deadline = time.monotonic() + self.deadline
+        for model, attempt in self._attempts(deadline):
+            start = time.perf_counter()
+            try:
+                if attempt:
+                    time.sleep(self._pause(attempt, deadline))
+                    start = time.perf_counter()
+                timeout = min(self.timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    self.breakers[model].release()
+                    break
+                completion = call_with_timeout(
+                    timeout, self.get_client().chat.completions.create,
+                    model=model, messages=messages, temperature=temperature,
+                    max_tokens=max_tokens, timeout=timeout
+                )
+                self._record(model, 'complete', start)
+                return completion.choices[0].message.content
+            except Exception as e:
+                last_error = e
+                self._record(model, 'complete', start, e)
+                if not is_transient(e):
+                    raise
+                logger.warning(f"{model} attempt {attempt + 1} failed: {e}")
+            except BaseException:
+                # Interrupted before an outcome: free the half-open trial for the next caller
+                self.breakers[model].release()
+                raise
+        raise self._give_up(last_error, deadline)
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Iterator[str]:
+        """Streaming chat completion yielding text deltas
+
+        Attempts are retried only until the first token has been yielded.
+        The first token must arrive within the attempt timeout and the whole
+        stream must end by the call's deadline.
+        """
+        last_error = None
+        deadline = time.monotonic() + self.deadline
+        for model, attempt in self._attempts(deadline):
+            start = time.perf_counter()
+            streamed_any = False
+            chunks = 0
+            stream = None
+            try:
+                if attempt:
+                    time.sleep(self._pause(attempt, deadline))
+                    start = time.perf_counter()
+                timeout = min(self.timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    self.breakers[model].release()
+                    break
+                first_token_by = time.monotonic() + timeout
+                stream = call_with_timeout(
+                    timeout, self.get_client().chat.completions.create,
+                    model=model, messages=messages, temperature=temperature,
+                    max_tokens=max_tokens, stream=True, timeout=timeout
+                )
+                chunk_iter = iter(stream)
+                while True:
+                    chunk = call_with_timeout(
+                        (deadline if streamed_any else first_token_by) - time.monotonic(),
+                        next, chunk_iter, None
+                    )
+                    if chunk is None:
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if not streamed_any:
+                        streamed_any = True
+                        self._record(model, 'stream', start)
+                    chunks += 1
+                    yield delta
+                if not streamed_any:
+                    self._record(model, 'stream', start)
+                metrics.record_span('llm_stream', time.perf_counter() - start,
+                                    {'model': model, 'chunks': chunks}, None)
+                return
+            except Exception as e:
+                last_error = e
+                if not streamed_any:
+                    self._record(model, 'stream', start, e)
+                else:
+                    metrics.record_span('llm_stream', time.perf_counter() - start,
+                                        {'model': model, 'chunks': chunks}, type(e).__name__)
+                    if is_transient(e):
+                        self.breakers[model].record_failure()
+                if streamed_any or not is_transient(e):
+                    raise
+                logger.warning(f"{model} attempt {attempt + 1} failed: {e}")
+            except BaseException:
+                # The consumer closed the stream (GeneratorExit) before the first token
+                if not streamed_any:
+                    self.breakers[model].release()
+                raise
+            finally:
+                # Free the HTTP connection, and the worker blocked reading it, of an abandoned attempt
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.debug(f"Could not close {model} stream: {e}")
+        raise self._give_up(last_error, deadline)
+
+    async def acomplete(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """Async chat completion on the pooled async client, bounded by the LLM semaphore"""
+        last_error = None
+        deadline = time.monotonic() + self.deadline
+        for model, attempt in self._attempts(deadline):
+            start = time.perf_counter()
+            try:
+                if attempt:
+                    await asyncio.sleep(self._pause(attempt, deadline))
+                async with get_llm_semaphore():
+                    # Time spent queued on the semaphore is not upstream latency
+                    start = time.perf_counter()
+                    timeout = min(self.timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        self.breakers[model].release()
+                        break
+                    completion = await asyncio.wait_for(
+                        self.get_async_client().chat.completions.create(
+                            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+                        ),
+                        timeout=timeout
+                    )
+                self._record(model, 'async', start)
+                return completion.choices[0].message.content
+            except Exception as e:
+                last_error = e
+                self._record(model, 'async', start, e)
+                if not is_transient(e):
+                    raise
+                logger.warning(f"{model} attempt {attempt + 1} failed: {e}")
+            except BaseException:
+                # CancelledError is not an Exception: free the half-open trial for the next caller
+                self.breakers[model].release()
+                raise
+        raise self._give_up(last_error, deadline)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            model: {
+                'circuit': self.breakers[model].state,
+                'p95_seconds': self.latencies[model].p95(),
+            }
+            for model in self.models
+        }
+
+
+_lock = threading.Lock()
+_gateways: Dict[tuple, LLMGateway] = {}
+_call_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_call_pool() -> ThreadPoolExecutor:
+    """Threads running blocking Groq calls for call_with_timeout"""
+    global _call_pool
+    with _lock:
+        if _call_pool is None:
+            _call_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY * 4, thread_name_prefix='llm-call')
+        return _call_pool
+
+
+def get_llm_gateway(api_key: str, base_url: Optional[str] = None) -> LLMGateway:
+    """Process-wide gateway per API key and endpoint, so breakers and latency windows are shared"""
+    with _lock:
+        gateway = _gateways.get((api_key, base_url))
+        if gateway is None:
+            gateway = LLMGateway(api_key, base_url)
+            _gateways[(api_key, base_url)] = gateway
+        return gateway
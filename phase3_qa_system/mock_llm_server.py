@@ -0,0 +1,234 @@
+"""Offline stand-in for the Groq chat-completions API
+
+Serves the OpenAI/Groq protocol (/openai/v1/chat/completions, /v1/chat/completions
+and the models list), streaming included, with configurable latency, token
+rate and error injection. Point the QA system and itinerary planner at it with
+
+    python phase3_qa_system/mock_llm_server.py --port 8008 --latency lognormal --ttft 0.4
+    GROQ_BASE_URL=http://127.0.0.1:8008 GROQ_API_KEY=mock python phase3_qa_system/rag_qa.py
+"""
+import sys
+import os
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MOCK_MODELS = ["llama-3.3-70b-versatile", "llama-3.1-70b-versatile", "llama3-70b-8192", "gemma2-9b-it"]
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+
+class MockSettings:
+    """Behaviour of the mock server
+
+    Time to first token is drawn from the latency distribution around ttft
+    seconds (uniform spans 0..2*ttft, lognormal uses sigma). Tokens then
+    arrive at tokens_per_second. error_rate of requests fail with one of
+    error_statuses, hang_rate of requests stall for hang_seconds before
+    answering, and drop_rate of streams are cut off halfway.
+    """
+
+    def __init__(self, latency: str = 'lognormal', ttft: float = 0.3, sigma: float = 0.5,
+                 tokens_per_second: float = 250.0, response_tokens: int = 200,
+                 error_rate: float = 0.0, error_statuses: List[int] = None,
+                 hang_rate: float = 0.0, hang_seconds: float = 60.0, drop_rate: float = 0.0,
+                 seed: int = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency!r}, expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency
+        self.ttft = ttft
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [429, 500, 503]
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+
+    def sample_ttft(self) -> float:
+        if self.latency == 'fixed':
+            return self.ttft
+        if self.latency == 'uniform':
+            return self.random.uniform(0, 2 * self.ttft)
+        if self.latency == 'exponential':
+            return self.random.expovariate(1 / self.ttft) if self.ttft > 0 else 0.0
+        # lognormal with median ttft
+        return self.random.lognormvariate(math.log(max(self.ttft, 1e-6)), self.sigma)
+
+
+def make_reply(messages: List[Dict[str, Any]], n_tokens: int) -> List[str]:
+    """Deterministic reply built from the last user message, one word per token"""
+    prompt = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+    words = [w for w in prompt.split() if w.isalpha()] or ["Namaste"]
+    return [("" if i == 0 else " ") + words[i % len(words)] for i in range(n_tokens)]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings: MockSettings = MockSettings()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/openai/v1/models', '/v1/models'):
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+                         for model in MOCK_MODELS],
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if self.path.rstrip('/') not in ('/openai/v1/chat/completions', '/v1/chat/completions'):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            return
+
+        settings = self.settings
+        if settings.random.random() < settings.hang_rate:
+            time.sleep(settings.hang_seconds)
+        if settings.random.random() < settings.error_rate:
+            status = settings.random.choice(settings.error_statuses)
+            self._send_json(status, {"error": {"message": f"Injected error {status}", "type": "mock_error"}})
+            return
+
+        model = request.get('model', MOCK_MODELS[0])
+        n_tokens = max(1, min(int(request.get('max_tokens') or settings.response_tokens), settings.response_tokens))
+        tokens = make_reply(request.get('messages', []), n_tokens)
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in request.get('messages', []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                 "total_tokens": prompt_tokens + n_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(settings.sample_ttft())
+        if request.get('stream'):
+            self._stream(completion_id, created, model, tokens, usage)
+            return
+
+        time.sleep(n_tokens / settings.tokens_per_second)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "length" if n_tokens < settings.response_tokens else "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, created: int, model: str, tokens: List[str], usage: Dict[str, int]):
+        settings = self.settings
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta: Dict[str, Any], finish_reason=None, extra=None) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            chunk.update(extra or {})
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+        drop_at = len(tokens) // 2 if settings.random.random() < settings.drop_rate else None
+        interval = 1 / settings.tokens_per_second
+        try:
+            self._send_chunk(event({"role": "assistant", "content": ""}))
+            for i, token in enumerate(tokens):
+                if i == drop_at:
+                    # Simulate the upstream dying mid-answer
+                    self.close_connection = True
+                    return
+                self._send_chunk(event({"content": token}))
+                time.sleep(interval)
+            self._send_chunk(event({}, "stop", {"x_groq": {"id": completion_id, "usage": usage}}))
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def serve(host: str = '127.0.0.1', port: int = 8008, settings: MockSettings = None) -> ThreadingHTTPServer:
+    """Start the mock server; call serve_forever() on the result (or run it in a thread)"""
+    handler = type('ConfiguredMockLLMHandler', (MockLLMHandler,), {'settings': settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq-compatible chat-completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.getenv('MOCK_LLM_PORT', '8008')))
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal',
+                        help="distribution of time to first token")
+    parser.add_argument('--ttft', type=float, default=0.3, help="median/mean time to first token in seconds")
+    parser.add_argument('--sigma', type=float, default=0.5, help="lognormal shape")
+    parser.add_argument('--tokens-per-second', type=float, default=250.0)
+    parser.add_argument('--response-tokens', type=int, default=200, help="reply length cap in tokens")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-statuses', default='429,500,503', help="comma-separated HTTP statuses")
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="fraction of streams cut off halfway")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency, ttft=args.ttft, sigma=args.sigma,
+        tokens_per_second=args.tokens_per_second, response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_statuses=[int(status) for status in args.error_statuses.split(',') if status],
+        hang_rate=args.hang_rate, hang_seconds=args.hang_seconds, drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    server = serve(args.host, args.port, settings)
+    print(f"Mock LLM server on http://{args.host}:{args.port} (set GROQ_BASE_URL to this URL)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
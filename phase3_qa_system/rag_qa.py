@@ -3,132 +3,83 @@
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from phase2_database.vector_store import VectorDatabase
+from phase2_database.registry import (
+    get_vector_database, get_tour_catalog, get_catalog_store, get_fuzzy_matcher, get_answer_cache
+)
+from phase2_database.hybrid_search import HybridRetriever
+from phase2_database.metrics import span, metrics
+from phase3_qa_system.intent_router import IntentRouter, field_value, FIELD_LABELS
+from phase3_qa_system.keyword_index import KeywordIndex
+from phase3_qa_system.llm_client import get_client, get_llm_health, run_blocking
+from phase3_qa_system.llm_gateway import get_llm_gateway, is_transient
 import logging
 from typing import Dict, Any
-import json
 from dotenv import load_dotenv
 
 # Force load .env file at the very beginning
 load_dotenv()
-print(f"[DEBUG] - After load_dotenv(), GROQ_API_KEY exists: {bool(os.getenv('GROQ_API_KEY'))}")
-if os.getenv('GROQ_API_KEY'):
-    print(f"[DEBUG] - Key starts with: {os.getenv('GROQ_API_KEY')[:10]}...")
-    print(f"[DEBUG] - Key length: {len(os.getenv('GROQ_API_KEY'))} characters")
-
-try:
-    from groq import Groq
-except ImportError:
-    print("Installing groq...")
-    os.system("pip install groq")
-    from groq import Groq
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RAGQASystem:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         """Initialize RAG QA System"""
-        print(f"\n[DEBUG] - RAGQASystem.__init__ called")
-        print(f"[DEBUG] - Received api_key parameter: {api_key[:10] if api_key else 'None'}...")
-        
-        self.vector_db = VectorDatabase()
+        self.vector_db = get_vector_database()
         self.website_url = "https://www.namasteindiatrip.com"  # Add website URL
         
-        # Initialize Groq client
-        env_key = os.getenv("GROQ_API_KEY")
-        print(f"[DEBUG] - Environment GROQ_API_KEY: {env_key[:10] if env_key else 'None'}...")
+        # The Groq client is created on first use; availability is probed in the background
+        # base_url (or GROQ_BASE_URL) points at another Groq-compatible server, e.g. the local mock
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        self.health = get_llm_health(self.api_key, self.base_url) if self.api_key else None
+        if not self.api_key:
+            logger.warning("No Groq API key found. Will use template-based responses.")
         
-        self.api_key = api_key or env_key
-        print(f"[DEBUG] - Final api_key being used: {self.api_key[:10] if self.api_key else 'None'}...")
-        print(f"[DEBUG] - API key length: {len(self.api_key) if self.api_key else 0} characters")
+        # Shared read-only catalog, loaded once per process
+        self.catalog = get_tour_catalog()
+        self.tours = self.catalog.tours
+        logger.info(f"Loaded {len(self.tours)} tours for fallback")
         
-        if self.api_key:
-            try:
-                print(f"[DEBUG] - Attempting to create Groq client...")
-                self.client = Groq(api_key=self.api_key)
-                print(f"[DEBUG] - Groq client created successfully")
-                
-                print(f"[DEBUG] - Testing client with models.list()...")
-                models = self.client.models.list()
-                print(f"[DEBUG] - SUCCESS! Found {len(models.data)} models")
-                print(f"[DEBUG] - First 3 models available:")
-                for i, model in enumerate(models.data[:3]):
-                    print(f"           {i+1}. {model.id}")
-                
-                self.llm_available = True
-                logger.info("Groq client initialized successfully")
-                
-                # List of available models (for reference)
-                self.available_models = [
-                    "llama-3.3-70b-versatile",  # Latest Llama 3.3 70B (recommended)
-                    "llama-3.1-70b-versatile",  # Llama 3.1 70B
-                    "llama3-70b-8192",           # Llama 3 70B
-                    "gemma2-9b-it",               # Google Gemma 2 9B
-                    "mixtral-8x7b-32768"          # Decommissioned - do not use
-                ]
-                
-            except Exception as e:
-                print(f"[DEBUG] - [ERROR] Groq initialization FAILED!")
-                print(f"[DEBUG] - Error type: {type(e).__name__}")
-                print(f"[DEBUG] - Error message: {e}")
-                logger.warning(f"Groq initialization failed: {e}")
-                logger.warning("Falling back to template-based responses")
-                self.llm_available = False
-        else:
-            print(f"[DEBUG] - No API key found in either parameter or environment")
-            self.llm_available = False
-            logger.warning("No Groq API key found. Will use template-based responses.")
+        # Dense + BM25 retrieval over the same chunks
+        self.retriever = HybridRetriever(self.vector_db, self.tours)
+        
+        # Field lookups about a named tour are answered from the catalog
+        self.intent_router = IntentRouter(self.tours)
+        
+        # Keyword fallback: SQLite FTS5 catalog store, or the in-memory index without FTS5
+        self.catalog_store = get_catalog_store()
+        self.keyword_index = None if self.catalog_store else KeywordIndex(self.tours, self.catalog.keyword_postings)
+        # Misspelled and aliased place names are corrected before the keyword search
+        self.fuzzy_matcher = get_fuzzy_matcher()
         
-        # Load all tours for fallback
-        self.tours = self.load_all_tours()
-        print(f"[DEBUG] - Loaded {len(self.tours)} tours for fallback\n")
+        # Semantic cache of LLM answers, shared by worker processes
+        self.answer_cache = get_answer_cache()
+    
+    @property
+    def llm_available(self) -> bool:
+        """Live LLM status from the cached background health probe"""
+        return self.health is not None and self.health.available
+    
+    @property
+    def client(self):
+        return get_client(self.api_key, self.base_url)
+    
+    @property
+    def gateway(self):
+        """Shared LLM gateway: deadlines, retries, circuit breaking and model fallback"""
+        return get_llm_gateway(self.api_key, self.base_url)
     
     def load_all_tours(self):
-        """Load all tours from JSON"""
-        try:
-            # Use cleaned data instead of raw data
-            with open('phase1_scraping/tour_data_cleaned.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.warning("tour_data_cleaned.json not found. Trying raw data...")
-            try:
-                with open('phase1_scraping/tour_data.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        except Exception as e:
-            logger.error(f"Error loading tours: {e}")
-            return []
+        """All tours from the shared catalog"""
+        return get_tour_catalog().tours
     
     def search_tours_by_keyword(self, query: str) -> list:
-        """Simple keyword search as fallback"""
-        results = []
-        query_lower = query.lower()
-        
-        for tour in self.tours:
-            score = 0
-            # Check tour name
-            if query_lower in tour.get('name', '').lower():
-                score += 3
-            # Check destinations
-            for dest in tour.get('destinations', []):
-                if query_lower in dest.lower():
-                    score += 2
-            # Check theme
-            if query_lower in tour.get('theme', '').lower():
-                score += 2
-            # Check highlights
-            for highlight in tour.get('highlights', []):
-                if query_lower in highlight.lower():
-                    score += 1
-            
-            if score > 0:
-                results.append((tour, score))
-        
-        # Sort by score
-        results.sort(key=lambda x: x[1], reverse=True)
-        return [r[0] for r in results[:5]]
+        """Keyword search as fallback: top 5 tours by weighted field matches of the query's terms"""
+        query = self.fuzzy_matcher.correct(query)
+        if self.catalog_store is not None:
+            return self.catalog_store.search(query, limit=5, match_any=True)
+        return self.keyword_index.search(query, 5)
     
     def format_tour_for_response(self, tour: Dict) -> str:
         """Format tour data for response"""
@@ -147,22 +98,192 @@ def format_tour_for_response(self, tour: Dict) -> str:
     
     def answer_question(self, question: str) -> str:
         """Answer a question using RAG"""
+        return "".join(self.answer_question_stream(question))
+    
+    def answer_question_stream(self, question: str):
+        """Answer a question using RAG, yielding the response as it is generated
+        
+        LLM answers are streamed token by token from Groq; template and
+        context fallbacks are yielded as a single piece.
+        """
         logger.info(f"Question: {question}")
         
+        # Step 0: Field lookups ("price of Golden Triangle Tour") skip retrieval and the LLM
+        routed = self.route_question(question)
+        if routed is not None:
+            yield self.field_lookup_response(routed)
+            return
+        
+        # Serve paraphrases of recently answered questions from the cache, also during LLM outages
+        question_embedding = None
+        if self.answer_cache is not None:
+            question_embedding = self.vector_db.embedding_generator.embed_query(question)
+            scope = self.answer_cache_scope(question)
+            with span('answer_cache_lookup') as s:
+                cached = self.answer_cache.lookup(question_embedding, self.vector_db.get_index_version(), scope)
+                s['cache_hit'] = cached is not None
+            if cached is not None:
+                logger.info("Answer cache hit")
+                yield cached
+                return
+        
         # Step 1: Retrieve relevant context
-        context = self.vector_db.get_context_for_query(question, n_results=5)
+        with span('retrieval', mode='hybrid') as s:
+            context = self.retriever.get_context_for_query(question, n_results=5)
+            s['context_chars'] = len(context)
         
         # Step 2: If no context from vector DB, use keyword search
         if not context:
+            yield self.keyword_fallback_response(question)
+            return
+        
+        # Step 3: If LLM is available, generate intelligent response
+        if self.llm_available:
+            messages = self.build_messages_timed(question, context)
+            streamed_any = False
+            try:
+                stream = self.gateway.stream(
+                    messages,
+                    temperature=0.7,
+                    max_tokens=500
+                )
+                
+                pieces = []
+                for delta in stream:
+                    streamed_any = True
+                    pieces.append(delta)
+                    yield delta
+                
+                self.health.record_success()
+                if streamed_any:
+                    if question_embedding is not None:
+                        self.answer_cache.store(question, question_embedding, "".join(pieces),
+                                                self.vector_db.get_index_version(), scope)
+                    return
+            
+            except Exception as e:
+                logger.error(f"LLM error: {e}")
+                # Bad requests and open circuits say nothing about the API being down
+                if is_transient(e):
+                    self.health.record_failure(e)
+                if streamed_any:
+                    # The user already has a partial answer; point them to the website
+                    yield f"\n\n[TIP] For more options, visit our website: {self.website_url}"
+                    return
+            
+            # Fallback to context-based response with website link
+            yield self.context_fallback_response(context)
+        
+        # Step 4: If no LLM, return formatted context with website link
+        else:
+            yield self.template_response(context)
+    
+    async def aanswer_question(self, question: str) -> str:
+        """Async counterpart of answer_question for running many questions on one event loop
+        
+        Embedding, cache lookups and retrieval run in the shared executor; the
+        Groq call goes through the gateway's pooled async client under a
+        bounded semaphore.
+        """
+        logger.info(f"Question: {question}")
+        
+        routed = self.route_question(question)
+        if routed is not None:
+            return self.field_lookup_response(routed)
+        
+        question_embedding = None
+        if self.answer_cache is not None:
+            question_embedding = await run_blocking(self.vector_db.embedding_generator.embed_query, question)
+            scope = self.answer_cache_scope(question)
+            # The index version stats (and may read) the marker file: resolve it off the loop too
+            cached = await run_blocking(
+                lambda: self.answer_cache.lookup(question_embedding, self.vector_db.get_index_version(), scope)
+            )
+            if cached is not None:
+                logger.info("Answer cache hit")
+                return cached
+        
+        context = await run_blocking(self.retriever.get_context_for_query, question, 5)
+        if not context:
+            return await run_blocking(self.keyword_fallback_response, question)
+        
+        if not self.llm_available:
+            return self.template_response(context)
+        
+        try:
+            answer = await self.gateway.acomplete(
+                self.build_messages_timed(question, context),
+                temperature=0.7,
+                max_tokens=500
+            )
+            self.health.record_success()
+            if not answer:
+                return self.context_fallback_response(context)
+            if question_embedding is not None:
+                await run_blocking(
+                    lambda: self.answer_cache.store(question, question_embedding, answer,
+                                                    self.vector_db.get_index_version(), scope)
+                )
+            return answer
+        except Exception as e:
+            logger.error(f"LLM error: {e}")
+            if is_transient(e):
+                self.health.record_failure(e)
+            return self.context_fallback_response(context)
+    
+    def route_question(self, question: str):
+        """Intent router result for a field lookup, or None for open-ended questions"""
+        with span('intent_route') as s:
+            routed = self.intent_router.route(question)
+            s['route_hit'] = routed is not None
+        return routed
+    
+    def answer_cache_scope(self, question: str) -> str:
+        """Name of the tour the question is about ('' for none); cached answers never cross tours"""
+        match = self.intent_router.match_tour(question)
+        return match['tour'].get('name', '') if match else ''
+    
+    def field_lookup_response(self, routed: Dict[str, Any]) -> str:
+        """Direct answer to a field lookup, followed by the tour card"""
+        tour = routed['tour']
+        response = ""
+        for field in routed['fields']:
+            response += f"**{FIELD_LABELS[field]} for {tour.get('name', 'this tour')}:** {field_value(tour, field)}\n"
+        response += self.format_tour_for_response(tour)
+        response += f"\n[TIP] For more options, visit our website: {self.website_url}"
+        return response
+    
+    def context_fallback_response(self, context: str) -> str:
+        """Response used when the LLM call fails"""
+        return f"""**Here's what I found about your query:**
+
+{context}
+
+[TIP] For more options, visit our website: {self.website_url}
+
+Would you like me to help with something else?"""
+    
+    def template_response(self, context: str) -> str:
+        """Response used when no LLM is configured"""
+        return f"""**Here's what I found in our tours database:**
+
+{context}
+
+[TIP] For more options, visit our website: {self.website_url}"""
+    
+    def keyword_fallback_response(self, question: str) -> str:
+        """Response built from keyword search when retrieval found no context"""
+        with span('keyword_fallback') as s:
             relevant_tours = self.search_tours_by_keyword(question)
-            if relevant_tours:
-                response = "**Based on your query, here are relevant tours:**\n\n"
-                for tour in relevant_tours:
-                    response += self.format_tour_for_response(tour)
-                response += f"\n[TIP] For more options, visit our website: {self.website_url}"
-                return response
-            else:
-                return f"""I couldn't find specific tours matching your query in our database. 
+            s['matches'] = len(relevant_tours)
+        if relevant_tours:
+            response = "**Based on your query, here are relevant tours:**\n\n"
+            for tour in relevant_tours:
+                response += self.format_tour_for_response(tour)
+            response += f"\n[TIP] For more options, visit our website: {self.website_url}"
+            return response
+        else:
+            return f"""I couldn't find specific tours matching your query in our database. 
 
 [SUGGESTIONS]
 • Try different keywords (e.g., "Delhi" instead of "New Delhi")
@@ -172,12 +293,18 @@ def answer_question(self, question: str) -> str:
 [WEBSITE] Visit us at: {self.website_url}
 
 Would you like help with something else?"""
-        
-        # Step 3: If LLM is available, generate intelligent response
-        if self.llm_available:
-            try:
-                # IMPROVED PROMPT WITH BETTER FORMATTING INSTRUCTIONS
-                prompt = f"""You are a helpful travel assistant for Namaste India Trip, a premium tour operator in India.
+    
+    def build_messages_timed(self, question: str, context: str) -> list:
+        """build_messages inside a prompt_build span"""
+        with span('prompt_build', mode='qa') as s:
+            messages = self.build_messages(question, context)
+            s['chars'] = sum(len(message['content']) for message in messages)
+        return messages
+    
+    def build_messages(self, question: str, context: str) -> list:
+        """Chat messages for the RAG answer"""
+        # IMPROVED PROMPT WITH BETTER FORMATTING INSTRUCTIONS
+        prompt = f"""You are a helpful travel assistant for Namaste India Trip, a premium tour operator in India.
 
 Use the following real tour information to answer the user's question. Be friendly, informative, and concise.
 
@@ -219,43 +346,11 @@ def answer_question(self, question: str) -> str:
 If no tours match the query, suggest visiting the website: {self.website_url}
 
 YOUR ANSWER (follow the formatting example above):"""
-
-                print(f"[DEBUG] - Sending request to Groq API with model: llama-3.3-70b-versatile")
-                
-                completion = self.client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[
-                        {"role": "system", "content": "You are a knowledgeable travel assistant for Namaste India Trip. Always format your responses with clear sections, bold headings, and bullet points for readability. When no tours are found, politely suggest visiting the website. Do not use emojis."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500
-                )
-                
-                print(f"[DEBUG] - Groq API request successful")
-                return completion.choices[0].message.content
-            
-            except Exception as e:
-                print(f"[DEBUG] - [ERROR] Groq API call failed!")
-                print(f"[DEBUG] - Error type: {type(e).__name__}")
-                print(f"[DEBUG] - Error message: {e}")
-                logger.error(f"LLM error: {e}")
-                # Fallback to context-based response with website link
-                return f"""**Here's what I found about your query:**
-
-{context}
-
-[TIP] For more options, visit our website: {self.website_url}
-
-Would you like me to help with something else?"""
         
-        # Step 4: If no LLM, return formatted context with website link
-        else:
-            return f"""**Here's what I found in our tours database:**
-
-{context}
-
-[TIP] For more options, visit our website: {self.website_url}"""
+        return [
+            {"role": "system", "content": "You are a knowledgeable travel assistant for Namaste India Trip. Always format your responses with clear sections, bold headings, and bullet points for readability. When no tours are found, politely suggest visiting the website. Do not use emojis."},
+            {"role": "user", "content": prompt}
+        ]
     
     def interactive_mode(self):
         """Run interactive Q&A session"""
@@ -268,7 +363,7 @@ def interactive_mode(self):
         else:
             print("\n[INFO] Template Mode (no AI)")
             
-        print("\nAsk me anything about our tours! (type 'quit' to exit)")
+        print("\nAsk me anything about our tours! (type 'quit' to exit, 'metrics' for stage timings)")
         print("Examples:")
         print("  • What pilgrimage tours do you offer?")
         print("  • Tell me about Rajasthan tours")
@@ -286,18 +381,21 @@ def interactive_mode(self):
             if not question:
                 continue
             
+            if question.lower() == 'metrics':
+                print(metrics.to_json())
+                continue
+            
             print("\n[SEARCH] Searching our database...")
-            answer = self.answer_question(question)
-            print(f"\n[ANSWER]\n{answer}")
-            print("\n" + "-"*60)
+            print("\n[ANSWER]")
+            for piece in self.answer_question_stream(question):
+                print(piece, end="", flush=True)
+            print("\n\n" + "-"*60)
 
 def main():
     """Main function to run the Q&A system"""
-    print("\n[DEBUG] - Starting main() function")
     
     # Get API key from environment
     api_key = os.getenv("GROQ_API_KEY")
-    print(f"[DEBUG] - os.getenv('GROQ_API_KEY') in main: {api_key[:10] if api_key else 'None'}...")
     
     if not api_key:
         print("\n[INFO] To use the AI-powered assistant, get a free API key from https://console.groq.com")
@@ -307,13 +405,11 @@ def main():
         if use_ai == 'y':
             api_key = input("Enter your Groq API key: ").strip()
             if api_key:
-                print(f"[DEBUG] - Manual API key entered: {api_key[:10]}...")
                 print("[OK] API key set successfully!")
             else:
                 print("[WARNING] No API key entered. Using template mode.")
     
     # Initialize system
-    print(f"[DEBUG] - Creating RAGQASystem with api_key: {api_key[:10] if api_key else 'None'}...")
     qa_system = RAGQASystem(api_key=api_key)
     
     # Start interactive mode
@@ -2,26 +2,20 @@
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from phase2_database.vector_store import VectorDatabase
+from phase2_database.registry import get_vector_database, get_tour_catalog, get_fuzzy_matcher
 from phase4_itinerary.prompts import get_itinerary_prompt, ITINERARY_SYSTEM_PROMPT
+from phase4_itinerary.template_matcher import TemplateMatcher
+from phase2_database.metrics import span, metrics
+from phase3_qa_system.llm_client import get_client, get_llm_health, run_blocking
+from phase3_qa_system.llm_gateway import get_llm_gateway, is_transient
 import logging
 from typing import Dict, Any
-import json
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Force load .env file at the very beginning
 load_dotenv()
-print(f"[DEBUG] [itinerary] - After load_dotenv(), GROQ_API_KEY exists: {bool(os.getenv('GROQ_API_KEY'))}")
-if os.getenv('GROQ_API_KEY'):
-    print(f"[DEBUG] [itinerary] - Key starts with: {os.getenv('GROQ_API_KEY')[:10]}...")
-    print(f"[DEBUG] [itinerary] - Key length: {len(os.getenv('GROQ_API_KEY'))} characters")
-
-try:
-    from groq import Groq
-except ImportError:
-    os.system("pip install groq")
-    from groq import Groq
 
 # Try to import FPDF for PDF generation
 try:
@@ -34,72 +28,67 @@
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Itineraries draw on more tours than QA answers, so they get a larger context budget
+ITINERARY_CONTEXT_TOKEN_BUDGET = int(os.getenv('ITINERARY_CONTEXT_TOKEN_BUDGET', '1500'))
+
 class ItinerarySuggester:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         """Initialize Itinerary Suggester"""
-        print(f"\n[DEBUG] [itinerary] - ItinerarySuggester.__init__ called")
-        print(f"[DEBUG] [itinerary] - Received api_key parameter: {api_key[:10] if api_key else 'None'}...")
-        
-        self.vector_db = VectorDatabase()
-        
-        # Initialize Groq
-        env_key = os.getenv("GROQ_API_KEY")
-        print(f"[DEBUG] [itinerary] - Environment GROQ_API_KEY: {env_key[:10] if env_key else 'None'}...")
+        self.vector_db = get_vector_database()
         
-        self.api_key = api_key or env_key
-        print(f"[DEBUG] [itinerary] - Final api_key being used: {self.api_key[:10] if self.api_key else 'None'}...")
-        print(f"[DEBUG] [itinerary] - API key length: {len(self.api_key) if self.api_key else 0} characters")
-        
-        if self.api_key:
-            try:
-                print(f"[DEBUG] [itinerary] - Attempting to create Groq client...")
-                self.client = Groq(api_key=self.api_key)
-                print(f"[DEBUG] [itinerary] - Groq client created successfully")
-                
-                print(f"[DEBUG] [itinerary] - Testing client with models.list()...")
-                models = self.client.models.list()
-                print(f"[DEBUG] [itinerary] - SUCCESS! Found {len(models.data)} models")
-                
-                self.llm_available = True
-                logger.info("Groq client initialized successfully")
-            except Exception as e:
-                print(f"[DEBUG] [itinerary] - [ERROR] Groq initialization FAILED!")
-                print(f"[DEBUG] [itinerary] - Error type: {type(e).__name__}")
-                print(f"[DEBUG] [itinerary] - Error message: {e}")
-                logger.warning(f"Groq initialization failed: {e}")
-                self.llm_available = False
-        else:
-            print(f"[DEBUG] [itinerary] - No API key found in either parameter or environment")
-            self.llm_available = False
+        # The Groq client is created on first use; availability is probed in the background
+        # base_url (or GROQ_BASE_URL) points at another Groq-compatible server, e.g. the local mock
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        self.health = get_llm_health(self.api_key, self.base_url) if self.api_key else None
+        if not self.api_key:
             logger.warning("No API key found. Will use template-based suggestions.")
         
         # Load all tours
         self.load_tours()
     
+    @property
+    def llm_available(self) -> bool:
+        """Live LLM status from the cached background health probe"""
+        return self.health is not None and self.health.available
+    
+    @property
+    def client(self):
+        return get_client(self.api_key, self.base_url)
+    
+    @property
+    def gateway(self):
+        """Shared LLM gateway: deadlines, retries, circuit breaking and model fallback"""
+        return get_llm_gateway(self.api_key, self.base_url)
+    
     def load_tours(self):
-        """Load tours from JSON"""
-        try:
-            # First try to load cleaned data
-            with open('phase1_scraping/tour_data_cleaned.json', 'r', encoding='utf-8') as f:
-                self.tours = json.load(f)
-            logger.info(f"Loaded {len(self.tours)} tours from cleaned data")
-        except FileNotFoundError:
-            logger.warning("Cleaned data not found, trying raw data...")
-            try:
-                with open('phase1_scraping/tour_data.json', 'r', encoding='utf-8') as f:
-                    self.tours = json.load(f)
-                logger.info(f"Loaded {len(self.tours)} tours from raw data")
-            except:
-                self.tours = []
-                logger.warning("No tour data found")
-        except Exception as e:
-            logger.error(f"Error loading tours: {e}")
-            self.tours = []
+        """Tours from the shared catalog"""
+        self.catalog = get_tour_catalog()
+        self.tours = self.catalog.tours
+        
+        # Normalized destinations known to the index, used for region filters
+        self.destination_vocab = self.catalog.by_destination.keys()
+        # Typo and alias tolerant spelling of places ("Benaras", "Rajastan")
+        self.fuzzy_matcher = get_fuzzy_matcher()
+        # Indexed, ranked tour matching for template itineraries
+        self.template_matcher = TemplateMatcher(self.catalog, self.fuzzy_matcher)
+    
+    def get_location_filters(self, location: str) -> Dict[str, Any]:
+        """Search filters restricting retrieval to the requested places, if they are indexed"""
+        parts = [p for p in location.replace(' and ', ',').replace('&', ',').split(',')]
+        places = [place for place in (self.fuzzy_matcher.correct(p) for p in parts) if place in self.destination_vocab]
+        return {'destinations': places} if places else {}
     
     def get_relevant_context(self, location: str, interests: str) -> str:
         """Get relevant tour context for the location and interests"""
         query = f"{location} {interests} tour package itinerary"
-        context = self.vector_db.get_context_for_query(query, n_results=8)
+        filters = self.get_location_filters(location)
+        context = self.vector_db.get_context_for_query(query, n_results=8, filters=filters or None,
+                                                       token_budget=ITINERARY_CONTEXT_TOKEN_BUDGET)
+        if not context and filters:
+            # Nothing indexed for that region with enough detail, widen the search
+            context = self.vector_db.get_context_for_query(query, n_results=8,
+                                                           token_budget=ITINERARY_CONTEXT_TOKEN_BUDGET)
         return context if context else "No specific tour data found for this query."
     
     def collect_user_preferences(self) -> Dict[str, Any]:
@@ -147,20 +136,10 @@ def generate_template_itinerary(self, preferences: Dict) -> str:
         budget = preferences.get('budget', 'moderate')
         style = preferences.get('style', 'relaxed')
         
-        # Find matching tours
-        matching_tours = []
-        for tour in self.tours:
-            tour_text = json.dumps(tour).lower()
-            tour_destinations = [d.lower() for d in tour.get('destinations', [])]
-            
-            # Check if location matches any destination
-            location_match = any(location.lower() in dest for dest in tour_destinations) or location.lower() in tour_text
-            
-            # Check if interests match
-            interest_match = any(interest.lower() in tour_text for interest in interests.split(','))
-            
-            if location_match or interest_match:
-                matching_tours.append(tour)
+        # Best matching tours by destination, keyword and theme scores
+        with span('template_match') as s:
+            matching_tours = self.template_matcher.match(location, interests, k=5)
+            s['matches'] = len(matching_tours)
         
         if matching_tours:
             response = f"[ITINERARY] **Suggested Itinerary Template for {location}**\n\n"
@@ -172,7 +151,7 @@ def generate_template_itinerary(self, preferences: Dict) -> str:
             
             response += f"Here are some tours we recommend:\n\n"
             
-            for i, tour in enumerate(matching_tours[:5], 1):
+            for i, tour in enumerate(matching_tours, 1):
                 response += f"{i}. **{tour.get('name', 'Unknown Tour')}**\n"
                 response += f"   Duration: {tour.get('duration', 'Not specified')}\n"
                 response += f"   Theme: {tour.get('theme', 'General')}\n"
@@ -199,6 +178,7 @@ def save_itinerary_as_pdf(self, preferences: Dict, itinerary: str) -> str:
             return None
 
         try:
+            pdf_started = time.perf_counter()
             # Create PDF object with Unicode support
             pdf = FPDF()
             pdf.add_page()
@@ -272,6 +252,8 @@ def save_itinerary_as_pdf(self, preferences: Dict, itinerary: str) -> str:
 
             # Save PDF
             pdf.output(filename)
+            metrics.record_span('pdf_render', time.perf_counter() - pdf_started,
+                                {'bytes': os.path.getsize(filename), 'lines': len(lines)}, None)
             logger.info(f"Itinerary saved as PDF to {filename}")
             return filename
 
@@ -294,14 +276,13 @@ def generate_itinerary(self, preferences: Dict) -> str:
         
         try:
             # Generate prompt
-            prompt = get_itinerary_prompt(preferences, context)
-            
-            print(f"[DEBUG] [itinerary] - Sending request to Groq API with model: llama-3.3-70b-versatile")
+            with span('prompt_build', mode='itinerary') as s:
+                prompt = get_itinerary_prompt(preferences, context)
+                s['chars'] = len(prompt)
             
             # Call LLM with updated model
-            completion = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
+            itinerary = self.gateway.complete(
+                [
                     {"role": "system", "content": ITINERARY_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
@@ -309,8 +290,7 @@ def generate_itinerary(self, preferences: Dict) -> str:
                 max_tokens=2000
             )
             
-            print(f"[DEBUG] [itinerary] - Groq API request successful")
-            itinerary = completion.choices[0].message.content
+            self.health.record_success()
             
             # OPTIONAL: You can keep server-side saving if needed, or comment it out
             # self.save_itinerary(preferences, itinerary)
@@ -320,12 +300,47 @@ def generate_itinerary(self, preferences: Dict) -> str:
             return itinerary
             
         except Exception as e:
-            print(f"[DEBUG] [itinerary] - [ERROR] Groq API call failed!")
-            print(f"[DEBUG] [itinerary] - Error type: {type(e).__name__}")
-            print(f"[DEBUG] [itinerary] - Error message: {e}")
             logger.error(f"Error generating itinerary: {e}")
+            # Only outages mark the LLM unavailable, not 4xx errors or an open circuit
+            if is_transient(e):
+                self.health.record_failure(e)
             return self.generate_template_itinerary(preferences)
     
+    async def agenerate_itinerary(self, preferences: Dict) -> str:
+        """Async counterpart of generate_itinerary, through the gateway's pooled async client"""
+        logger.info(f"Generating itinerary for: {preferences}")
+        
+        context = await run_blocking(
+            self.get_relevant_context,
+            preferences.get('location', ''),
+            preferences.get('interests', '')
+        )
+        
+        if not self.llm_available:
+            return await run_blocking(self.generate_template_itinerary, preferences)
+        
+        try:
+            with span('prompt_build', mode='itinerary') as s:
+                prompt = get_itinerary_prompt(preferences, context)
+                s['chars'] = len(prompt)
+            itinerary = await self.gateway.acomplete(
+                [
+                    {"role": "system", "content": ITINERARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.8,
+                max_tokens=2000
+            )
+            self.health.record_success()
+            logger.info("Itinerary generated successfully")
+            return itinerary
+            
+        except Exception as e:
+            logger.error(f"Error generating itinerary: {e}")
+            if is_transient(e):
+                self.health.record_failure(e)
+            return await run_blocking(self.generate_template_itinerary, preferences)
+    
     def save_itinerary(self, preferences: Dict, itinerary: str) -> str:
         """Save generated itinerary to text file"""
         try:
@@ -415,11 +430,9 @@ def run(self):
 
 def main():
     """Main function to run the itinerary suggester"""
-    print("\n[DEBUG] [itinerary] - Starting main() function")
     
     # Get API key from environment or prompt user
     api_key = os.getenv("GROQ_API_KEY")
-    print(f"[DEBUG] [itinerary] - os.getenv('GROQ_API_KEY') in main: {api_key[:10] if api_key else 'None'}...")
     
     if not api_key:
         print("\n[INFO] To use the AI-powered itinerary generator, get a free API key from:")
@@ -430,13 +443,11 @@ def main():
         if use_ai == 'y':
             api_key = input("Enter your Groq API key: ").strip()
             if api_key:
-                print(f"[DEBUG] [itinerary] - Manual API key entered: {api_key[:10]}...")
                 print("[OK] API key set successfully!")
             else:
                 print("[WARNING] No API key entered. Using template mode.")
     
     # Initialize and run
-    print(f"[DEBUG] [itinerary] - Creating ItinerarySuggester with api_key: {api_key[:10] if api_key else 'None'}...")
     suggester = ItinerarySuggester(api_key=api_key)
     suggester.run()
 
@@ -0,0 +1,92 @@
+import re
+import heapq
+from typing import List, Dict, Any
+
+from phase2_database.text_utils import tokenize
+from phase2_database.postings import build_postings, index_term
+
+# Within the tours matching the location, a place hit counts twice as much as an interest
+LOCATION_WEIGHT = 2.0
+# Bonus for a tour visiting a requested destination, on top of its keyword hits
+DESTINATION_MATCH = 5.0
+# Bonus for a tour whose theme is one of the interests ("pilgrimage", "adventure")
+THEME_MATCH = 3.0
+
+_PLACE_SPLIT_RE = re.compile(r'\s*(?:,|&|/|\band\b)\s*', re.IGNORECASE)
+
+
+class TemplateMatcher:
+    """Ranks catalog tours for a template itinerary
+
+    Places are resolved (typos and aliases included) to the catalog's
+    destination index; whatever is not a known destination, e.g. a state
+    like "Rajasthan", and every interest are looked up in the keyword
+    postings (name 3, destination 2, theme 2, highlight 1). Interests that
+    name a theme add THEME_MATCH. When any tour matches the location only
+    those tours are candidates, so interests never pull in tours elsewhere;
+    otherwise the interests alone pick them. Candidates are scored:
+
+        score = LOCATION_WEIGHT * location score + interest score
+
+    The top k come from a heap ordered by score, then completeness, then
+    catalog order.
+    """
+
+    def __init__(self, catalog, fuzzy_matcher=None):
+        self.tours = catalog.tours
+        self.fuzzy_matcher = fuzzy_matcher
+        postings = catalog.keyword_postings if catalog.keyword_postings is not None else build_postings(self.tours)
+        # Plain lists: a template request touches few terms, numpy overhead would dominate
+        self.postings = {term: list(zip(rows.tolist(), scores.tolist())) for term, (rows, scores) in postings.items()}
+
+        self.rows_by_destination: Dict[str, List[int]] = {}
+        self.rows_by_theme_term: Dict[str, List[int]] = {}
+        for row, tour in enumerate(self.tours):
+            for destination in tour.destination_set:
+                self.rows_by_destination.setdefault(destination, []).append(row)
+            for term in {index_term(t) for t in tokenize(tour.theme or '')}:
+                self.rows_by_theme_term.setdefault(term, []).append(row)
+        self.completeness = [(tour.metadata or {}).get('completeness_score', 0) for tour in self.tours]
+
+    def _correct(self, text: str) -> str:
+        return self.fuzzy_matcher.correct(text) if self.fuzzy_matcher is not None else text
+
+    def _add_keywords(self, scores: Dict[int, float], text: str):
+        for term in {index_term(t) for t in tokenize(text)}:
+            for row, score in self.postings.get(term, ()):
+                scores[row] = scores.get(row, 0.0) + score
+
+    def location_scores(self, location: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for place in _PLACE_SPLIT_RE.split(location or ''):
+            place = self._correct(place)
+            if not place:
+                continue
+            rows = self.rows_by_destination.get(place)
+            if rows:
+                for row in rows:
+                    scores[row] = scores.get(row, 0.0) + DESTINATION_MATCH
+            self._add_keywords(scores, place)
+        return scores
+
+    def interest_scores(self, interests: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for interest in (interests or '').split(','):
+            interest = self._correct(interest)
+            if not interest:
+                continue
+            for term in {index_term(t) for t in tokenize(interest)}:
+                for row in self.rows_by_theme_term.get(term, ()):
+                    scores[row] = scores.get(row, 0.0) + THEME_MATCH
+            self._add_keywords(scores, interest)
+        return scores
+
+    def match(self, location: str, interests: str, k: int = 5) -> List[Any]:
+        """Up to k tours, best first"""
+        scores = {row: LOCATION_WEIGHT * score for row, score in self.location_scores(location).items()}
+        located = bool(scores)
+        for row, score in self.interest_scores(interests).items():
+            if row in scores or not located:
+                scores[row] = scores.get(row, 0.0) + score
+        top = heapq.nlargest(k, scores, key=lambda row: (scores[row], self.completeness[row], -row))
+        return [self.tours[row] for row in top]
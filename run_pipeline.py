@@ -250,12 +250,13 @@ def main():
     print(f"[STATS] Cleaned tours count: {cleaned_count}")
     print(f"[STATS] Duplicates removed: {raw_count - cleaned_count}")
     
-    # Step 6: Rebuild database
+    # Step 6: Refresh database
     current_step += 1
-    print_step(current_step, total_steps, "Rebuilding Vector Database")
+    print_step(current_step, total_steps, "Refreshing Vector Database")
     
-    # Delete old database if it exists
-    if os.path.exists('chroma_db'):
+    # Indexing is incremental (content-addressed chunk IDs), so the existing
+    # database is kept unless a full rebuild is requested with --rebuild
+    if '--rebuild' in sys.argv and os.path.exists('chroma_db'):
         print("   Removing old database...")
         try:
             if os.name == 'nt':  # Windows
@@ -274,11 +275,11 @@ def main():
     
     db_success = run_command(
         f"python {db_script}",
-        "Building new vector database"
+        "Updating vector database"
     )
     
     if not db_success:
-        print("[ERROR] Database rebuild failed. Exiting pipeline.")
+        print("[ERROR] Database refresh failed. Exiting pipeline.")
         return
     
     # Final Summary
@@ -0,0 +1,244 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from phase2_database import registry
+from phase2_database.catalog import TourCatalog
+from phase2_database.fuzzy_match import FuzzyMatcher
+from phase2_database.vector_store import VectorDatabase
+from phase3_qa_system import rag_qa
+from phase4_itinerary import itinerary_suggester
+
+MODEL = registry.DEFAULT_MODEL_NAME
+REGISTRY_CACHES = ('_models', '_loaded_backends', '_clients', '_databases', '_query_caches', '_catalogs',
+                   '_stores', '_fuzzy_matchers', '_answer_caches')
+
+QA_TOURS = [
+    {'name': 'Kerala Backwaters', 'theme': 'Nature', 'destinations': ['Alleppey', 'Kochi'],
+     'highlights': ['Houseboat stay'], 'price': 'INR 25,000', 'duration': '5 Days'},
+    {'name': 'Royal Rajasthan', 'theme': 'Heritage', 'destinations': ['Jaipur', 'Udaipur'],
+     'highlights': ['Amber Fort'], 'price': 'INR 30,000', 'duration': '7 Days'},
+]
+CONTEXT = "Kerala Backwaters: houseboat stay in Alleppey"
+
+
+class FakeModel:
+    """Deterministic stand-in for sentence-transformers, recording the size of every batch
+
+    encode_text maps one text to its vector; tests swap it for the geometry they need.
+    """
+
+    def __init__(self):
+        self.encode_text = lambda t: [len(t), t.count('a'), t.count('e'), 1.0]
+        self.batches = []
+
+    @property
+    def encoded(self) -> int:
+        return sum(self.batches)
+
+    def encode(self, texts, show_progress_bar=False):
+        self.batches.append(len(texts))
+        return np.array([self.encode_text(t) for t in texts], dtype=np.float32)
+
+
+class FakeCollection:
+    """In-memory Chroma collection: metadata merges on update and None deletes a key
+
+    Records the page size of every full-collection get(), the ids of every
+    upsert and the number of query embeddings in every query().
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.pages = []
+        self.upserts = []
+        self.queries = []
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        if ids is None:
+            self.pages.append(limit)
+            ids = list(self.rows)[offset:None if limit is None else offset + limit]
+        else:
+            ids = [i for i in ids if i in self.rows]
+        return {
+            'ids': ids,
+            'metadatas': [dict(self.rows[i]['metadata']) for i in ids],
+            'documents': [self.rows[i]['document'] for i in ids],
+            'embeddings': [self.rows[i]['embedding'] for i in ids],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append(list(ids))
+        for i, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.rows[i] = {'embedding': embedding, 'document': document, 'metadata': dict(metadata)}
+
+    def update(self, ids, metadatas):
+        for i, metadata in zip(ids, metadatas):
+            stored = self.rows[i]['metadata']
+            for key, value in metadata.items():
+                if value is None:
+                    stored.pop(key, None)
+                else:
+                    stored[key] = value
+
+    def delete(self, ids):
+        for i in ids:
+            self.rows.pop(i, None)
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        self.queries.append(len(query_embeddings))
+        ids = list(self.rows)
+        matrix = np.array([self.rows[i]['embedding'] for i in ids], dtype=np.float32)
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        for query in np.asarray(query_embeddings, dtype=np.float32):
+            distances = ((matrix - query) ** 2).sum(axis=1)
+            top = np.argsort(distances, kind='stable')[:n_results]
+            results['ids'].append([ids[i] for i in top])
+            results['documents'].append([self.rows[ids[i]]['document'] for i in top])
+            results['metadatas'].append([self.rows[ids[i]]['metadata'] for i in top])
+            results['distances'].append([float(distances[i]) for i in top])
+        return results
+
+
+class FakeVectorDB:
+    """VectorDatabase for the QA tests; records the threads that resolve the index version"""
+
+    def __init__(self):
+        self.embedding_generator = self
+        self.version_threads = []
+
+    def embed_query(self, question):
+        vector = np.zeros(8, dtype=np.float32)
+        vector[hash(question) % 8] = 1.0
+        return vector
+
+    def get_index_version(self):
+        self.version_threads.append(threading.current_thread())
+        return 'v1'
+
+    def get_context_for_query(self, query, n_results=5, filters=None, token_budget=None):
+        return CONTEXT
+
+
+class FakeRetriever:
+    def __init__(self, vector_db, tours):
+        self.context = CONTEXT
+
+    def get_context_for_query(self, question, n_results=5):
+        return self.context
+
+
+class FakeHealth:
+    def __init__(self, available=True):
+        self.available = available
+        self.outcomes = []
+
+    def record_success(self):
+        self.outcomes.append('success')
+
+    def record_failure(self, error):
+        self.outcomes.append('failure')
+
+
+class FakeGateway:
+    """LLM gateway that streams deltas and answers acomplete() after delay seconds
+
+    With error set, stream() raises it after fail_after deltas and acomplete()
+    after the delay. acomplete() tracks how many calls overlap.
+    """
+
+    def __init__(self, deltas=("Namaste", " from", " Kerala"), error=None, fail_after=0, delay=0.2):
+        self.deltas = deltas
+        self.error = error
+        self.fail_after = fail_after
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def stream(self, messages, temperature, max_tokens):
+        self.calls += 1
+        for i, delta in enumerate(self.deltas):
+            if self.error is not None and i == self.fail_after:
+                raise self.error
+            yield delta
+
+    async def acomplete(self, messages, temperature, max_tokens):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return f"Answer to: {messages[-1]['content'][-40:]}"
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def empty_registry(monkeypatch):
+    """Fresh registry caches and no backend overrides from the environment"""
+    monkeypatch.delenv('EMBEDDING_BACKEND', raising=False)
+    monkeypatch.delenv('QUERY_CACHE_DIR', raising=False)
+    monkeypatch.delenv('VECTOR_SEARCH_BACKEND', raising=False)
+    for name in REGISTRY_CACHES:
+        monkeypatch.setattr(registry, name, {})
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """FakeModel registered as the torch encoder for MODEL, with an in-memory query cache"""
+    fake = FakeModel()
+    monkeypatch.delenv('EMBEDDING_BACKEND', raising=False)
+    monkeypatch.delenv('QUERY_CACHE_DIR', raising=False)
+    monkeypatch.setitem(registry._models, (MODEL, 'torch'), fake)
+    monkeypatch.setitem(registry._loaded_backends, (MODEL, 'torch'), 'torch')
+    monkeypatch.setattr(registry, '_query_caches', {})
+    return fake
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    """FakeCollection behind every VectorDatabase, with no Chroma batch-size limit"""
+    fake = FakeCollection()
+    monkeypatch.setattr(VectorDatabase, 'get_or_create_collection', lambda self: fake)
+    monkeypatch.setattr(VectorDatabase, 'get_max_batch_size', lambda self, requested: requested)
+    return fake
+
+
+@pytest.fixture
+def make_db(model, collection, tmp_path):
+    """Factory for VectorDatabases over the fake model and collection in tmp_path"""
+    def make(search_backend='chroma'):
+        return VectorDatabase(persist_directory=str(tmp_path), model_name=MODEL, search_backend=search_backend)
+    return make
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db()
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Point the QA system and the itinerary planner at fakes over QA_TOURS
+
+    Returns the shared FakeHealth and FakeGateway; replace or reconfigure
+    them before building the system under test.
+    """
+    catalog = TourCatalog(QA_TOURS)
+    services = SimpleNamespace(health=FakeHealth(), gateway=FakeGateway())
+    for module in (rag_qa, itinerary_suggester):
+        monkeypatch.setattr(module, 'get_vector_database', FakeVectorDB)
+        monkeypatch.setattr(module, 'get_tour_catalog', lambda: catalog)
+        monkeypatch.setattr(module, 'get_fuzzy_matcher', lambda: FuzzyMatcher.from_catalog(catalog))
+        monkeypatch.setattr(module, 'get_llm_health', lambda api_key, base_url: services.health)
+        monkeypatch.setattr(module, 'get_llm_gateway', lambda api_key, base_url: services.gateway)
+    monkeypatch.setattr(rag_qa, 'get_catalog_store', lambda: None)
+    monkeypatch.setattr(rag_qa, 'get_answer_cache', lambda: None)
+    monkeypatch.setattr(rag_qa, 'HybridRetriever', FakeRetriever)
+    return services
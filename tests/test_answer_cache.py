@@ -0,0 +1,90 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from phase2_database import registry
+from phase3_qa_system.answer_cache import SemanticAnswerCache
+
+KERALA = np.array([1.0, 0.2, 0.0], dtype=np.float32)
+KERALA_REPHRASED = np.array([1.0, 0.25, 0.0], dtype=np.float32)
+GOA = np.array([0.0, 0.2, 1.0], dtype=np.float32)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache' / 'answers.sqlite')
+
+
+def test_similar_questions_hit_for_the_same_index_version(path):
+    cache = SemanticAnswerCache(path, threshold=0.95)
+    cache.store("best kerala tours", KERALA, "Kerala Backwaters", 'v1')
+    assert cache.lookup(KERALA_REPHRASED * 3, 'v1') == "Kerala Backwaters"
+    assert cache.lookup(GOA, 'v1') is None
+    # Re-indexing changes the version and invalidates every answer
+    assert cache.lookup(KERALA, 'v2') is None
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 2, 'hit_rate': 0.333}
+
+
+def test_expired_answers_miss(path):
+    cache = SemanticAnswerCache(path, ttl_seconds=-1)
+    cache.store("best kerala tours", KERALA, "Kerala Backwaters", 'v1')
+    assert cache.lookup(KERALA, 'v1') is None
+
+
+def test_least_recently_used_answers_are_evicted(path):
+    cache = SemanticAnswerCache(path, max_entries=1)
+    cache.store("best kerala tours", KERALA, "Kerala Backwaters", 'v1')
+    cache.store("best goa tours", GOA, "Goa Beaches", 'v1')
+    assert cache.stats()['entries'] == 1
+    assert cache.lookup(KERALA, 'v1') is None
+    assert cache.lookup(GOA, 'v1') == "Goa Beaches"
+
+
+def test_workers_share_one_cache(path):
+    reader = SemanticAnswerCache(path)
+    assert reader.lookup(KERALA, 'v1') is None
+    SemanticAnswerCache(path).store("best kerala tours", KERALA, "Kerala Backwaters", 'v1')
+    # The reader's in-memory vectors are reloaded once another connection writes
+    assert reader.lookup(KERALA, 'v1') == "Kerala Backwaters"
+
+
+def test_answers_are_scoped_to_the_tour_asked_about(path):
+    cache = SemanticAnswerCache(path)
+    cache.store("price of golden triangle for 4 people", KERALA, "Golden Triangle answer", 'v1',
+                scope="Golden Triangle")
+    assert cache.lookup(KERALA, 'v1', scope="Buddhist Golden Triangle") is None
+    assert cache.lookup(KERALA, 'v1') is None
+    assert cache.lookup(KERALA_REPHRASED, 'v1', scope="Golden Triangle") == "Golden Triangle answer"
+
+
+def test_unscoped_answers_from_an_older_cache_are_dropped(path, tmp_path):
+    (tmp_path / 'cache').mkdir()
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE answers (id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT NOT NULL, "
+                 "embedding BLOB NOT NULL, answer TEXT NOT NULL, index_version TEXT NOT NULL, "
+                 "created_at REAL NOT NULL, last_access REAL NOT NULL)")
+    conn.execute("INSERT INTO answers VALUES (1, 'q', ?, 'old answer', 'v1', 1e12, 1e12)", (KERALA.tobytes(),))
+    conn.commit()
+    conn.close()
+
+    cache = SemanticAnswerCache(path)
+    assert cache.stats()['entries'] == 0
+    cache.store("best kerala tours", KERALA, "Kerala Backwaters", 'v1')
+    assert cache.lookup(KERALA, 'v1') == "Kerala Backwaters"
+
+
+def test_registry_shares_one_cache_per_path(path, tmp_path, monkeypatch, empty_registry):
+    monkeypatch.setenv('ANSWER_CACHE_PATH', '')
+    assert registry.get_answer_cache() is None
+    monkeypatch.setenv('ANSWER_CACHE_PATH', path)
+    monkeypatch.setenv('ANSWER_CACHE_THRESHOLD', '0.8')
+    cache = registry.get_answer_cache()
+    assert (cache.path, cache.threshold) == (path, 0.8)
+    assert registry.get_answer_cache() is cache
+    assert registry.get_answer_cache(str(tmp_path / 'other.sqlite')) is not cache
+
+    registry.reset_registry()
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.stats()
+    assert registry.get_answer_cache() is not cache
@@ -0,0 +1,37 @@
+from phase3_qa_system import rag_qa
+
+
+def test_llm_answers_are_yielded_token_by_token(services):
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    stream = qa.answer_question_stream("Which Kerala houseboat trips do you have?")
+    # The chat tab renders the first piece as soon as it arrives
+    assert next(stream) == "Namaste"
+    assert list(stream) == [" from", " Kerala"]
+    assert qa.health.outcomes == ['success']
+    assert qa.answer_question("Which Kerala houseboat trips do you have?") == "Namaste from Kerala"
+
+
+def test_failure_before_the_first_token_falls_back_to_the_context(services):
+    services.gateway.error = ConnectionError("down")
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    pieces = list(qa.answer_question_stream("Which Kerala houseboat trips do you have?"))
+    assert pieces == [qa.context_fallback_response(qa.retriever.context)]
+    assert qa.health.outcomes == ['failure']
+
+
+def test_failure_mid_stream_keeps_the_partial_answer(services):
+    services.gateway.error = ConnectionError("reset")
+    services.gateway.fail_after = 2
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    pieces = list(qa.answer_question_stream("Which Kerala houseboat trips do you have?"))
+    assert pieces[:2] == ["Namaste", " from"]
+    assert len(pieces) == 3 and qa.website_url in pieces[2]
+    assert qa.retriever.context not in "".join(pieces)
+
+
+def test_without_the_llm_the_template_is_one_piece(services):
+    services.health.available = False
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    assert list(qa.answer_question_stream("Which Kerala houseboat trips do you have?")) == [
+        qa.template_response(qa.retriever.context)]
+    assert services.gateway.calls == 0
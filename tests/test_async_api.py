@@ -0,0 +1,107 @@
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from phase3_qa_system import rag_qa, llm_client
+from phase3_qa_system.answer_cache import SemanticAnswerCache
+from phase3_qa_system.llm_gateway import LLMGateway
+from phase4_itinerary import itinerary_suggester
+
+QUESTIONS = [f"Which tours are good for {place} trips?" for place in ('Kochi', 'Jaipur', 'Goa', 'Agra', 'Delhi')]
+
+
+def test_questions_are_answered_concurrently(services):
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+
+    async def ask_all():
+        return await asyncio.gather(*(qa.aanswer_question(q) for q in QUESTIONS))
+
+    start = time.monotonic()
+    answers = asyncio.run(ask_all())
+    assert time.monotonic() - start < 0.2 * len(QUESTIONS) / 2
+    assert services.gateway.max_in_flight == len(QUESTIONS)
+    assert all(answer.startswith("Answer to:") for answer in answers)
+    assert services.health.outcomes == ['success'] * len(QUESTIONS)
+
+
+def test_answer_cache_and_index_version_stay_off_the_event_loop(services, tmp_path, monkeypatch):
+    cache = SemanticAnswerCache(str(tmp_path / 'answers.sqlite'))
+    monkeypatch.setattr(rag_qa, 'get_answer_cache', lambda: cache)
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+
+    first = asyncio.run(qa.aanswer_question(QUESTIONS[0]))
+    services.gateway.error = ConnectionError("down")
+    assert asyncio.run(qa.aanswer_question(QUESTIONS[0])) == first
+    # One lookup and one store, then one lookup that hit the cache
+    assert len(qa.vector_db.version_threads) == 3
+    assert threading.main_thread() not in qa.vector_db.version_threads
+
+
+def test_cached_answers_are_not_shared_between_tours(services, tmp_path, monkeypatch):
+    cache = SemanticAnswerCache(str(tmp_path / 'answers.sqlite'))
+    monkeypatch.setattr(rag_qa, 'get_answer_cache', lambda: cache)
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    # Every question embeds to the same vector, as close paraphrases nearly do
+    monkeypatch.setattr(qa.vector_db, 'embed_query', lambda question: np.ones(8, dtype=np.float32))
+
+    kerala = asyncio.run(qa.aanswer_question("Tell me about Kerala Backwaters"))
+    asyncio.run(qa.aanswer_question("Tell me about Royal Rajasthan"))
+    assert (cache.hits, cache.stats()['entries']) == (0, 2)
+    assert asyncio.run(qa.aanswer_question("Tell me more about the Kerala Backwaters")) == kerala
+    assert cache.hits == 1
+
+
+def test_transient_llm_errors_fall_back_to_the_context(services):
+    services.gateway.error = ConnectionError("down")
+    qa = rag_qa.RAGQASystem(api_key='test-key')
+    assert asyncio.run(qa.aanswer_question(QUESTIONS[0])) == qa.context_fallback_response(qa.retriever.context)
+    assert services.health.outcomes == ['failure']
+
+
+def test_itineraries_are_generated_concurrently(services):
+    planner = itinerary_suggester.ItinerarySuggester(api_key='test-key')
+    preferences = [{'location': place, 'interests': 'heritage', 'duration': '5 days'}
+                   for place in ('Kerala', 'Rajasthan', 'Goa')]
+
+    async def plan_all():
+        return await asyncio.gather(*(planner.agenerate_itinerary(p) for p in preferences))
+
+    itineraries = asyncio.run(plan_all())
+    assert len(itineraries) == 3 and all(itineraries)
+    assert services.gateway.max_in_flight == 3
+
+
+def test_itinerary_falls_back_to_the_template_without_the_llm(services):
+    services.health.available = False
+    planner = itinerary_suggester.ItinerarySuggester(api_key='test-key')
+    preferences = {'location': 'Kerala', 'interests': 'houseboat'}
+    itinerary = asyncio.run(planner.agenerate_itinerary(preferences))
+    assert itinerary == planner.generate_template_itinerary(preferences)
+    assert "Kerala Backwaters" in itinerary
+    assert services.gateway.max_in_flight == 0
+
+
+def test_gateway_bounds_in_flight_calls_with_the_semaphore():
+    in_flight = []
+    peak = []
+
+    async def create(model, messages, temperature, max_tokens):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    llm = LLMGateway('test-key', models=['primary'], async_client=client)
+    calls = llm_client.LLM_MAX_CONCURRENCY * 3
+
+    async def run_all():
+        return await asyncio.gather(*(llm.acomplete([{"role": "user", "content": "hi"}], 0.5, 5)
+                                      for _ in range(calls)))
+
+    assert asyncio.run(run_all()) == ["ok"] * calls
+    assert max(peak) == llm_client.LLM_MAX_CONCURRENCY
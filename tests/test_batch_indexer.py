@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from phase2_database import registry
+from phase2_database.batch_indexer import BatchEncoder, ThroughputMeter, iter_batches
+
+MODEL = registry.DEFAULT_MODEL_NAME
+
+
+@pytest.fixture(autouse=True)
+def model(model):
+    """Encodes a text as [len, number of words]"""
+    model.encode_text = lambda t: [len(t), len(t.split())]
+    return model
+
+
+def chunks(n):
+    return [{'id': f"chunk_{i}", 'text': "word " * (i + 1)} for i in range(n)]
+
+
+def test_iter_batches_is_lazy():
+    consumed = []
+
+    def items():
+        for i in range(7):
+            consumed.append(i)
+            yield i
+
+    batches = iter_batches(items(), 3)
+    assert next(batches) == [0, 1, 2]
+    assert consumed == [0, 1, 2]
+    assert list(batches) == [[3, 4, 5], [6]]
+
+
+def test_in_process_encoding_keeps_batch_order():
+    batches = list(iter_batches(chunks(5), 2))
+    results = list(BatchEncoder(MODEL).encode_stream(iter(batches)))
+    assert [batch for batch, _ in results] == batches
+    for batch, embeddings in results:
+        assert embeddings.dtype == np.float32
+        assert embeddings[:, 1].tolist() == [len(chunk['text'].split()) for chunk in batch]
+
+
+# Spawned workers start from a clean interpreter and load the model themselves
+FAKE_SENTENCE_TRANSFORMERS = """
+import numpy as np
+
+
+class SentenceTransformer:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.array([[len(t), len(t.split())] for t in texts], dtype=np.float32)
+"""
+
+
+class ParentOnlyModel:
+    def encode(self, texts, show_progress_bar=False):
+        raise AssertionError("pool worker reused the parent's model")
+
+
+def test_worker_pool_spawns_workers_that_load_their_own_model(tmp_path, monkeypatch):
+    package = tmp_path / 'sentence_transformers'
+    package.mkdir()
+    (package / '__init__.py').write_text(FAKE_SENTENCE_TRANSFORMERS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    batches = list(iter_batches(chunks(9), 2))
+    expected = [embeddings for _, embeddings in BatchEncoder(MODEL).encode_stream(iter(batches))]
+    # A forked worker would inherit this model from the registry instead of loading one
+    monkeypatch.setitem(registry._models, (MODEL, 'torch'), ParentOnlyModel())
+    results = list(BatchEncoder(MODEL, workers=2).encode_stream(iter(batches)))
+    assert [batch for batch, _ in results] == batches
+    for (_, embeddings), want in zip(results, expected):
+        assert np.array_equal(embeddings, want)
+
+
+def test_index_tours_writes_one_upsert_per_batch(db, collection):
+    tours = [{'name': f"Tour {i}", 'destinations': ['Agra'], 'highlights': [f"Highlight {i}"]} for i in range(5)]
+    summary = db.index_tours(iter(tours), batch_size=3)
+
+    assert [len(ids) for ids in collection.upserts] == [3, 3, 3, 1]
+    assert summary['added'] == 10
+    assert summary['throughput']['batches'] == 4
+
+
+def test_throughput_meter_counts_rows_and_batches():
+    meter = ThroughputMeter()
+    meter.add(3)
+    meter.add(2)
+    summary = meter.summary()
+    assert (summary['rows'], summary['batches']) == (5, 2)
+    assert summary['rows_per_sec'] > 0
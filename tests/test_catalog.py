@@ -0,0 +1,91 @@
+import os
+import copy
+import json
+import pickle
+
+import pytest
+
+from phase2_database import registry
+from phase2_database.catalog import TourCatalog, TourRecord, load_catalog
+
+TOURS = [
+    {'name': 'Golden Triangle', 'theme': 'Heritage', 'destinations': ['Destinations ➝ Delhi', 'Agra', 'Jaipur'],
+     'highlights': ['Taj Mahal at sunrise'], 'price': 'INR 20,000', 'metadata': {'completeness_score': 2},
+     'scraped_at': '2024-01-01'},
+    {'name': 'Golden Triangle', 'theme': 'Heritage', 'destinations': ['Delhi', 'Agra', 'Jaipur'],
+     'highlights': ['Taj Mahal at sunrise', 'Amber Fort'], 'duration': '5 Days', 'price': 'INR 22,000',
+     'metadata': {'completeness_score': 4}},
+    {'name': 'Kerala Backwaters', 'theme': 'Nature', 'destinations': ['Alleppey'],
+     'highlights': ['Houseboat stay']},
+]
+
+
+def test_records_are_read_only():
+    tour = copy.deepcopy(TOURS[0])
+    record = TourRecord(tour)
+    with pytest.raises(AttributeError):
+        record.price = 'free'
+    with pytest.raises(AttributeError):
+        del record.name
+    with pytest.raises(TypeError):
+        record['metadata']['completeness_score'] = 9
+    assert isinstance(record['destinations'], tuple)
+    # The caller's dict is copied, not wrapped
+    tour['highlights'].append('Camel ride')
+    assert record.highlights == ('Taj Mahal at sunrise',)
+
+
+def test_records_behave_like_the_json_dict():
+    record = TourRecord(TOURS[2])
+    assert record.get('price', 'Contact for price') == 'Contact for price'
+    assert 'price' not in record and 'highlights' in record
+    with pytest.raises(KeyError):
+        record['duration']
+    assert record.to_dict() == TOURS[2]
+    assert pickle.loads(pickle.dumps(record)).to_dict() == TOURS[2]
+
+
+def test_unknown_fields_are_dropped_and_search_fields_precomputed():
+    record = TourRecord(TOURS[0])
+    assert 'scraped_at' not in record.to_dict()
+    assert record.destination_set == frozenset({'delhi', 'agra', 'jaipur'})
+    assert record.theme_key == 'heritage'
+    assert 'taj mahal at sunrise' in record.search_text
+
+
+def test_catalog_lookups():
+    catalog = TourCatalog(TOURS)
+    assert len(catalog) == 3 and catalog[2].name == 'Kerala Backwaters'
+    # The most complete record wins for a repeated name
+    assert catalog.get('Golden Triangle')['duration'] == '5 Days'
+    assert catalog.themes == ('Heritage', 'Nature')
+    assert [t.name for t in catalog.with_theme('Nature')] == ['Kerala Backwaters']
+    assert catalog.with_theme('All') == catalog.tours
+    assert len(catalog.with_destination(' AGRA ')) == 2
+    assert [t.name for t in catalog.search('HOUSEBOAT')] == ['Kerala Backwaters']
+    assert catalog.search('houseboat', theme='Heritage') == []
+
+
+def test_catalog_indexes_are_read_only():
+    catalog = TourCatalog(TOURS)
+    with pytest.raises(TypeError):
+        catalog.by_name['Goa Beaches'] = catalog[0]
+    with pytest.raises(TypeError):
+        catalog.by_destination['agra'] = ()
+    assert isinstance(catalog.tours, tuple)
+    assert isinstance(catalog.by_theme['Heritage'], tuple)
+
+
+def test_registry_shares_one_catalog_per_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, '_catalogs', {})
+    path = tmp_path / 'tours.json'
+    path.write_text(json.dumps(TOURS))
+    catalog = registry.get_tour_catalog(str(path))
+    assert registry.get_tour_catalog(os.path.join(str(tmp_path), '.', 'tours.json')) is catalog
+    assert catalog.source == str(path)
+    assert len(catalog) == 3
+
+
+def test_missing_catalog_loads_empty(tmp_path):
+    catalog = load_catalog(str(tmp_path / 'missing.json'))
+    assert len(catalog) == 0 and not catalog
@@ -0,0 +1,79 @@
+import os
+import json
+
+import numpy as np
+
+from phase2_database.catalog import TourRecord, load_catalog
+from phase2_database import catalog_artifact
+from phase2_database.catalog_artifact import (write_catalog_artifact, read_catalog_artifact, artifact_path,
+                                              ARTIFACT_MAGIC)
+from phase2_database.postings import build_postings
+from phase3_qa_system.keyword_index import KeywordIndex
+
+TOURS = [
+    {'name': 'Royal Rajasthan', 'theme': 'Heritage', 'destinations': ['Jaipur', 'Udaipur'],
+     'highlights': ['Amber Fort'], 'price': 'INR 30,000', 'metadata': {'completeness_score': 4}},
+    {'name': 'Kerala Backwaters', 'theme': 'Nature', 'destinations': ['Alleppey'],
+     'highlights': ['Houseboat stay'], 'metadata': {'completeness_score': 2}},
+]
+
+
+def write_json(tmp_path, tours=TOURS):
+    path = tmp_path / 'tours.json'
+    path.write_text(json.dumps(tours))
+    return str(path)
+
+
+def test_round_trip_keeps_records_and_postings(tmp_path):
+    postings = build_postings(TOURS)
+    path = write_catalog_artifact(TOURS, str(tmp_path / 'tours.catalog'), postings)
+    catalog = read_catalog_artifact(path, source='tours.json')
+
+    assert catalog.source == 'tours.json'
+    assert [tour.to_dict() for tour in catalog] == [TourRecord(tour).to_dict() for tour in TOURS]
+    assert catalog.get('Kerala Backwaters')['metadata']['completeness_score'] == 2
+    assert set(catalog.keyword_postings) == set(postings)
+    for term, (rows, scores) in postings.items():
+        assert np.array_equal(catalog.keyword_postings[term][0], rows)
+        assert np.array_equal(catalog.keyword_postings[term][1], scores)
+    index = KeywordIndex(list(catalog), catalog.keyword_postings)
+    assert [tour.name for tour in index.search("houseboat")] == ['Kerala Backwaters']
+
+
+def test_unreadable_artifacts_are_ignored(tmp_path):
+    path = tmp_path / 'tours.catalog'
+    assert read_catalog_artifact(str(path)) is None
+    path.write_bytes(b'not a catalog')
+    assert read_catalog_artifact(str(path)) is None
+    path.write_bytes(ARTIFACT_MAGIC + bytes([99]) + b'payload')
+    assert read_catalog_artifact(str(path)) is None
+    write_catalog_artifact(TOURS, str(path))
+    path.write_bytes(path.read_bytes()[:-20])
+    assert read_catalog_artifact(str(path)) is None
+
+
+def test_load_catalog_prefers_a_fresh_artifact(tmp_path):
+    json_path = write_json(tmp_path)
+    write_catalog_artifact(TOURS[:1], artifact_path(json_path))
+    catalog = load_catalog(json_path)
+    assert [tour.name for tour in catalog] == ['Royal Rajasthan']
+    assert catalog.source == json_path
+
+
+def test_load_catalog_skips_a_stale_artifact(tmp_path):
+    json_path = write_json(tmp_path)
+    binary_path = write_catalog_artifact(TOURS[:1], artifact_path(json_path))
+    # The JSON was re-cleaned after the artifact was written
+    stat = os.stat(json_path)
+    os.utime(binary_path, (stat.st_atime, stat.st_mtime - 10))
+    assert len(load_catalog(json_path)) == 2
+
+
+def test_artifact_from_another_interpreter_falls_back_to_the_json(tmp_path, monkeypatch):
+    json_path = write_json(tmp_path)
+    monkeypatch.setattr(catalog_artifact, 'INTERPRETER_TAG', b'cpython-399-marshal9')
+    binary_path = write_catalog_artifact(TOURS[:1], artifact_path(json_path))
+    monkeypatch.undo()
+
+    assert read_catalog_artifact(binary_path) is None
+    assert len(load_catalog(json_path)) == 2
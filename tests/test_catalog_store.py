@@ -0,0 +1,73 @@
+import pytest
+
+from phase2_database.catalog_store import CatalogStore, match_expression, fts5_available
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+TOURS = [
+    {'name': 'Royal Rajasthan', 'theme': 'Heritage', 'destinations': ['Destinations ➝ Jaipur', 'Udaipur'],
+     'highlights': ['Forts and palaces'], 'metadata': {'completeness_score': 4},
+     'url': 'https://example.com/what-to-see'},
+    {'name': 'Kerala Backwaters', 'theme': 'Nature', 'destinations': ['Alleppey'],
+     'highlights': ['Houseboat stay'], 'metadata': {'completeness_score': 2}},
+    {'name': 'Kerala Yoga Retreat', 'theme': 'Wellness', 'destinations': ['Varkala'],
+     'highlights': ['Customizable tour package - contact for details'], 'metadata': {'completeness_score': 1}},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CatalogStore(str(tmp_path / 'catalog.sqlite'))
+    store.build(TOURS, source='tours.json')
+    yield store
+    store.close()
+
+
+def names(tours):
+    return [tour.name for tour in tours]
+
+
+def test_match_expression():
+    assert match_expression("raj forts") == '"raj"* AND "fort"*'
+    assert match_expression("raj forts", match_any=True) == '"raj"* OR "fort"*'
+    assert match_expression("!!") == ""
+
+
+def test_prefix_search_and_paging(store):
+    assert names(store.search("raj")) == ['Royal Rajasthan']
+    ranked = names(store.search("kerala"))
+    assert set(ranked) == {'Kerala Backwaters', 'Kerala Yoga Retreat'}
+    assert names(store.search("kerala", limit=1, offset=1)) == ranked[1:]
+    assert store.count("kerala") == 2
+
+
+def test_filters_without_a_query(store):
+    assert names(store.search()) == [tour['name'] for tour in TOURS]
+    assert names(store.search(theme='Nature')) == ['Kerala Backwaters']
+    assert store.count(min_completeness=2) == 2
+
+
+def test_search_widens_when_no_tour_has_every_token(store):
+    # No tour has both words: tours with either are ranked
+    assert set(names(store.search("yoga houseboat"))) == {'Kerala Yoga Retreat', 'Kerala Backwaters'}
+    # Not indexed anywhere: falls back to a substring match on the tour JSON
+    assert names(store.search("what-to-see")) == ['Royal Rajasthan']
+    assert store.search("zanzibar") == []
+
+
+def test_placeholders_and_labels_are_not_indexed(store):
+    # match_any skips the substring fallback, so only the FTS index is searched
+    assert store.search("customizable", match_any=True) == []
+    assert store.search("destinations", match_any=True) == []
+
+
+def test_metadata(store):
+    assert store.source() == 'tours.json'
+    assert store.themes() == ['Heritage', 'Nature', 'Wellness']
+
+
+def test_rebuild_replaces_the_open_store(store):
+    assert store.count() == 3
+    store.build(TOURS[:1])
+    assert store.count() == 1
+    assert store.source() is None
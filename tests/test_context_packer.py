@@ -0,0 +1,46 @@
+from phase2_database.context_packer import ContextPacker, clean_block, make_token_counter
+
+count_words = make_token_counter()
+
+GOLDEN = ("Tour Name: Golden Triangle\n"
+          "Price: Contact for price\n"
+          "Destinations: Destinations ➝ Agra, Jaipur\n"
+          "Highlights: Taj Mahal at sunrise; Customizable tour package - contact for details; Amber Fort")
+
+
+def test_clean_block_drops_placeholders_and_labels():
+    assert clean_block(GOLDEN) == ("Tour Name: Golden Triangle\n"
+                                   "Destinations: Agra, Jaipur\n"
+                                   "Highlights: Taj Mahal at sunrise; Amber Fort")
+
+
+def test_clean_block_shares_seen_highlights_across_blocks():
+    seen = set()
+    clean_block(GOLDEN, seen)
+    assert clean_block("Tour Name: Agra Day Trip\nHighlights: taj mahal at sunrise", seen) == (
+        "Tour Name: Agra Day Trip")
+
+
+def test_pack_names_each_tour_once():
+    packer = ContextPacker(count_words, token_budget=200)
+    context = packer.pack([{'tour_name': 'Golden Triangle', 'document': GOLDEN}])
+    assert context == ("[From Golden Triangle]: Destinations: Agra, Jaipur\n"
+                       "Highlights: Taj Mahal at sunrise; Amber Fort")
+
+
+def test_pack_respects_the_budget_and_tries_shorter_blocks():
+    blocks = [
+        {'tour_name': 'Golden Triangle', 'document': GOLDEN},
+        {'tour_name': 'Long Tour', 'document': "Highlights: " + "; ".join(f"stop {i}" for i in range(50))},
+        {'tour_name': 'Goa', 'document': "Theme: Beach"},
+    ]
+    packer = ContextPacker(count_words, token_budget=40)
+    context = packer.pack(blocks)
+    assert count_words(context) <= 40
+    assert "[From Golden Triangle]" in context and "[From Goa]: Theme: Beach" in context
+    assert "Long Tour" not in context
+
+    stats = packer.stats()
+    assert stats['requests'] == 1
+    assert stats['tokens_after'] <= 40 < stats['tokens_before']
+    assert stats['tokens_saved'] == stats['tokens_before'] - stats['tokens_after']
@@ -0,0 +1,54 @@
+import numpy as np
+
+from phase2_database.diversify import group_hits_by_tour, mmr_select, merge_tour_block
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_group_hits_by_tour_merges_chunks_in_rank_order():
+    results = {
+        'ids': [['h1', 'm2', 'm1', 'h2']],
+        'documents': [[
+            "Tour: Golden Triangle - Highlight: Taj Mahal",
+            "Tour Name: Kerala Backwaters",
+            "Tour Name: Golden Triangle",
+            "Tour: Golden Triangle - Highlight: Amber Fort",
+        ]],
+        'metadatas': [[
+            {'tour_name': 'Golden Triangle', 'chunk_type': 'highlight'},
+            {'tour_name': 'Kerala Backwaters', 'chunk_type': 'main_info'},
+            {'tour_name': 'Golden Triangle', 'chunk_type': 'main_info'},
+            {'tour_name': 'Golden Triangle', 'chunk_type': 'highlight'},
+        ]],
+    }
+    embeddings = {'h1': unit(1, 0), 'm1': unit(1, 1), 'm2': unit(0, 1)}
+    groups = group_hits_by_tour(results, embeddings)
+
+    assert [g['tour_name'] for g in groups] == ['Golden Triangle', 'Kerala Backwaters']
+    golden = groups[0]
+    assert golden['ids'] == ['h1', 'm1', 'h2']
+    assert golden['main_info'] == "Tour Name: Golden Triangle"
+    assert golden['highlights'] == ['Taj Mahal', 'Amber Fort']
+    assert np.isclose(np.linalg.norm(golden['vector']), 1.0)
+    assert merge_tour_block(golden) == "Tour Name: Golden Triangle\nHighlights: Taj Mahal; Amber Fort"
+
+
+def test_group_hits_by_tour_handles_empty_results():
+    assert group_hits_by_tour({'ids': [[]], 'documents': [[]], 'metadatas': [[]]}, {}) == []
+
+
+def test_mmr_skips_near_duplicates():
+    query = unit(1, 0)
+    candidates = [unit(1, 0.5), unit(1, 0.55), unit(1, -0.6)]
+    assert mmr_select(query, candidates, k=2) == [0, 2]
+    # lambda 1 is plain relevance ranking
+    assert mmr_select(query, candidates, k=2, lambda_=1.0) == [0, 1]
+
+
+def test_mmr_keeps_candidates_without_vectors_last():
+    query = unit(1, 0)
+    assert mmr_select(query, [None, unit(0, 1), unit(1, 0)], k=3) == [2, 1, 0]
+    assert mmr_select(query, [None, None], k=1) == [0]
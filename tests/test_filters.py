@@ -0,0 +1,63 @@
+import pytest
+
+from phase2_database.filters import (build_where, matches_where, normalize_destinations, destination_key,
+                                     PLACEHOLDER_DESTINATIONS)
+
+METADATA = {
+    'theme': 'Heritage',
+    'chunk_type': 'highlight',
+    'tour_name': 'Golden Triangle',
+    'has_price': False,
+    'completeness_score': 3,
+    'dest_agra': True,
+    'dest_jaipur': True,
+}
+
+
+def test_normalize_destinations_drops_labels_placeholders_and_duplicates():
+    assert normalize_destinations(["Destinations ➝ Agra", "agra", "Jaipur ", PLACEHOLDER_DESTINATIONS, ""]) == [
+        'agra', 'jaipur']
+
+
+def test_destination_key():
+    assert destination_key("Bodh Gaya") == 'dest_bodh_gaya'
+
+
+def test_build_where_shapes():
+    assert build_where(None) is None
+    assert build_where({'theme': 'Heritage'}) == {'theme': 'Heritage'}
+    assert build_where({'theme': ['Heritage', 'Pilgrimage']}) == {'theme': {'$in': ['Heritage', 'Pilgrimage']}}
+    assert build_where({'destinations': ['Agra', 'Goa'], 'min_completeness': 2}) == {'$and': [
+        {'completeness_score': {'$gte': 2}},
+        {'$or': [{'dest_agra': True}, {'dest_goa': True}]},
+    ]}
+
+
+def test_build_where_rejects_unknown_filters():
+    with pytest.raises(ValueError):
+        build_where({'colour': 'blue'})
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({}, True),
+    ({'theme': 'Heritage'}, True),
+    ({'theme': 'Pilgrimage'}, False),
+    ({'theme': ['Pilgrimage', 'Heritage']}, True),
+    ({'destinations': 'Agra'}, True),
+    ({'destinations': ['Goa', 'Jaipur']}, True),
+    ({'destinations': ['Goa']}, False),
+    ({'has_price': False, 'chunk_type': 'highlight'}, True),
+    ({'has_price': True}, False),
+    ({'min_completeness': 3}, True),
+    ({'min_completeness': 4}, False),
+])
+def test_matches_where_agrees_with_build_where(filters, expected):
+    assert matches_where(METADATA, build_where(filters)) is expected
+
+
+def test_matches_where_operators():
+    assert matches_where(METADATA, {'theme': {'$ne': 'Beach'}})
+    assert not matches_where(METADATA, {'theme': {'$nin': ['Heritage']}})
+    assert matches_where(METADATA, {'completeness_score': {'$lte': 3}})
+    # Missing keys never satisfy a range
+    assert not matches_where(METADATA, {'price_value': {'$gte': 0}})
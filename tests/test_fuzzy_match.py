@@ -0,0 +1,51 @@
+import pytest
+
+from phase2_database.catalog import TourRecord
+from phase2_database.fuzzy_match import FuzzyMatcher, within_one_edit
+
+VOCABULARY = ['kerala', 'rajasthan', 'jaipur', 'goa', 'golden', 'triangle', 'munnar', 'heritage']
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return FuzzyMatcher(VOCABULARY)
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('kerala', 'kerala', True),
+    ('kerla', 'kerala', True),
+    ('kerala', 'kerela', True),
+    ('keral', 'kerala', True),
+    ('kreal', 'kerala', False),
+    ('goa', 'agra', False),
+])
+def test_within_one_edit(a, b, expected):
+    assert within_one_edit(a, b) is expected
+
+
+def test_short_terms_one_typo_away(matcher):
+    assert matcher.best("kerla") == 'kerala'
+    assert matcher.best("jaipor") == 'jaipur'
+
+
+def test_long_terms_use_trigram_similarity(matcher):
+    assert matcher.best("rajastan") == 'rajasthan'
+    assert matcher.best("triangel") == 'triangle'
+    assert matcher.best("zanzibar") is None
+
+
+def test_aliases_resolve_to_catalog_names(matcher):
+    assert matcher.candidates("Benaras") == [('varanasi', 1.0)]
+    assert matcher.correct("Benaras and Rajastan") == "varanasi and rajasthan"
+
+
+def test_correct_keeps_known_and_short_words(matcher):
+    assert matcher.correct("golden triangel in 5 days") == "golden triangle in 5 days"
+    assert matcher.correct("goa") == "goa"
+
+
+def test_from_catalog_vocabulary():
+    tours = [TourRecord({'name': 'Munnar Hills 3 Days', 'theme': 'Hill Station', 'destinations': ['Munnar']})]
+    matcher = FuzzyMatcher.from_catalog(tours, aliases={})
+    assert {'munnar', 'hills', 'hill', 'station'} <= set(matcher.terms)
+    assert '3' not in matcher.terms
@@ -0,0 +1,41 @@
+from phase2_database.bm25 import BM25Index
+from phase2_database.hybrid_search import reciprocal_rank_fusion
+
+CHUNKS = [
+    {'id': 'a', 'text': "Tour: Golden Triangle - Highlight: Taj Mahal at sunrise in Agra", 'metadata': {}},
+    {'id': 'b', 'text': "Tour: Royal Rajasthan - Highlight: Amber Fort and Jaipur palaces", 'metadata': {}},
+    {'id': 'c', 'text': "Tour: Kerala Backwaters - Highlight: Houseboat cruise in Alleppey", 'metadata': {}},
+    {'id': 'd', 'text': "Tour: Jaipur Weekend - Highlight: Jaipur forts, Jaipur bazaars", 'metadata': {}},
+]
+
+
+def test_bm25_ranks_matching_chunks_only():
+    index = BM25Index().build(CHUNKS)
+    ids = [chunk_id for chunk_id, _ in index.search("jaipur fort")]
+    assert set(ids) == {'b', 'd'}
+    assert index.search("houseboat")[0][0] == 'c'
+    assert index.search("snowboarding") == []
+
+
+def test_bm25_rewards_term_frequency_and_rare_terms():
+    index = BM25Index().build(CHUNKS)
+    scores = dict(index.search("jaipur"))
+    assert scores['d'] > scores['b']
+    # "taj" occurs in one chunk, "highlight" in all of them
+    scores = dict(index.search("taj highlight"))
+    assert scores['a'] > 2 * scores['b']
+
+
+def test_bm25_respects_n_results():
+    assert len(BM25Index().build(CHUNKS).search("tour highlight", n_results=2)) == 2
+
+
+def test_rrf_prefers_ids_ranked_well_in_both_lists():
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['b', 'c', 'a']])
+    assert fused[0] == 'b'
+    assert set(fused) == {'a', 'b', 'c'}
+
+
+def test_rrf_keeps_ids_found_by_one_ranker():
+    fused = reciprocal_rank_fusion([['a', 'b'], ['c']])
+    assert fused == ['a', 'c', 'b']
@@ -0,0 +1,82 @@
+import pytest
+
+from phase2_database.vector_store import INDEX_VERSION_FILE
+
+
+def tour(name, destinations=('Agra', 'Jaipur'), highlights=('Taj Mahal at sunrise',)):
+    return {
+        'name': name,
+        'theme': 'Heritage',
+        'destinations': list(destinations),
+        'highlights': list(highlights),
+        'price': 'Contact for price',
+        'metadata': {'completeness_score': 2},
+    }
+
+
+def test_first_run_adds_every_chunk(db, model):
+    summary = db.index_tours([tour('Golden Triangle'), tour('Royal Rajasthan')])
+    assert summary['added'] == 4
+    assert (summary['updated'], summary['deleted'], summary['unchanged']) == (0, 0, 0)
+    assert len(db.collection.rows) == 4
+    assert model.encoded == 4
+
+
+def test_rerun_is_a_no_op(db, model):
+    tours = [tour('Golden Triangle'), tour('Royal Rajasthan')]
+    db.index_tours(tours)
+    version = db.get_index_version()
+    summary = db.index_tours(tours)
+    assert summary['unchanged'] == 4
+    assert (summary['added'], summary['updated'], summary['deleted']) == (0, 0, 0)
+    assert model.encoded == 4
+    assert db.get_index_version() == version
+
+
+def test_metadata_change_updates_without_reembedding(db, model):
+    db.index_tours([tour('Golden Triangle', highlights=('Taj Mahal at sunrise',))])
+    model.batches.clear()
+    # The highlight text is unchanged, only the tour's destinations (i.e. its metadata) differ
+    summary = db.index_tours([tour('Golden Triangle', destinations=('Agra', 'Delhi'))])
+    assert summary['updated'] == 1
+    highlight = next(row for row in db.collection.rows.values()
+                     if row['metadata']['chunk_type'] == 'highlight')
+    assert highlight['metadata']['dest_delhi'] is True
+    assert 'dest_jaipur' not in highlight['metadata']
+
+
+def test_removed_tour_is_pruned(db):
+    db.index_tours([tour('Golden Triangle'), tour('Royal Rajasthan')])
+    summary = db.index_tours([tour('Golden Triangle')])
+    assert summary['deleted'] == 2
+    assert {row['metadata']['tour_name'] for row in db.collection.rows.values()} == {'Golden Triangle'}
+
+
+@pytest.mark.parametrize('empty', [[], (), lambda: iter(()), lambda: (t for t in [])])
+def test_empty_input_never_prunes(db, empty):
+    db.index_tours([tour('Golden Triangle')])
+    tours = empty() if callable(empty) else empty
+    summary = db.index_tours(tours)
+    assert summary['deleted'] == 0
+    assert summary['throughput']['rows'] == 0
+    assert 'rows_per_sec' in summary['throughput']
+    assert len(db.collection.rows) == 2
+
+
+def test_stored_hashes_are_read_a_page_at_a_time(db):
+    db.index_tours([tour('Golden Triangle'), tour('Royal Rajasthan'), tour('Kerala Backwaters')])
+    db.collection.pages.clear()
+    hashes = db.get_indexed_hashes(page_size=4)
+    assert db.collection.pages == [4, 4]
+    assert hashes == {chunk_id: row['metadata']['content_hash'] for chunk_id, row in db.collection.rows.items()}
+
+
+def test_index_version_follows_the_marker(db, make_db, tmp_path):
+    db.index_tours([tour('Golden Triangle')])
+    marker = tmp_path / INDEX_VERSION_FILE
+    assert marker.read_text() == db.get_index_version()
+
+    # Another process re-indexed: the marker is rewritten with a new version
+    other = make_db()
+    other.index_tours([tour('Golden Triangle'), tour('Royal Rajasthan')])
+    assert db.get_index_version() == other.get_index_version()
@@ -0,0 +1,83 @@
+import pytest
+
+from phase2_database.catalog import TourRecord
+from phase3_qa_system.intent_router import IntentRouter, field_value
+
+
+def tour(name, **fields):
+    data = {
+        'name': name,
+        'theme': 'Pilgrimage',
+        'price': 'Contact for price',
+        'duration': 'Duration varies by package',
+        'destinations': ['Agra', 'Jaipur'],
+        'highlights': ['Sunrise at the Taj Mahal'],
+        'metadata': {'completeness_score': 3},
+    }
+    data.update(fields)
+    return TourRecord(data)
+
+
+TOURS = [
+    tour('Golden Triangle Tour Package 4 Days / 3 Nights'),
+    tour('Buddhist Golden Triangle Tour', price='INR 45,000'),
+    tour('Chardham Yatra', duration='10 Days'),
+    tour('Kerala Tour Packages', is_umbrella_package=True),
+    tour('Goa Tour Packages', is_umbrella_package=True),
+    tour('Dubai Tours'),
+    tour('Ladakh Tour', duration='7 Days'),
+]
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter(TOURS)
+
+
+def routed(router, question):
+    match = router.route(question)
+    return match and (match['tour'].name, match['fields'])
+
+
+def test_field_lookup_is_routed(router):
+    assert routed(router, "What's the price of Buddhist Golden Triangle Tour?") == (
+        'Buddhist Golden Triangle Tour', ['price'])
+
+
+def test_most_specific_name_wins(router):
+    assert routed(router, "price of golden triangle tour")[0] == 'Golden Triangle Tour Package 4 Days / 3 Nights'
+    assert routed(router, "price of buddhist golden triangle")[0] == 'Buddhist Golden Triangle Tour'
+
+
+def test_spacing_and_typos_in_names(router):
+    assert routed(router, "How many days is the Char Dham Yatra?") == ('Chardham Yatra', ['duration'])
+    assert routed(router, "how long is the golden triangel tour")[0].startswith('Golden Triangle')
+
+
+def test_placeholder_fields_are_answered_on_request(router):
+    name, fields = routed(router, "What's the price of Golden Triangle Tour?")
+    assert fields == ['price']
+    assert field_value(router.match_tour("golden triangle")['tour'], 'price').startswith("Available on request")
+
+
+def test_duration_falls_back_to_the_name():
+    assert field_value(TOURS[0], 'duration') == '4 Days / 3 Nights'
+
+
+@pytest.mark.parametrize('question', [
+    "Which Kerala tours include houseboats?",
+    "Do you have Goa tours for 5 days?",
+    "Any tours with 7 days in Kerala?",
+    "where can I go in Goa",
+    "price of Kerala tour packages",
+    "how much are Dubai tours",
+    "Compare the price of Golden Triangle and Chardham Yatra",
+    "Golden Triangle Tour",
+])
+def test_open_questions_fall_through(router, question):
+    assert router.route(question) is None
+
+
+def test_one_word_names_need_the_whole_name(router):
+    assert routed(router, "how many days is the Ladakh tour") == ('Ladakh Tour', ['duration'])
+    assert router.route("how many days do I need in Ladakh") is None
@@ -0,0 +1,47 @@
+from phase2_database.postings import build_postings, index_term
+from phase3_qa_system.keyword_index import KeywordIndex
+
+TOURS = [
+    {'name': 'Temple Trail', 'theme': 'Pilgrimage', 'destinations': ['Varanasi'],
+     'highlights': ['Evening aarti on the ghats']},
+    {'name': 'Golden Triangle', 'theme': 'Heritage', 'destinations': ['Destinations ➝ Agra', 'Jaipur'],
+     'highlights': ['Sunrise at the Taj Mahal', 'Temples of Jaipur']},
+    {'name': 'Goa Beaches', 'theme': 'Beach', 'destinations': ['Goa'],
+     'highlights': ['Customizable tour package - contact for details']},
+]
+
+
+def names(tours):
+    return [tour['name'] for tour in tours]
+
+
+def test_index_term_folds_plurals():
+    assert index_term('temples') == 'temple'
+    assert index_term('pass') == 'pass'
+    assert index_term('bus') == 'bus'
+
+
+def test_field_weights_order_single_term_hits():
+    # A hit in the name (3) outranks one in a highlight (1)
+    assert names(KeywordIndex(TOURS).search("temples")) == ['Temple Trail', 'Golden Triangle']
+
+
+def test_more_matched_terms_outrank_a_higher_score():
+    index = KeywordIndex(TOURS)
+    assert names(index.search("temple jaipur", 1)) == ['Golden Triangle']
+    # Goa is in the name and the destinations (5), temple only in a name (3)
+    assert names(index.search("temple jaipur goa")) == ['Golden Triangle', 'Goa Beaches', 'Temple Trail']
+
+
+def test_labels_and_placeholders_are_not_indexed():
+    postings = build_postings(TOURS)
+    assert 'destination' not in postings
+    assert 'customizable' not in postings
+    assert list(postings['agra'][0]) == [1]
+
+
+def test_prebuilt_postings_and_empty_queries():
+    index = KeywordIndex(TOURS, postings=build_postings(TOURS))
+    assert names(index.search("beach")) == ['Goa Beaches']
+    assert index.search("zanzibar") == []
+    assert index.search("goa", 0) == []
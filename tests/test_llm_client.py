@@ -0,0 +1,106 @@
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from phase3_qa_system import llm_client
+from phase3_qa_system.llm_client import LLMHealth, get_llm_health
+
+
+class FakeModels:
+    """models.list() that blocks until released, then succeeds or raises"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def list(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return []
+
+
+@pytest.fixture
+def models(monkeypatch):
+    fake = FakeModels()
+    monkeypatch.setattr(llm_client, 'get_client', lambda api_key, base_url=None: SimpleNamespace(models=fake))
+    return fake
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_client_is_created_on_first_use_and_shared(monkeypatch):
+    created = []
+    monkeypatch.setitem(sys.modules, 'groq', SimpleNamespace(Groq=lambda **kwargs: created.append(kwargs) or object()))
+    monkeypatch.setattr(llm_client, '_clients', {})
+    assert created == []
+    client = llm_client.get_client('key-1', 'http://127.0.0.1:8008')
+    assert llm_client.get_client('key-1', 'http://127.0.0.1:8008') is client
+    assert llm_client.get_client('key-2', 'http://127.0.0.1:8008') is not client
+    # Retries belong to the gateway, not the SDK
+    assert [kwargs['max_retries'] for kwargs in created] == [0, 0]
+
+
+def test_status_is_assumed_up_until_the_background_probe_settles(models):
+    health = LLMHealth('test-key')
+    start = time.monotonic()
+    assert health.available
+    assert time.monotonic() - start < 0.5
+    assert wait_for(lambda: models.calls == 1)
+    assert health.status is None
+
+    models.release.set()
+    assert wait_for(lambda: health.status is True)
+    assert health.available
+
+
+def test_failed_probe_marks_the_llm_unavailable(models):
+    models.error = ConnectionError("no route to host")
+    models.release.set()
+    health = LLMHealth('test-key')
+    health.start_probe()
+    assert wait_for(lambda: health.status is False)
+    assert not health.available
+    assert "no route to host" in health.last_error
+
+
+def test_one_probe_at_a_time_and_stale_results_are_refreshed(models):
+    health = LLMHealth('test-key', ttl=0.05)
+    for _ in range(5):
+        health.available
+    assert wait_for(lambda: models.calls == 1)
+    time.sleep(0.05)
+    assert models.calls == 1
+
+    models.release.set()
+    assert wait_for(lambda: health.status is True and not health._probing)
+    time.sleep(0.06)
+    assert health.available
+    assert wait_for(lambda: models.calls == 2)
+
+
+def test_request_outcomes_update_the_status(models):
+    health = LLMHealth('test-key', ttl=60, retry_after=60)
+    health.record_failure(ConnectionError("down"))
+    assert not health.available
+    health.record_success()
+    assert health.available and health.last_error is None
+
+
+def test_health_is_shared_per_key_and_probed_once(models, monkeypatch):
+    monkeypatch.setattr(llm_client, '_health', {})
+    health = get_llm_health('test-key')
+    assert get_llm_health('test-key') is health
+    assert get_llm_health('other-key') is not health
+    models.release.set()
+    assert wait_for(lambda: models.calls == 2)
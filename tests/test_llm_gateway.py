@@ -0,0 +1,281 @@
+import io
+import json
+import time
+import asyncio
+import importlib.util
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from phase3_qa_system.llm_gateway import LLMGateway, CircuitBreaker, CircuitOpenError
+from phase3_qa_system.mock_llm_server import MockSettings, serve
+
+MESSAGES = [{"role": "user", "content": "plan a week in kerala"}]
+requires_groq = pytest.mark.skipif(importlib.util.find_spec('groq') is None, reason="groq is not installed")
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """Chunk iterator shaped like Groq's stream; records whether it was closed"""
+
+    def __init__(self, tokens, first_token_delay, token_delay):
+        self.tokens = list(tokens)
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        time.sleep(self.first_token_delay if self.sent == 0 else self.token_delay)
+        if self.closed or self.sent == len(self.tokens):
+            raise StopIteration
+        self.sent += 1
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.tokens[self.sent - 1]))])
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """In-process stand-in for the Groq client; records the model of every request
+
+    Models in failing_models raise error, which is transient for
+    ConnectionError and TimeoutError as it is for Groq's connection errors.
+    """
+
+    def __init__(self, failing_models=(), error=ConnectionError, hang=0.0, tokens=("Namaste", " India"),
+                 first_token_delay=None, token_delay=0.0):
+        self.failing_models = failing_models
+        self.error = error
+        self.hang = hang
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay or {}
+        self.token_delay = token_delay
+        self.requests = []
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, max_tokens, stream=False, timeout=None):
+        self.requests.append(model)
+        time.sleep(self.hang)
+        if model in self.failing_models:
+            raise self.error(f"{model} is down")
+        if stream:
+            self.streams.append(FakeStream(self.tokens, self.first_token_delay.get(model, 0.0), self.token_delay))
+            return self.streams[-1]
+        return completion("".join(self.tokens))
+
+
+class FakeAsyncClient:
+    def __init__(self, hang=0.0):
+        self.hang = hang
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, temperature, max_tokens):
+        self.requests.append(model)
+        await asyncio.sleep(self.hang)
+        return completion("Namaste India")
+
+
+def gateway(client=None, **options):
+    options.setdefault('models', ['primary', 'fallback'])
+    options.setdefault('timeout', 2.0)
+    options.setdefault('backoff_base', 0.0)
+    return LLMGateway('test-key', client=client, **options)
+
+
+def test_complete_and_stream():
+    client = FakeClient()
+    llm = gateway(client)
+    assert llm.complete(MESSAGES, temperature=0.5, max_tokens=5) == "Namaste India"
+    assert "".join(llm.stream(MESSAGES, temperature=0.5, max_tokens=5)) == "Namaste India"
+    assert client.requests == ['primary', 'primary']
+    assert client.streams[0].closed
+    assert llm.breakers['primary'].state == 'closed'
+
+
+def test_transient_errors_are_retried_then_fall_back():
+    client = FakeClient(failing_models=('primary',))
+    llm = gateway(client, max_retries=1)
+    assert llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert client.requests == ['primary', 'primary', 'fallback']
+
+
+def test_stream_falls_back_before_the_first_token():
+    client = FakeClient(failing_models=('primary',))
+    llm = gateway(client, max_retries=0)
+    assert "".join(llm.stream(MESSAGES, temperature=0.5, max_tokens=5))
+    assert client.requests == ['primary', 'fallback']
+
+
+def test_slow_first_token_closes_the_stream_and_falls_back():
+    client = FakeClient(first_token_delay={'primary': 1.0})
+    llm = gateway(client, max_retries=0, timeout=0.3)
+    assert "".join(llm.stream(MESSAGES, temperature=0.5, max_tokens=5)) == "Namaste India"
+    assert client.requests == ['primary', 'fallback']
+    assert [stream.closed for stream in client.streams] == [True, True]
+
+
+def test_abandoned_stream_is_closed():
+    client = FakeClient()
+    llm = gateway(client)
+    deltas = llm.stream(MESSAGES, temperature=0.5, max_tokens=5)
+    assert next(deltas) == "Namaste"
+    deltas.close()
+    assert client.streams[0].closed
+
+
+def test_client_errors_are_not_retried():
+    client = FakeClient(failing_models=('primary',), error=ValueError)
+    llm = gateway(client)
+    with pytest.raises(ValueError):
+        llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert client.requests == ['primary']
+    # A bad request says nothing about the upstream's health
+    assert llm.breakers['primary'].failures == 0
+
+
+def test_circuit_opens_and_refuses_calls():
+    client = FakeClient(failing_models=('primary', 'fallback'))
+    llm = gateway(client, max_retries=4)
+    with pytest.raises(ConnectionError):
+        llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert len(client.requests) == 10
+    assert {breaker.state for breaker in llm.breakers.values()} == {'open'}
+
+    with pytest.raises(CircuitOpenError):
+        llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert len(client.requests) == 10
+
+
+def test_half_open_trial_closes_the_circuit():
+    llm = gateway(FakeClient(), models=['primary'])
+    breaker = llm.breakers['primary'] = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    assert llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert breaker.state == 'closed'
+
+
+def test_half_open_trial_admits_one_caller():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_deadline_bounds_a_hung_upstream():
+    llm = gateway(FakeClient(hang=2.0), timeout=0.3, deadline=0.8)
+    for call in (lambda: llm.complete(MESSAGES, temperature=0.5, max_tokens=5),
+                 lambda: list(llm.stream(MESSAGES, temperature=0.5, max_tokens=5))):
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            call()
+        assert time.monotonic() - start < 1.5
+
+
+def test_timeouts_record_the_time_actually_waited():
+    llm = gateway(FakeClient(hang=2.0), models=['primary'], timeout=5.0, deadline=0.3)
+    with pytest.raises(TimeoutError):
+        llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    [(_, waited)] = llm.latencies['primary'].samples
+    assert 0.2 < waited < 1.0
+
+
+def test_deadline_bounds_a_trickling_stream():
+    client = FakeClient(tokens=["word "] * 100, token_delay=0.2)
+    llm = gateway(client, timeout=1.0, deadline=1.0)
+    received = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for delta in llm.stream(MESSAGES, temperature=0.5, max_tokens=100):
+            received.append(delta)
+    assert received
+    assert time.monotonic() - start < 1.6
+    assert client.streams[0].closed
+
+
+def test_async_complete_uses_the_injected_client():
+    client = FakeAsyncClient()
+    llm = LLMGateway('test-key', models=['primary'], async_client=client)
+    assert asyncio.run(llm.acomplete(MESSAGES, temperature=0.5, max_tokens=5)) == "Namaste India"
+    assert client.requests == ['primary']
+
+
+def test_cancelled_async_call_releases_the_trial():
+    llm = LLMGateway('test-key', models=['primary'], async_client=FakeAsyncClient(hang=5.0))
+    breaker = llm.breakers['primary'] = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(llm.acomplete(MESSAGES, temperature=0.5, max_tokens=5))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    assert breaker.allow()
+
+
+@pytest.fixture
+def mock_llm():
+    """Factory for a mock Groq server on a free port; records the model of every request"""
+    servers = []
+
+    def start(failing_models=(), **settings):
+        settings = {'latency': 'fixed', 'ttft': 0.0, 'tokens_per_second': 10000, 'seed': 1, **settings}
+        server = serve('127.0.0.1', 0, MockSettings(**settings))
+        handler = server.RequestHandlerClass
+        server.requests = []
+
+        class RecordingHandler(handler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                model = json.loads(body or b"{}").get('model')
+                server.requests.append(model)
+                if model in failing_models:
+                    self._send_json(503, {"error": {"message": "down", "type": "mock_error"}})
+                    return
+                self.rfile = io.BytesIO(body)
+                super().do_POST()
+
+        server.RequestHandlerClass = RecordingHandler
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@requires_groq
+def test_groq_status_errors_against_the_mock_server(mock_llm):
+    from groq import APIStatusError
+
+    server = mock_llm(failing_models=('primary',))
+    llm = LLMGateway('test-key', server.url, models=['primary', 'fallback'], max_retries=0, backoff_base=0.0)
+    assert llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert "".join(llm.stream(MESSAGES, temperature=0.5, max_tokens=5))
+    assert server.requests == ['primary', 'fallback', 'primary', 'fallback']
+
+    server = mock_llm(error_rate=1.0, error_statuses=[400])
+    llm = LLMGateway('test-key', server.url, models=['primary', 'fallback'], backoff_base=0.0)
+    with pytest.raises(APIStatusError):
+        llm.complete(MESSAGES, temperature=0.5, max_tokens=5)
+    assert server.requests == ['primary']
@@ -0,0 +1,98 @@
+import json
+import socket
+import urllib.request
+
+import pytest
+
+from phase2_database import metrics as metrics_module
+from phase2_database.metrics import MetricsRegistry, Histogram, span, observe, start_metrics_server
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, 'metrics', fresh)
+    return fresh
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.1, 1.0, 10.0))
+    for value in (0.05, 0.5, 0.5, 5.0, 50.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == float('inf')
+    assert Histogram((1.0,)).quantile(0.5) is None
+
+
+def test_span_records_duration_sizes_and_cache_hits(registry):
+    with span('vector_query', backend='numpy', queries=3) as s:
+        s['cache_hit'] = False
+    summary = registry.to_dict()
+
+    durations = summary['histograms']['stage_duration_seconds']
+    assert [d['labels'] for d in durations] == [{'stage': 'vector_query', 'backend': 'numpy'}]
+    assert durations[0]['count'] == 1
+    sizes = summary['histograms']['stage_size']
+    assert sizes[0]['labels'] == {'stage': 'vector_query', 'field': 'queries'} and sizes[0]['sum'] == 3
+    assert summary['counters']['stage_cache_total'] == [
+        {'labels': {'stage': 'vector_query', 'cache': 'cache_hit', 'result': 'miss'}, 'value': 1.0}]
+    assert summary['recent_spans'][0]['stage'] == 'vector_query'
+    assert summary['recent_spans'][0]['error'] is None
+
+
+def test_failed_span_is_counted_and_reraised(registry):
+    with pytest.raises(KeyError):
+        with span('retrieval'):
+            raise KeyError('missing')
+    assert registry.to_dict()['counters']['stage_errors_total'] == [
+        {'labels': {'stage': 'retrieval', 'error': 'KeyError'}, 'value': 1.0}]
+
+
+def test_prometheus_exposition(registry):
+    observe('llm_ttft_seconds', 0.3, model='llama "70b"')
+    observe('llm_ttft_seconds', 3.0, model='llama "70b"')
+    registry.inc('stage_cache_total', {'stage': 'answer_cache_lookup', 'result': 'hit'}, help_text="Cache lookups")
+    text = registry.to_prometheus()
+    lines = text.splitlines()
+
+    assert "# HELP stage_cache_total Cache lookups" in lines
+    assert "# TYPE stage_cache_total counter" in lines
+    assert 'stage_cache_total{result="hit",stage="answer_cache_lookup"} 1' in lines
+    assert "# TYPE llm_ttft_seconds histogram" in lines
+    labels = 'model="llama \\"70b\\""'
+    assert f'llm_ttft_seconds_bucket{{{labels},le="0.25"}} 0' in lines
+    assert f'llm_ttft_seconds_bucket{{{labels},le="0.5"}} 1' in lines
+    assert f'llm_ttft_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f'llm_ttft_seconds_count{{{labels}}} 2' in lines
+    assert f'llm_ttft_seconds_sum{{{labels}}} 3.300000' in lines
+    assert text.endswith("\n")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_metrics_server_serves_both_formats_on_localhost(registry, monkeypatch):
+    monkeypatch.setattr(metrics_module, '_server', None)
+    monkeypatch.delenv('METRICS_PORT', raising=False)
+    monkeypatch.delenv('METRICS_HOST', raising=False)
+    assert start_metrics_server() is None
+
+    server = start_metrics_server(free_port())
+    try:
+        assert server.server_address[0] == '127.0.0.1'
+        assert start_metrics_server(free_port()) is server
+        with span('intent_route'):
+            pass
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as r:
+            assert r.headers['Content-Type'].startswith("text/plain")
+            assert 'stage="intent_route"' in r.read().decode('utf-8')
+        with urllib.request.urlopen(f"{base}/metrics.json", timeout=5) as r:
+            assert json.load(r)['recent_spans'][0]['stage'] == 'intent_route'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,103 @@
+import json
+import threading
+import http.client
+import urllib.error
+import urllib.request
+
+import pytest
+
+from phase3_qa_system.mock_llm_server import MockSettings, MOCK_MODELS, make_reply, serve
+
+MESSAGES = [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "plan a week in kerala"}]
+
+
+@pytest.fixture
+def mock_llm():
+    """Factory for a running mock server on a free port; yields its base URL"""
+    servers = []
+
+    def start(**settings):
+        settings = {'latency': 'fixed', 'ttft': 0.0, 'tokens_per_second': 10000, 'seed': 1, **settings}
+        server = serve('127.0.0.1', 0, MockSettings(**settings))
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(url, payload, raw=None):
+    body = raw if raw is not None else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_completion_contract(mock_llm):
+    url = mock_llm(response_tokens=20)
+    with post(f"{url}/v1/chat/completions", {'model': 'gemma2-9b-it', 'messages': MESSAGES, 'max_tokens': 5}) as r:
+        assert r.status == 200
+        body = json.load(r)
+    assert body['object'] == 'chat.completion'
+    assert body['model'] == 'gemma2-9b-it'
+    choice = body['choices'][0]
+    assert choice['message'] == {'role': 'assistant', 'content': "".join(make_reply(MESSAGES, 5))}
+    assert choice['finish_reason'] == 'length'
+    usage = body['usage']
+    assert usage['completion_tokens'] == 5
+    assert usage['total_tokens'] == usage['prompt_tokens'] + 5
+
+
+def test_streaming_contract(mock_llm):
+    url = mock_llm(response_tokens=6)
+    with post(f"{url}/openai/v1/chat/completions", {'messages': MESSAGES, 'stream': True}) as r:
+        assert r.headers['Content-Type'] == 'text/event-stream'
+        events = [line[len(b"data: "):] for line in r.read().splitlines() if line.startswith(b"data: ")]
+    assert events[-1] == b"[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert {chunk['object'] for chunk in chunks} == {'chat.completion.chunk'}
+    assert chunks[0]['choices'][0]['delta'] == {'role': 'assistant', 'content': ''}
+    text = "".join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks)
+    assert text == "".join(make_reply(MESSAGES, 6))
+    assert chunks[-1]['choices'][0]['finish_reason'] == 'stop'
+    assert chunks[-1]['x_groq']['usage']['completion_tokens'] == 6
+
+
+def test_models_are_listed(mock_llm):
+    url = mock_llm()
+    with urllib.request.urlopen(f"{url}/openai/v1/models", timeout=5) as r:
+        assert [model['id'] for model in json.load(r)['data']] == MOCK_MODELS
+
+
+@pytest.mark.parametrize('path, raw, status', [
+    ('/v1/chat/completions', b'{not json', 400),
+    ('/v1/embeddings', b'{}', 404),
+])
+def test_bad_requests_are_rejected(mock_llm, path, raw, status):
+    url = mock_llm()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f"{url}{path}", None, raw=raw)
+    assert error.value.code == status
+    assert 'message' in json.load(error.value)['error']
+
+
+def test_injected_errors_use_the_configured_statuses(mock_llm):
+    url = mock_llm(error_rate=1.0, error_statuses=[429])
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f"{url}/v1/chat/completions", {'messages': MESSAGES})
+    assert error.value.code == 429
+
+
+def test_dropped_streams_end_without_done(mock_llm):
+    url = mock_llm(drop_rate=1.0, response_tokens=10)
+    with post(f"{url}/v1/chat/completions", {'messages': MESSAGES, 'stream': True}) as r:
+        with pytest.raises(http.client.IncompleteRead) as error:
+            r.read()
+    assert b"[DONE]" not in error.value.partial
+
+
+def test_unknown_latency_distribution_is_rejected():
+    with pytest.raises(ValueError):
+        MockSettings(latency='pareto')
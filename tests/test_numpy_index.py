@@ -0,0 +1,83 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from phase2_database.numpy_index import NumpyIndex
+
+
+def build(index, ids):
+    vectors = np.eye(len(ids), 4, dtype=np.float32)
+    metadatas = [{'tour_name': chunk_id, 'chunk_type': 'main_info'} for chunk_id in ids]
+    index.build(ids, [f"doc {chunk_id}" for chunk_id in ids], metadatas, vectors)
+
+
+def test_query_ranks_by_cosine_and_applies_where(tmp_path):
+    index = NumpyIndex(str(tmp_path))
+    build(index, ['agra', 'goa', 'jaipur'])
+    results = index.query(np.array([[0.1, 1.0, 0.0, 0.0]]), n_results=2)
+    assert results['ids'] == [['goa', 'agra']]
+    filtered = index.query(np.array([[0.1, 1.0, 0.0, 0.0]]), n_results=2, where={'tour_name': 'jaipur'})
+    assert filtered['ids'] == [['jaipur']]
+
+
+def test_refresh_picks_up_a_rebuild_by_another_process(tmp_path):
+    writer = NumpyIndex(str(tmp_path))
+    build(writer, ['agra', 'goa'])
+    reader = NumpyIndex(str(tmp_path))
+    assert reader.load()
+    assert not reader.refresh()
+
+    build(writer, ['jaipur', 'kochi', 'leh'])
+    mtime = os.path.getmtime(writer.manifest_path) + 1
+    os.utime(writer.manifest_path, (mtime, mtime))
+
+    assert reader.refresh()
+    assert reader.snapshot.ids == ('jaipur', 'kochi', 'leh')
+    assert reader.query(np.array([[0.0, 0.0, 1.0, 0.0]]), n_results=1)['ids'] == [['leh']]
+
+
+def test_snapshots_are_immutable_and_outlive_a_reload(tmp_path):
+    index = NumpyIndex(str(tmp_path))
+    build(index, ['agra', 'goa', 'jaipur'])
+    old = index.snapshot
+    with pytest.raises(AttributeError):
+        old.ids = ()
+    index.row_mask({'tour_name': 'goa'})
+
+    build(index, ['kochi'])
+    assert index.snapshot is not old
+    assert old.ids == ('agra', 'goa', 'jaipur') and old.embeddings.shape[0] == 3
+    assert index.row_mask({'tour_name': 'goa'}, old).tolist() == [False, True, False]
+    assert index.row_mask({'tour_name': 'goa'}).tolist() == [False]
+
+
+def test_queries_never_mix_rows_from_two_builds(tmp_path):
+    writer = NumpyIndex(str(tmp_path / 'index'))
+    build(writer, ['agra', 'goa', 'jaipur', 'kochi'])
+    reader = NumpyIndex(writer.index_dir)
+    reader.load()
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        try:
+            while not stop.is_set():
+                results = reader.query(np.eye(4, dtype=np.float32)[3:], n_results=4,
+                                       where={'chunk_type': 'main_info'})
+                for chunk_id, document in zip(results['ids'][0], results['documents'][0]):
+                    assert document == f"doc {chunk_id}"
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    try:
+        for i in range(100):
+            build(writer, ['leh', 'goa'] if i % 2 else ['agra', 'goa', 'jaipur', 'kochi'])
+            reader.load()
+    finally:
+        stop.set()
+        thread.join()
+    assert errors == []
@@ -0,0 +1,104 @@
+import numpy as np
+
+from phase2_database import registry
+from phase2_database.query_cache import QueryEmbeddingCache
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_keys_fold_case_and_punctuation():
+    cache = QueryEmbeddingCache(max_entries=4)
+    cache.put("Best tours in Kerala?", vector(1, 2))
+    assert np.array_equal(cache.get("best  tours in kerala"), vector(1, 2))
+    assert cache.get("best tours in goa") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("agra", vector(1, 0))
+    cache.put("goa", vector(0, 1))
+    cache.get("agra")
+    cache.put("jaipur", vector(1, 1))
+    assert cache.get("goa") is None
+    assert cache.get("agra") is not None and cache.get("jaipur") is not None
+
+
+def test_returned_vectors_are_copies():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("agra", vector(1, 0))
+    cache.get("agra")[0] = 5
+    assert np.array_equal(cache.get("agra"), vector(1, 0))
+
+
+def test_mismatched_dimensions_are_ignored():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("agra", vector(1, 0))
+    cache.put("goa", vector(1, 0, 0))
+    assert cache.get("goa") is None
+
+
+def test_persisted_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache' / 'queries')
+    cache = QueryEmbeddingCache(max_entries=4, persist_path=path)
+    cache.put("agra", vector(1, 2))
+    cache.flush()
+
+    warm = QueryEmbeddingCache(max_entries=4, persist_path=path)
+    assert np.array_equal(warm.get("agra"), vector(1, 2))
+    # A different size cannot reuse the file
+    assert QueryEmbeddingCache(max_entries=8, persist_path=path).get("agra") is None
+
+
+def test_registry_keys_the_cache_on_the_loaded_backend(monkeypatch):
+    model = registry.DEFAULT_MODEL_NAME
+    monkeypatch.delenv('QUERY_CACHE_DIR', raising=False)
+    monkeypatch.setattr(registry, '_query_caches', {})
+    for backend, loaded in (('onnx', 'torch'), ('torch', 'torch'), ('onnx-int8', 'onnx-int8')):
+        monkeypatch.setitem(registry._models, (model, backend), object())
+        monkeypatch.setitem(registry._loaded_backends, (model, backend), loaded)
+    # ONNX fell back to torch: both share the torch vectors, int8 does not
+    assert registry.get_query_cache(model, 'onnx') is registry.get_query_cache(model, 'torch')
+    assert registry.get_query_cache(model, 'onnx-int8') is not registry.get_query_cache(model, 'torch')
+
+
+def test_caches_sharing_a_path_merge_their_entries_on_save(tmp_path):
+    path = str(tmp_path / 'queries')
+    first = QueryEmbeddingCache(max_entries=4, persist_path=path, flush_every=1)
+    second = QueryEmbeddingCache(max_entries=4, persist_path=path, flush_every=1)
+    first.put("agra", vector(1, 0))
+    second.put("goa", vector(0, 1))
+    first.put("jaipur", vector(1, 1))
+
+    # Each works on its own copy between saves
+    assert second.get("jaipur") is None
+    assert np.array_equal(first.get("goa"), vector(0, 1))
+
+    # Nothing either process added was lost by the other's save
+    warm = QueryEmbeddingCache(max_entries=4, persist_path=path)
+    assert np.array_equal(warm.get("agra"), vector(1, 0))
+    assert np.array_equal(warm.get("goa"), vector(0, 1))
+    assert np.array_equal(warm.get("jaipur"), vector(1, 1))
+
+
+def test_a_full_cache_keeps_its_own_entries_when_merging(tmp_path):
+    path = str(tmp_path / 'queries')
+    other = QueryEmbeddingCache(max_entries=2, persist_path=path)
+    other.put("agra", vector(1, 0))
+    other.put("goa", vector(0, 1))
+    other.flush()
+
+    cache = QueryEmbeddingCache(max_entries=2, persist_path=path)
+    cache.clear()
+    cache.put("jaipur", vector(1, 1))
+    cache.flush()
+    # clear() replaced the file, so nothing was merged back
+    assert QueryEmbeddingCache(max_entries=2, persist_path=path).get("agra") is None
+
+    other.put("kochi", vector(2, 2))
+    other.flush()
+    warm = QueryEmbeddingCache(max_entries=2, persist_path=path)
+    assert warm.get("kochi") is not None and warm.get("goa") is not None
+    assert warm.get("jaipur") is None
@@ -0,0 +1,69 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from phase2_database import registry
+
+MODEL = registry.DEFAULT_MODEL_NAME
+pytestmark = pytest.mark.usefixtures('empty_registry')
+
+
+class FakeChromaClient:
+    def __init__(self, path):
+        self.path = path
+
+    def get_collection(self, name):
+        return SimpleNamespace(name=name)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Record every SentenceTransformer and PersistentClient construction"""
+    calls = []
+
+    def sentence_transformer(name):
+        calls.append(('model', name))
+        return SimpleNamespace(name=name)
+
+    def persistent_client(path):
+        calls.append(('client', path))
+        return FakeChromaClient(path)
+
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', SimpleNamespace(SentenceTransformer=sentence_transformer))
+    monkeypatch.setitem(sys.modules, 'chromadb', SimpleNamespace(PersistentClient=persistent_client))
+    return calls
+
+
+def test_embedding_model_is_loaded_once(loads):
+    model = registry.get_embedding_model(MODEL)
+    assert registry.get_embedding_model(MODEL) is model
+    assert registry.get_loaded_backend(MODEL) == 'torch'
+    assert loads == [('model', MODEL)]
+
+
+def test_chroma_client_is_shared_per_directory(loads, tmp_path):
+    client = registry.get_chroma_client(str(tmp_path))
+    assert registry.get_chroma_client(os.path.join(str(tmp_path), '.')) is client
+    assert registry.get_chroma_client(str(tmp_path / 'other')) is not client
+    assert [call for call in loads if call[0] == 'client'] == [('client', str(tmp_path)),
+                                                              ('client', str(tmp_path / 'other'))]
+
+
+def test_vector_databases_share_the_model_and_client(loads, tmp_path):
+    db = registry.get_vector_database(str(tmp_path), MODEL)
+    assert registry.get_vector_database(str(tmp_path), MODEL) is db
+
+    other = registry.get_vector_database(str(tmp_path / 'other'), MODEL)
+    assert other is not db
+    assert other.embedding_generator.model is db.embedding_generator.model
+    assert other.embedding_generator.query_cache is db.embedding_generator.query_cache
+    assert [call[0] for call in loads].count('model') == 1
+
+
+def test_reset_registry_drops_cached_resources(loads, tmp_path):
+    db = registry.get_vector_database(str(tmp_path), MODEL)
+    registry.reset_registry()
+    assert registry.get_vector_database(str(tmp_path), MODEL) is not db
+    assert [call[0] for call in loads].count('model') == 2
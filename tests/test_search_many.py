@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+PLACES = ['agra', 'goa', 'jaipur', 'kochi']
+
+
+@pytest.fixture
+def model(model):
+    """One-hot encoder over PLACES"""
+    model.encode_text = lambda t: [float(place in t.lower()) for place in PLACES]
+    return model
+
+
+@pytest.fixture(params=['chroma', 'numpy'])
+def db(request, make_db):
+    db = make_db(request.param)
+    db.index_tours([
+        {'name': f"{place.title()} Explorer", 'destinations': [place.title()], 'highlights': []}
+        for place in PLACES
+    ])
+    return db
+
+
+QUERIES = ["tours in Goa", "Kochi backwaters", "Agra and Jaipur", "Goa beaches"]
+
+
+def test_results_match_single_searches_in_query_order(db):
+    batched = db.search_many(QUERIES, n_results=2)
+    assert len(batched) == len(QUERIES)
+    for query, result in zip(QUERIES, batched):
+        single = db.search(query, n_results=2)
+        assert result['ids'] == single['ids']
+        assert result['documents'] == single['documents']
+        assert np.allclose(result['distances'], single['distances'])
+    assert batched[0]['metadatas'][0][0]['tour_name'] == "Goa Explorer"
+    assert batched[1]['metadatas'][0][0]['tour_name'] == "Kochi Explorer"
+
+
+def test_queries_are_encoded_and_searched_in_one_batch(db, model):
+    if db.numpy_index is None:
+        db.collection.queries.clear()
+    model.batches.clear()
+    db.search_many(["Agra forts", "Jaipur palaces", "Kochi"], n_results=1)
+    assert model.batches == [3]
+    if db.numpy_index is None:
+        assert db.collection.queries == [3]
+
+
+def test_repeated_queries_are_served_from_the_query_cache(db, model):
+    db.search_many(QUERIES, n_results=1)
+    model.batches.clear()
+    db.search_many(QUERIES + ["Jaipur"], n_results=1)
+    assert model.batches == [1]
+
+
+def test_no_queries_means_no_work(db, model):
+    model.batches.clear()
+    assert db.search_many([]) == []
+    assert model.batches == []
@@ -0,0 +1,49 @@
+import pytest
+
+from phase2_database.catalog import TourCatalog
+from phase2_database.fuzzy_match import FuzzyMatcher
+from phase4_itinerary.template_matcher import TemplateMatcher
+
+TOURS = [
+    {'name': 'Royal Rajasthan', 'theme': 'Heritage', 'destinations': ['Jaipur', 'Udaipur'],
+     'highlights': ['Amber Fort', 'Lake Pichola boat ride'], 'metadata': {'completeness_score': 4}},
+    {'name': 'Pink City Food Walk', 'theme': 'Culinary', 'destinations': ['Jaipur'],
+     'highlights': ['Street food'], 'metadata': {'completeness_score': 2}},
+    {'name': 'Varanasi Ghats', 'theme': 'Pilgrimage', 'destinations': ['Varanasi'],
+     'highlights': ['Evening aarti'], 'metadata': {'completeness_score': 3}},
+    {'name': 'Kerala Backwaters', 'theme': 'Nature', 'destinations': ['Alleppey'],
+     'highlights': ['Houseboat stay', 'Street food in Kochi'], 'metadata': {'completeness_score': 3}},
+]
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    catalog = TourCatalog(TOURS)
+    return TemplateMatcher(catalog, FuzzyMatcher.from_catalog(catalog))
+
+
+def names(tours):
+    return [tour.name for tour in tours]
+
+
+def test_location_matches_rank_first(matcher):
+    # Both visit Jaipur: the more complete tour wins the tie
+    assert names(matcher.match("Jaipur", "")) == ['Royal Rajasthan', 'Pink City Food Walk']
+    assert names(matcher.match("Udaipur", "", k=1)) == ['Royal Rajasthan']
+
+
+def test_interests_reorder_but_never_leave_the_location(matcher):
+    assert names(matcher.match("Jaipur", "food")) == ['Pink City Food Walk', 'Royal Rajasthan']
+    # Kerala Backwaters also mentions street food but is not in Jaipur
+    assert 'Kerala Backwaters' not in names(matcher.match("Jaipur", "street food"))
+
+
+def test_interests_alone_pick_tours_without_a_location_match(matcher):
+    assert names(matcher.match("Ladakh", "pilgrimage")) == ['Varanasi Ghats']
+    assert names(matcher.match("", "food", k=1)) == ['Pink City Food Walk']
+
+
+def test_aliases_typos_and_place_lists(matcher):
+    assert names(matcher.match("Benaras", "", k=1)) == ['Varanasi Ghats']
+    assert set(names(matcher.match("Jaipr & Alleppey", ""))) == {
+        'Royal Rajasthan', 'Pink City Food Walk', 'Kerala Backwaters'}